@@ -0,0 +1,340 @@
+import os
+import gc
+import sys
+import json
+import time
+import inspect
+import argparse
+import platform
+import itertools
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+from modules import SampleSizeCalculator as ssc
+from modules import RandomSampler as rs
+from modules import StructuredSampler as ss
+from modules import ItemReplacer as ir
+from benchmarks import SyntheticData as syn
+
+
+def accepts(cls,
+            parameter: str):
+    """
+    Checks whether the constructor of cls takes parameter, which classes 
+    from older commits may not.
+    """
+    return parameter in inspect.signature(cls).parameters
+
+
+def seeded(cls,
+           *args,
+           **kwargs):
+    """
+    Builds a sampler or replacer with a fixed seed. Classes from commits 
+    older than the random_state parameter draw from the global NumPy 
+    generator, which is seeded instead, so the suite runs on those commits.
+
+    Args:
+        cls (type): The class to build.
+        *args: The positional arguments of the constructor.
+        **kwargs: The keyword arguments of the constructor.
+
+    Returns:
+        The built instance.
+    """
+    if accepts(cls, 'random_state'):
+        return cls(*args, random_state=0, **kwargs)
+    np.random.seed(0)
+    return cls(*args, **kwargs)
+
+
+def structured_sample(case):
+    sample_size = ssc.SampleSize().sample_size(population_size=len(case['master']))
+    return seeded(ss.StructuredSampler,
+                  case['master'],
+                  sample_size,
+                  syn.IDENTIFIER_COL,
+                  syn.STRUCTURE_COLS).structured_sample()
+
+
+def largest_remainder_sample(case):
+    sample_size = ssc.SampleSize().sample_size(population_size=len(case['master']))
+    return seeded(ss.StructuredSampler,
+                  case['master'],
+                  sample_size,
+                  syn.IDENTIFIER_COL,
+                  syn.STRUCTURE_COLS,
+                  allocation='largest_remainder').structured_sample()
+
+
+def random_sample(case):
+    return seeded(rs.RandomSampler, case['master']).sampled_df()
+
+
+def direct_replacement(case):
+    return seeded(ir.DirectItemReplacer,
+                  case['master'],
+                  case['working'],
+                  syn.IDENTIFIER_COL,
+                  case['items']).replacer()
+
+
+def structured_replacement(case):
+    return seeded(ir.StructuredItemReplacer,
+                  case['master'],
+                  case['working'],
+                  syn.IDENTIFIER_COL,
+                  case['items'],
+                  syn.STRUCTURE_COLS).replacer()
+
+
+def subset_check(case):
+    return ir.ItemReplacerCheck(case['master'],
+                                case['working']).is_subdataframe()
+
+
+METHODS = {'StructuredSampler.structured_sample': structured_sample,
+           'StructuredSampler.largest_remainder': largest_remainder_sample,
+           'RandomSampler.sampled_df': random_sample,
+           'DirectItemReplacer.replacer': direct_replacement,
+           'StructuredItemReplacer.replacer': structured_replacement,
+           'ItemReplacerCheck.is_subdataframe': subset_check}
+
+REQUIRES = {'StructuredSampler.largest_remainder': (ss.StructuredSampler, 'allocation')}
+
+CASE_AXES = ('rows', 'strata', 'skew', 'columns', 'items')
+
+
+def build_case(rows: int,
+               strata: int,
+               skew: float,
+               columns: int,
+               items: int,
+               working_fraction: float,
+               seed: int = 0):
+    """
+    Generates the inputs shared by every method for one point of the grid.
+
+    Returns:
+        dict: The 'master' and 'working' DataFrames and the 'items' to replace.
+    """
+    master_df = syn.synthetic_frame(rows, strata, skew, columns, seed)
+    working_df = syn.working_subset(master_df,
+                                    max(int(rows * working_fraction), items),
+                                    seed + 1)
+    return {'master': master_df,
+            'working': working_df,
+            'items': syn.replacement_items(working_df, items, seed + 2)}
+
+
+def measure(function,
+            case: dict,
+            repeat: int = 3):
+    """
+    Times a method over repeat runs, then runs it once more under tracemalloc 
+    to record its peak memory, so the tracing overhead does not skew the 
+    timings. NumPy and pandas buffers are reported to tracemalloc.
+
+    Args:
+        function (callable): The method, taking the case.
+        case (dict): The inputs of the method.
+        repeat (int): The number of timed runs.
+
+    Returns:
+        dict: The best and median 'seconds', the 'peak_bytes' allocated 
+        during the call and the number of 'output_rows'.
+    """
+    timings = []
+    for run in range(repeat):
+        gc.collect()
+        started_at = time.perf_counter()
+        output = function(case)
+        timings.append(time.perf_counter() - started_at)
+        del output
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        output = function(case)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(timings),
+            'median_seconds': float(np.median(timings)),
+            'peak_bytes': int(peak_bytes),
+            'output_rows': len(output) if hasattr(output, '__len__') else None}
+
+
+def environment():
+    """
+    Describes the commit and machine the benchmark runs on.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()}
+
+
+def run(rows: list,
+        strata: list,
+        skew: list,
+        columns: list,
+        items: list,
+        methods: list = None,
+        working_fraction: float = 0.1,
+        repeat: int = 3,
+        log=sys.stderr):
+    """
+    Benchmarks every method on every point of the grid of scale axes. 
+    Methods whose REQUIRES parameter the checked out commit lacks are 
+    skipped.
+
+    Args:
+        rows (list): The row counts of the master table.
+        strata (list): The numbers of strata.
+        skew (list): The Zipf exponents of the stratum sizes.
+        columns (list): The numbers of columns.
+        items (list): The numbers of items to replace.
+        methods (list): The names of the methods to run. All of METHODS when None.
+        working_fraction (float): The size of the working table relative to 
+        the master table.
+        repeat (int): The number of timed runs per measurement.
+        log (file): Where progress lines are written, None for silence.
+
+    Returns:
+        dict: The 'environment' and the list of 'results'.
+    """
+    methods = list(METHODS) if methods is None else methods
+    unsupported = [method for method in methods
+                   if method in REQUIRES and not accepts(*REQUIRES[method])]
+    if unsupported and log is not None:
+        print(f'Skipping {unsupported}: not supported by this commit.', file=log, flush=True)
+    methods = [method for method in methods if method not in unsupported]
+    results = []
+    for point in itertools.product(rows, strata, skew, columns, items):
+        parameters = dict(zip(CASE_AXES, point))
+        case = build_case(working_fraction=working_fraction, **parameters)
+        for method in methods:
+            result = dict(method=method, **parameters, **measure(METHODS[method], case, repeat))
+            results.append(result)
+            if log is not None:
+                print(f'{method} {parameters}: {result["seconds"]:.4f}s, '
+                      f'{result["peak_bytes"] / 2**20:.1f} MiB', file=log, flush=True)
+        del case
+    return {'environment': environment(),
+            'results': results}
+
+
+def case_key(result: dict):
+    """
+    Identifies a result by its method and grid point.
+    """
+    return (result['method'],) + tuple(result[axis] for axis in CASE_AXES)
+
+
+def compare(baseline: dict,
+            current: dict,
+            threshold: float = 1.2):
+    """
+    Matches the results of two runs by method and grid point and flags the 
+    measurements that grew by more than threshold.
+
+    Args:
+        baseline (dict): The output of run() for the reference commit.
+        current (dict): The output of run() for the commit under test.
+        threshold (float): The ratio above which a measurement regressed.
+
+    Returns:
+        list: One dict per matched result with the 'time_ratio', the 
+        'memory_ratio' and whether it is a 'regression'.
+    """
+    baseline_results = {case_key(result): result for result in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        reference = baseline_results.get(case_key(result))
+        if reference is None:
+            continue
+        time_ratio = result['seconds'] / max(reference['seconds'], 1e-9)
+        memory_ratio = result['peak_bytes'] / max(reference['peak_bytes'], 1)
+        comparison.append(dict(zip(('method',) + CASE_AXES, case_key(result)),
+                               time_ratio=round(time_ratio, 3),
+                               memory_ratio=round(memory_ratio, 3),
+                               regression=time_ratio > threshold or memory_ratio > threshold))
+    return comparison
+
+
+def build_parser():
+    """
+    Builds the argument parser of the run and compare commands.
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.Benchmark',
+                                     description='Scaling benchmarks of the samplers, replacers and subset check.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmarks and store the results as JSON.')
+    run_parser.add_argument('--rows', type=float, nargs='+', default=[1e4, 1e5, 1e6],
+                            help='The row counts of the master table, e.g. 1e4 1e7.')
+    run_parser.add_argument('--strata', type=int, nargs='+', default=[100])
+    run_parser.add_argument('--skew', type=float, nargs='+', default=[0.0, 1.2])
+    run_parser.add_argument('--columns', type=int, nargs='+', default=[8])
+    run_parser.add_argument('--items', type=int, nargs='+', default=[100])
+    run_parser.add_argument('--methods', nargs='+', choices=list(METHODS), default=None)
+    run_parser.add_argument('--working-fraction', type=float, default=0.1)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--output', default=None,
+                            help='The JSON file. benchmarks/results/<commit>.json when omitted.')
+
+    compare_parser = commands.add_parser('compare', help='Compare two result files.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=1.2)
+    return parser
+
+
+def main(argv: list = None):
+    """
+    Runs the benchmarks or compares two result files, exiting with 1 when a 
+    comparison finds a regression.
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == 'run':
+        results = run([int(row_count) for row_count in args.rows],
+                      args.strata,
+                      args.skew,
+                      args.columns,
+                      args.items,
+                      args.methods,
+                      args.working_fraction,
+                      args.repeat)
+        output = args.output or os.path.join('benchmarks', 'results',
+                                             f'{results["environment"]["commit"] or "results"}.json')
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        with open(output, 'w', encoding='UTF8') as output_file:
+            json.dump(results, output_file, indent=2)
+        print(output)
+        return 0
+
+    with open(args.baseline, encoding='UTF8') as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.current, encoding='UTF8') as current_file:
+        current = json.load(current_file)
+    comparison = compare(baseline, current, args.threshold)
+    for row in comparison:
+        flag = 'REGRESSION' if row['regression'] else 'ok'
+        point = ' '.join(f'{axis}={row[axis]}' for axis in CASE_AXES)
+        print(f'{flag:10} {row["method"]:40} {point}  '
+              f'time x{row["time_ratio"]}  memory x{row["memory_ratio"]}')
+    return 1 if any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+
+IDENTIFIER_COL = 'Item_ID'
+STRUCTURE_COLS = ['Region', 'Channel']
+
+
+def stratum_probabilities(n_strata: int,
+                          skew: float = 0.0):
+    """
+    Computes Zipf-like stratum frequencies, the k-th stratum having a weight 
+    of 1 / (k + 1) ** skew. A skew of 0 gives strata of equal expected size, 
+    and larger skews concentrate the rows in the first strata.
+
+    Args:
+        n_strata (int): The number of strata.
+        skew (float): The exponent of the Zipf law.
+
+    Returns:
+        np.ndarray: The probability of each stratum.
+    """
+    weights = 1.0 / np.arange(1, n_strata + 1, dtype=float) ** skew
+    return weights / weights.sum()
+
+
+def synthetic_frame(n_rows: int,
+                    n_strata: int = 100,
+                    skew: float = 0.0,
+                    n_columns: int = 8,
+                    seed: int = 0):
+    """
+    Generates a master-like table: a unique identifier column, two structure 
+    columns whose combinations form about n_strata strata of skewed sizes, 
+    and filler columns (floats, integers and labels) up to n_columns columns.
+
+    Args:
+        n_rows (int): The number of rows.
+        n_strata (int): The number of structure combinations rows are drawn 
+        from. Very skewed strata may leave some of them empty.
+        skew (float): The Zipf exponent of the stratum sizes.
+        n_columns (int): The total number of columns, at least 3.
+        seed (int): The seed of the generator.
+
+    Returns:
+        pd.DataFrame: The synthetic table.
+    """
+    rng = np.random.default_rng(seed)
+    codes = rng.choice(n_strata,
+                       size=n_rows,
+                       p=stratum_probabilities(n_strata, skew))
+    channels = max(int(np.ceil(np.sqrt(n_strata))), 1)
+    region_labels = np.array([f'R{code:04d}' for code in range(n_strata // channels + 1)],
+                             dtype=object)
+    channel_labels = np.array([f'C{code:04d}' for code in range(channels)],
+                              dtype=object)
+
+    columns = {IDENTIFIER_COL: rng.permutation(n_rows).astype(np.int64) + 1_000_000,
+               STRUCTURE_COLS[0]: region_labels[codes // channels],
+               STRUCTURE_COLS[1]: channel_labels[codes % channels]}
+    filler_labels = np.array([f'L{code:03d}' for code in range(256)], dtype=object)
+    for position in range(max(n_columns - len(columns), 0)):
+        kind = position % 3
+        if kind == 0:
+            columns[f'Value_{position}'] = rng.random(n_rows)
+        elif kind == 1:
+            columns[f'Count_{position}'] = rng.integers(0, 10_000, n_rows)
+        else:
+            columns[f'Label_{position}'] = filler_labels[rng.integers(0, 256, n_rows)]
+    return pd.DataFrame(columns)
+
+
+def working_subset(master_df: pd.DataFrame,
+                   working_rows: int,
+                   seed: int = 0):
+    """
+    Draws the working table of a replacement scenario: random rows of the 
+    master table, so it is a subdataframe of it.
+
+    Args:
+        master_df (pd.DataFrame): The master table.
+        working_rows (int): The number of rows of the working table.
+        seed (int): The seed of the draw.
+
+    Returns:
+        pd.DataFrame: The working table, with a fresh RangeIndex.
+    """
+    rng = np.random.default_rng(seed)
+    positions = np.sort(rng.choice(len(master_df),
+                                   size=min(working_rows, len(master_df)),
+                                   replace=False))
+    return master_df.iloc[positions].reset_index(drop=True)
+
+
+def replacement_items(working_df: pd.DataFrame,
+                      n_items: int,
+                      seed: int = 0):
+    """
+    Picks the identifiers of the working rows to replace.
+
+    Args:
+        working_df (pd.DataFrame): The working table.
+        n_items (int): The number of items to replace.
+        seed (int): The seed of the draw.
+
+    Returns:
+        list: The identifiers to replace.
+    """
+    rng = np.random.default_rng(seed)
+    return rng.choice(working_df[IDENTIFIER_COL].to_numpy(),
+                      size=min(n_items, len(working_df)),
+                      replace=False).tolist()
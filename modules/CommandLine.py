@@ -0,0 +1,371 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from modules import SampleSizeCalculator as ssc
+from modules import DataReader as rd
+from modules import ProjectedSampler as prs
+from modules import SampleResult as sr
+from modules import ItemReplacer as ir
+from modules import Seeding as sd
+from modules import Profiling as pf
+
+
+def write_table(df: pd.DataFrame,
+                path: str):
+    """
+    Writes a DataFrame in the format given by the suffix of path: Parquet, 
+    Feather, or CSV (compressed when the suffix says so) otherwise. The 
+    index is never written.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to write.
+        path (str): The output path.
+    """
+    name = path.lower()
+    if name.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    elif name.endswith(('.feather', '.arrow')):
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+
+
+def sample_size(args,
+                population_size: int):
+    """
+    Returns the explicit --size, or the size calculated from the sampling 
+    parameters for the population.
+    """
+    if args.size is not None:
+        return args.size
+    return ssc.SampleSize(sample_portion=args.portion,
+                          confidence_level=args.confidence,
+                          standard_error=args.error).sample_size(
+                              population_size=population_size)
+
+
+def run_size(args):
+    """
+    Calculates the sample size of a population, given or counted in a file.
+    """
+    if args.population is None:
+        args.population = rd.reader_for(args.input, encoding=args.encoding).n_rows()
+    return {'population_size': args.population,
+            'sample_size': sample_size(args, args.population)}
+
+
+def run_random(args):
+    """
+    Draws a simple random sample of a file and writes it.
+    """
+    reader = rd.reader_for(args.input, encoding=args.encoding)
+    n = sample_size(args, reader.n_rows())
+    sample_result = sr.SampleResult.random(reader, n, args.seed)
+    write_table(sample_result.to_df(args.columns), args.output)
+    return {'output': args.output,
+            'rows': len(sample_result),
+            'seed': sample_result.seed}
+
+
+def run_structured(args):
+    """
+    Draws a structure-preserving sample of a file, loading only its key 
+    columns before gathering the sampled rows, and writes it.
+    """
+    reader = rd.reader_for(args.input, encoding=args.encoding)
+    structured_sampler = prs.ProjectedStructuredSampler(reader,
+                                                        sample_size(args, reader.n_rows()),
+                                                        args.identifier,
+                                                        args.structure,
+                                                        args.allocation,
+                                                        args.seed,
+                                                        args.n_jobs)
+    structured_df = structured_sampler.structured_sample(args.columns)
+    write_table(structured_df, args.output)
+    if args.pivot_output is not None:
+        write_table(structured_sampler.working_pivot_df(), args.pivot_output)
+    return {'output': args.output,
+            'rows': len(structured_df),
+            'seed': structured_sampler.sampler.random_state}
+
+
+def replacement_items(args,
+                      working_df: pd.DataFrame):
+    """
+    Collects the identifiers to replace from --items and --items-file, cast 
+    to the dtype of the identifier column of the working DataFrame.
+    """
+    items = list(args.items or [])
+    if args.items_file is not None:
+        items_df = rd.reader_for(args.items_file, encoding=args.encoding).read([args.identifier])
+        items += items_df[args.identifier].to_list()
+    return pd.Series(items).astype(working_df[args.identifier].dtype).to_list()
+
+
+def run_replace(args):
+    """
+    Replaces items of a working file with items of a master file, directly 
+    or matching the structure columns, and writes the result.
+    """
+    master_df = rd.reader_for(args.master, encoding=args.encoding).read()
+    working_df = rd.reader_for(args.working, encoding=args.encoding).read()
+    items_to_replace = replacement_items(args, working_df)
+    if args.structure:
+        replacer = ir.StructuredItemReplacer(master_df,
+                                             working_df,
+                                             args.identifier,
+                                             items_to_replace,
+                                             args.structure,
+                                             random_state=args.seed)
+    else:
+        replacer = ir.DirectItemReplacer(master_df,
+                                         working_df,
+                                         args.identifier,
+                                         items_to_replace,
+                                         random_state=args.seed)
+    items_check = replacer.validate_items()
+    if items_check['valid'] == False:
+        raise ValueError('Items missing from the Working Dataframe: '
+                         f'{items_check["missing_from_working"]}')
+    replaced_df = replacer.replacer()
+    write_table(replaced_df, args.output)
+    return {'output': args.output,
+            'rows': len(replaced_df),
+            'replaced': int(working_df[args.identifier].isin(items_to_replace).sum()),
+            'seed': replacer.random_state}
+
+
+COMMANDS = {'size': run_size,
+            'random': run_random,
+            'structured': run_structured,
+            'replace': run_replace}
+
+
+def add_sampling_options(parser: argparse.ArgumentParser):
+    """
+    Adds the sample size options shared by the sampling commands.
+    """
+    parser.add_argument('--size', type=int, default=None,
+                        help='The sample size. Calculated from the options below when omitted.')
+    parser.add_argument('--portion', type=int, default=50,
+                        help='The sample portion, in %% (default: 50).')
+    parser.add_argument('--confidence', type=float, default=99,
+                        help='The confidence level, in %% (default: 99).')
+    parser.add_argument('--error', type=float, default=1,
+                        help='The standard error, in %% (default: 1).')
+
+
+def add_input_options(parser: argparse.ArgumentParser):
+    """
+    Adds the encoding and seed options shared by the file commands.
+    """
+    parser.add_argument('--encoding', default='UTF8',
+                        help='The encoding of CSV inputs (default: UTF8).')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='The seed of the run. A fresh one is drawn and reported when omitted.')
+
+
+def build_parser():
+    """
+    Builds the argument parser of every command.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(prog='python -m modules',
+                                     description='Sampling and replacing engines, without the Streamlit app.')
+    parser.add_argument('--profile', default=None,
+                        help='Append the timings of every stage to this JSON-lines file.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    size_parser = commands.add_parser('size', help='Calculate a sample size.')
+    population = size_parser.add_mutually_exclusive_group(required=True)
+    population.add_argument('--population', type=int, help='The population size.')
+    population.add_argument('--input', help='A file whose row count is the population size.')
+    size_parser.add_argument('--encoding', default='UTF8')
+    add_sampling_options(size_parser)
+
+    random_parser = commands.add_parser('random', help='Draw a simple random sample of a file.')
+    random_parser.add_argument('--input', required=True, help='The file to sample.')
+    random_parser.add_argument('--output', required=True, help='The sample file, CSV, Parquet or Feather.')
+    random_parser.add_argument('--columns', nargs='+', default=None, help='The columns to keep.')
+    add_sampling_options(random_parser)
+    add_input_options(random_parser)
+
+    structured_parser = commands.add_parser('structured', help='Draw a structure-preserving sample of a file.')
+    structured_parser.add_argument('--input', required=True, help='The file to sample.')
+    structured_parser.add_argument('--output', required=True, help='The sample file, CSV, Parquet or Feather.')
+    structured_parser.add_argument('--structure', nargs='+', required=True,
+                                   help='The columns that define the structure.')
+    structured_parser.add_argument('--identifier', default=None,
+                                   help='The column that uniquely identifies the rows.')
+    structured_parser.add_argument('--allocation', default='rounding',
+                                   choices=('rounding', 'largest_remainder'))
+    structured_parser.add_argument('--n-jobs', type=int, default=None,
+                                   help='The worker processes drawing the strata, -1 for all the cores.')
+    structured_parser.add_argument('--pivot-output', default=None,
+                                   help='Where to also write the weighted pivot.')
+    structured_parser.add_argument('--columns', nargs='+', default=None, help='The columns to keep.')
+    add_sampling_options(structured_parser)
+    add_input_options(structured_parser)
+
+    replace_parser = commands.add_parser('replace', help='Replace items of a working file with items of a master file.')
+    replace_parser.add_argument('--master', required=True, help='The master file.')
+    replace_parser.add_argument('--working', required=True, help='The working file, contained in the master file.')
+    replace_parser.add_argument('--output', required=True, help='The replaced file, CSV, Parquet or Feather.')
+    replace_parser.add_argument('--identifier', required=True,
+                                help='The column that uniquely identifies the items.')
+    replace_parser.add_argument('--items', nargs='+', default=None, help='The items to replace.')
+    replace_parser.add_argument('--items-file', default=None,
+                                help='A file whose identifier column lists the items to replace.')
+    replace_parser.add_argument('--structure', nargs='+', default=None,
+                                help='The columns, by priority, replacements must match. Direct replacement when omitted.')
+    add_input_options(replace_parser)
+
+    batch_parser = commands.add_parser('batch', help='Run the jobs of a job-spec file in a worker pool.')
+    batch_parser.add_argument('spec', help='The JSON job-spec file.')
+    batch_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                              help='The number of jobs run at the same time.')
+    return parser
+
+
+def job_arguments(job: dict):
+    """
+    Turns a job of a job-spec file into command-line arguments, e.g. 
+    {"command": "random", "n_jobs": 2} into ['random', '--n-jobs', '2'].
+
+    Args:
+        job (dict): The job, with its 'command' and options.
+
+    Returns:
+        list: The arguments.
+    """
+    arguments = [job['command']]
+    for option, value in job.items():
+        if option == 'command' or value is None or value is False:
+            continue
+        flag = '--' + option.replace('_', '-')
+        if value is True:
+            arguments.append(flag)
+        elif isinstance(value, (list, tuple)):
+            arguments += [flag] + [str(item) for item in value]
+        else:
+            arguments += [flag, str(value)]
+    return arguments
+
+
+def run_command(arguments: list):
+    """
+    Parses and runs one command, catching its errors.
+
+    Args:
+        arguments (list): The command-line arguments of the command.
+
+    Returns:
+        dict: The 'command', 'status' ('done' or 'failed'), 'seconds' and 
+        either the outcome of the command or its 'error'.
+    """
+    started_at = time.perf_counter()
+    outcome = {'command': None}
+    try:
+        args = build_parser().parse_args(arguments)
+        outcome['command'] = args.command
+        if args.command == 'batch':
+            raise ValueError('Batch jobs cannot be nested.')
+        if getattr(args, 'seed', 0) is None:
+            args.seed = sd.new_seed()
+        outcome.update(COMMANDS[args.command](args), status='done')
+    except SystemExit:
+        outcome.update(status='failed', error=f'Invalid arguments: {arguments}')
+    except Exception as error:
+        outcome.update(status='failed', error=f'{type(error).__name__}: {error}')
+    outcome['seconds'] = round(time.perf_counter() - started_at, 3)
+    return outcome
+
+
+def load_jobs(spec_path: str):
+    """
+    Reads the jobs of a job-spec file.
+
+    Args:
+        spec_path (str): The path of the JSON job-spec file.
+
+    Returns:
+        list: The jobs, as dicts.
+    """
+    with open(spec_path, encoding='UTF8') as spec_file:
+        spec = json.load(spec_file)
+    return spec['jobs'] if isinstance(spec, dict) else spec
+
+
+def start_profiling(profile_path: str):
+    """
+    Sends the profiling events of this process to a JSON-lines file.
+
+    Args:
+        profile_path (str): The path of the file, None to not profile.
+    """
+    if profile_path is not None:
+        pf.add_sink(pf.JsonLinesSink(profile_path))
+
+
+def run_batch(spec_path: str,
+              workers: int = 1,
+              profile_path: str = None):
+    """
+    Runs the jobs of a job-spec file in a process pool, printing one JSON 
+    line per job in spec order.
+
+    Args:
+        spec_path (str): The path of the JSON job-spec file.
+        workers (int): The number of jobs run at the same time.
+        profile_path (str): The JSON-lines file every worker appends its 
+        profiling events to, None to not profile.
+
+    Returns:
+        list: The outcome of every job.
+    """
+    job_list = [job_arguments(job) for job in load_jobs(spec_path)]
+    outcomes = []
+    if workers <= 1 or len(job_list) <= 1:
+        start_profiling(profile_path)
+        for index, arguments in enumerate(job_list):
+            outcomes.append(dict(run_command(arguments), job=index))
+            print(json.dumps(outcomes[-1]), flush=True)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(job_list)),
+                                 initializer=start_profiling,
+                                 initargs=(profile_path,)) as executor:
+            for index, outcome in enumerate(executor.map(run_command, job_list)):
+                outcomes.append(dict(outcome, job=index))
+                print(json.dumps(outcomes[-1]), flush=True)
+    return outcomes
+
+
+def main(argv: list = None):
+    """
+    Runs the command given on the command line.
+
+    Args:
+        argv (list): The arguments. sys.argv[1:] when None.
+
+    Returns:
+        int: The exit code, 1 if any job failed.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    args = build_parser().parse_args(argv)
+    if args.command == 'batch':
+        outcomes = run_batch(args.spec, args.workers, args.profile)
+    else:
+        start_profiling(args.profile)
+        outcomes = [run_command(argv)]
+        print(json.dumps(outcomes[0]), flush=True)
+    return 1 if any(outcome['status'] == 'failed' for outcome in outcomes) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
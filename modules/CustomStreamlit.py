@@ -1,7 +1,14 @@
+import os
+import time
 import toml
 import streamlit as st
 from streamlit_option_menu import option_menu
 from PIL import Image
+from modules import ParseCache as pc
+from modules import DataReader as rd
+from modules import ResultCache as rc
+from modules import JobExecutor as jb
+from modules import IdentifierIndex as ii
 
 config = toml.load('./.streamlit/config.toml')
 version = config['settings']['version']
@@ -222,6 +229,32 @@ class Custom:
         '''
         return st.caption(caption, unsafe_allow_html=True)
 
+    def __job_progress__(self,
+                         job,
+                         executor,
+                         poll_seconds: float):
+        if job.status in ('pending', 'running'):
+            fraction = job.progress.fraction()
+            description = job.progress.describe() or job.status
+            st.progress(fraction if fraction is not None else 0.0,
+                        text=f'{description} ({job.elapsed():.0f}s)')
+            if st.button(':x: Cancel :x:', key=f'cancel_{job.job_id}'):
+                job.cancel()
+            else:
+                time.sleep(poll_seconds)
+            st.rerun()
+
+        if job.status in ('cancelled', 'failed'):
+            if job.status == 'cancelled':
+                self.__colored_caption__('The job was cancelled.')
+            else:
+                self.__warning_caption__(f'The job failed: {job.error}')
+            if st.button(':arrows_counterclockwise: Run again :arrows_counterclockwise:',
+                         key=f'rerun_{job.job_id}'):
+                executor.forget(job.job_id)
+                st.rerun()
+            st.stop()
+
 
 class Header:
 
@@ -284,3 +317,56 @@ class WarningCaption:
     def __init__(self,
                  caption: str):
         Custom().__warning_caption__(caption)
+
+
+class JobProgress:
+
+    def __init__(self,
+                 job,
+                 executor,
+                 poll_seconds: float = 0.5):
+        Custom().__job_progress__(job, executor, poll_seconds)
+
+
+@st.cache_resource
+def cache_parse_cache():
+    return pc.ParseCache()
+
+
+@st.cache_resource
+def cache_result_cache():
+    return rc.ResultCache(cache_dir=os.path.join('.cache', 'results'))
+
+
+@st.cache_resource
+def cache_job_executor():
+    return jb.JobExecutor()
+
+
+def read_upload(uploaded_file):
+    parse_cache = cache_parse_cache()
+    try:
+        reader = rd.reader_for(uploaded_file)
+        dataset_id = parse_cache.content_hash(uploaded_file, reader.encoding)
+        return dataset_id, parse_cache.read(reader, content_hash=dataset_id)
+    except (ValueError, ImportError) as error:
+        st.error(str(error))
+        st.stop()
+
+
+def run_cached_job(result_key, function, *args):
+    result_cache = cache_result_cache()
+    result = result_cache.get(result_key)
+    if result is None:
+        job_executor = cache_job_executor()
+        job = job_executor.submit(function, *args, key=result_key)
+        JobProgress(job, job_executor)
+        result = job.result
+        result_cache.put(result_key, result)
+        job_executor.forget(job.job_id)
+    return result
+
+
+@st.cache_resource
+def cache_identifier_index(dataset_id, identifier_col, _df):
+    return ii.IdentifierIndex.from_df(_df, identifier_col)
@@ -0,0 +1,399 @@
+import abc
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    from pyarrow import feather
+    from pyarrow import parquet
+except ImportError:
+    pyarrow = None
+    feather = None
+    parquet = None
+
+
+READERS = {}
+
+
+def register_reader(reader_class):
+    """
+    Registers a reader class for the file suffixes it declares, so uploads 
+    with those suffixes are read with it. Longer suffixes take precedence 
+    when several match.
+
+    Args:
+        reader_class (type): A DataReader subclass.
+
+    Returns:
+        type: The registered class, so this can be used as a decorator.
+    """
+    for suffix in reader_class.suffixes:
+        READERS[suffix] = reader_class
+    return reader_class
+
+
+def source_name(source):
+    """
+    Returns the file name of a path or of an uploaded file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    return getattr(source, 'name', '')
+
+
+def matching_suffix(name: str):
+    """
+    Returns the longest registered suffix the name ends with.
+
+    Args:
+        name (str): The file name.
+
+    Returns:
+        str: The suffix, or None when no reader handles the name.
+    """
+    name = name.lower()
+    suffixes = [suffix for suffix in READERS if name.endswith(suffix)]
+    return max(suffixes, key=len) if suffixes != [] else None
+
+
+def dataset_name(name: str):
+    """
+    Strips the format suffix from a file name, e.g. 'panel.csv.gz' -> 'panel'.
+    """
+    suffix = matching_suffix(name)
+    return name[:-len(suffix)] if suffix is not None else name
+
+
+def upload_types():
+    """
+    Returns the extensions to accept in st.file_uploader, i.e. the last 
+    component of every suffix whose reader can run here. The uploader only 
+    checks that last component, so reader_for still rejects names such as 
+    'data.gz'.
+    """
+    return sorted({suffix.rsplit('.', 1)[-1] for suffix, reader_class in READERS.items()
+                   if reader_class.available})
+
+
+def reader_for(source,
+               name: str = None,
+               encoding: str = 'UTF8'):
+    """
+    Builds the reader that handles a source given its file name.
+
+    Args:
+        source (str or file-like): The path or buffer of the file.
+        name (str): The file name. The name of the source when None.
+        encoding (str): The encoding of text formats.
+
+    Returns:
+        DataReader: The reader of the source.
+    """
+    name = name if name is not None else source_name(source)
+    suffix = matching_suffix(name)
+    if suffix is None:
+        raise ValueError(f'Unsupported file format: {name}. Supported suffixes are: '
+                         f'{", ".join(sorted(READERS))}.')
+    return READERS[suffix](source, name=name, encoding=encoding)
+
+
+class DataReader(abc.ABC):
+    """
+    A base class used to read a tabular file in full, by columns, or by row 
+    positions. Subclasses declare the file suffixes they handle, whether 
+    their backend is installed, and implement columns, read and 
+    read_positions.
+
+    Attributes:
+        source (str or file-like): The path or buffer of the file.
+        name (str): The file name.
+        encoding (str): The encoding of text formats.
+    """
+
+    suffixes = ()
+    cacheable = False
+    available = True
+
+    def __init__(self,
+                 source,
+                 name: str = None,
+                 encoding: str = 'UTF8'):
+        """
+        Initializes the DataReader with its source.
+
+        Args:
+            source (str or file-like): The path or buffer of the file. Buffers 
+            must be seekable since a file may be read more than once.
+            name (str): The file name. The name of the source when None.
+            encoding (str): The encoding of text formats.
+        """
+        self.source = source
+        self.name = name if name is not None else source_name(source)
+        self.encoding = encoding
+
+    def __rewind__(self):
+        """
+        Returns the source ready to be read from its beginning.
+        """
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+        return self.source
+
+    def __is_path__(self):
+        return isinstance(self.source, (str, os.PathLike))
+
+    @staticmethod
+    def __project__(df: pd.DataFrame,
+                    columns: list = None):
+        """
+        Returns the columns of a DataFrame in the requested order, since some 
+        readers return them in file order.
+        """
+        return df[list(columns)] if columns is not None else df
+
+    @abc.abstractmethod
+    def columns(self):
+        """
+        Returns the column names of the file without reading its rows.
+        """
+
+    def n_rows(self):
+        """
+        Returns the number of rows of the file, reading as little as the 
+        format allows.
+        """
+        return len(self.read(self.columns()[:1]))
+
+    @abc.abstractmethod
+    def read(self,
+             columns: list = None):
+        """
+        Reads the file, or only some of its columns.
+
+        Args:
+            columns (list): The columns to read, in the order to return them. 
+            All of them when None.
+
+        Returns:
+            pd.DataFrame: The rows of the file.
+        """
+
+    @abc.abstractmethod
+    def read_positions(self,
+                       positions,
+                       columns: list = None):
+        """
+        Reads the rows at the given positions, in the given order. Their index 
+        is their position, as for df.iloc[positions] on a full read.
+
+        Args:
+            positions (array-like): The 0-based row positions to read.
+            columns (list): The columns to read. All of them when None.
+
+        Returns:
+            pd.DataFrame: The selected rows.
+        """
+
+    def read_ids(self,
+                 identifier_col: str,
+                 ids,
+                 columns: list = None):
+        """
+        Reads the rows whose identifier is one of the given ids, in file order. 
+        The identifier column is read first and the matching rows are then 
+        gathered by position.
+
+        Args:
+            identifier_col (str): The column that identifies the rows.
+            ids (array-like): The identifiers to read.
+            columns (list): The columns to read. All of them when None.
+
+        Returns:
+            pd.DataFrame: The selected rows, indexed by position.
+        """
+        identifiers = self.read([identifier_col])[identifier_col]
+        positions = np.flatnonzero(identifiers.isin(pd.Index(ids)).to_numpy())
+        return self.read_positions(positions, columns)
+
+
+@register_reader
+class CsvReader(DataReader):
+    """
+    A class used to read CSV files, plain or compressed. The compression is 
+    inferred from the suffix; zstd needs the zstandard package. Gathering 
+    rows by position re-scans the file in chunks.
+    """
+
+    suffixes = ('.csv', '.csv.gz', '.csv.gzip', '.csv.zst', '.csv.zstd',
+                '.csv.bz2', '.csv.xz')
+    cacheable = True
+    compressions = {'.gz': 'gzip',
+                    '.gzip': 'gzip',
+                    '.zst': 'zstd',
+                    '.zstd': 'zstd',
+                    '.bz2': 'bz2',
+                    '.xz': 'xz'}
+    chunksize = 100000
+
+    def __compression__(self):
+        extension = os.path.splitext(self.name.lower())[1]
+        return self.compressions.get(extension)
+
+    def __read_csv__(self,
+                     **kwargs):
+        return pd.read_csv(self.__rewind__(),
+                           encoding=self.encoding,
+                           compression=self.__compression__(),
+                           **kwargs)
+
+    def columns(self):
+        return self.__read_csv__(nrows=0).columns.to_list()
+
+    def read(self,
+             columns: list = None):
+        return self.__project__(self.__read_csv__(usecols=columns), columns)
+
+    def read_positions(self,
+                       positions,
+                       columns: list = None):
+        positions = np.asarray(positions, dtype=np.int64)
+        wanted = np.unique(positions)
+        chunks = []
+        start = 0
+        with self.__read_csv__(usecols=columns, chunksize=self.chunksize) as reader:
+            for chunk in reader:
+                stop = start + len(chunk)
+                lo, hi = np.searchsorted(wanted, [start, stop])
+                if hi > lo:
+                    chunks.append(chunk.iloc[wanted[lo:hi] - start])
+                start = stop
+                if hi == len(wanted):
+                    break
+        if chunks == []:
+            df = self.__read_csv__(usecols=columns, nrows=0)
+        else:
+            df = pd.concat(chunks)
+        return self.__project__(df.loc[positions], columns)
+
+
+@register_reader
+class ParquetReader(DataReader):
+    """
+    A class used to read Parquet files. Gathering rows by position only 
+    decodes the row groups that contain them.
+    """
+
+    suffixes = ('.parquet', '.pq')
+    available = parquet is not None
+
+    def __parquet_file__(self):
+        if parquet is None:
+            raise ImportError('Reading Parquet files requires pyarrow.')
+        return parquet.ParquetFile(self.__rewind__())
+
+    def columns(self):
+        return self.__parquet_file__().schema_arrow.names
+
+    def n_rows(self):
+        return self.__parquet_file__().metadata.num_rows
+
+    def read(self,
+             columns: list = None):
+        return self.__project__(pd.read_parquet(self.__rewind__(), columns=columns), columns)
+
+    def read_positions(self,
+                       positions,
+                       columns: list = None):
+        positions = np.asarray(positions, dtype=np.int64)
+        parquet_file = self.__parquet_file__()
+        metadata = parquet_file.metadata
+        group_offsets = np.cumsum([0] + [metadata.row_group(i).num_rows
+                                         for i in range(metadata.num_row_groups)])
+        wanted = np.unique(positions)
+        groups = np.searchsorted(group_offsets, wanted, side='right') - 1
+        tables = []
+        for group in np.unique(groups):
+            group_positions = wanted[groups == group] - group_offsets[group]
+            table = parquet_file.read_row_group(int(group), columns=columns)
+            tables.append(table.take(pyarrow.array(group_positions)))
+        if tables == []:
+            df = parquet_file.schema_arrow.empty_table().to_pandas()
+        else:
+            df = pyarrow.concat_tables(tables).to_pandas()
+            df.index = pd.Index(wanted)
+        return self.__project__(df.loc[positions], columns)
+
+
+@register_reader
+class FeatherReader(DataReader):
+    """
+    A class used to read Feather (Arrow IPC) files. Files on disk are 
+    memory-mapped, so gathering rows by position only touches those rows.
+    """
+
+    suffixes = ('.feather', '.arrow', '.ipc')
+    available = feather is not None
+
+    def __read_table__(self,
+                       columns: list = None):
+        if feather is None:
+            raise ImportError('Reading Feather files requires pyarrow.')
+        return feather.read_table(self.__rewind__(),
+                                  columns=columns,
+                                  memory_map=self.__is_path__())
+
+    def columns(self):
+        if feather is None:
+            raise ImportError('Reading Feather files requires pyarrow.')
+        return pyarrow.ipc.open_file(self.__rewind__()).schema.names
+
+    def n_rows(self):
+        return self.__read_table__(self.columns()[:1]).num_rows
+
+    def read(self,
+             columns: list = None):
+        return self.__project__(self.__read_table__(columns).to_pandas(), columns)
+
+    def read_positions(self,
+                       positions,
+                       columns: list = None):
+        positions = np.asarray(positions, dtype=np.int64)
+        df = self.__read_table__(columns).take(pyarrow.array(positions)).to_pandas()
+        df.index = pd.Index(positions)
+        return self.__project__(df, columns)
+
+
+class DataFrameReader(DataReader):
+    """
+    A class used to expose a DataFrame already in memory through the reader 
+    interface, so projected samplers can work on its key columns without 
+    copying the other ones. Gathered rows keep the labels of the DataFrame.
+    """
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 name: str = None):
+        """
+        Initializes the DataFrameReader with the DataFrame to read.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to read.
+            name (str): The name of the dataset.
+        """
+        super().__init__(df, name=name if name is not None else '')
+
+    def columns(self):
+        return self.source.columns.to_list()
+
+    def n_rows(self):
+        return len(self.source)
+
+    def read(self,
+             columns: list = None):
+        return self.source[list(columns)] if columns is not None else self.source
+
+    def read_positions(self,
+                       positions,
+                       columns: list = None):
+        return self.read(columns).iloc[np.asarray(positions, dtype=np.int64)]
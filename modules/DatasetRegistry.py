@@ -0,0 +1,251 @@
+import time
+import hashlib
+from collections import OrderedDict
+import pandas as pd
+
+
+class Dataset:
+    """
+    A class used to hold a DataFrame registered in a DatasetRegistry together 
+    with the metadata that describes where it comes from.
+
+    Attributes:
+        name (str): The name the dataset is registered under.
+        df (pd.DataFrame): The registered DataFrame.
+        kind (str): What the dataset is, e.g. 'source', 'pivot', 'sample' or 'replaced'.
+        dataset_id (str): An identifier that changes whenever the content changes.
+        parents (list): The names of the datasets this one was derived from.
+        params (dict): The parameters used to derive the dataset.
+        nbytes (int): The memory used by the DataFrame.
+        created (float): The time the dataset was registered.
+    """
+
+    def __init__(self,
+                 name: str,
+                 df: pd.DataFrame,
+                 kind: str,
+                 dataset_id: str,
+                 parents: list = None,
+                 params: dict = None):
+        """
+        Initializes the Dataset and measures the memory used by its DataFrame.
+
+        Args:
+            name (str): The name the dataset is registered under.
+            df (pd.DataFrame): The registered DataFrame.
+            kind (str): What the dataset is, e.g. 'source', 'pivot', 'sample' or 'replaced'.
+            dataset_id (str): An identifier that changes whenever the content changes.
+            parents (list): The names of the datasets this one was derived from.
+            params (dict): The parameters used to derive the dataset.
+        """
+        self.name = name
+        self.df = df
+        self.kind = kind
+        self.dataset_id = dataset_id
+        self.parents = list(parents) if parents is not None else []
+        self.params = dict(params) if params is not None else {}
+        self.nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        self.created = time.time()
+
+
+class DatasetRegistry:
+    """
+    A class used to share loaded and derived DataFrames between the pages of a 
+    session without writing them to CSV. The registry only keeps references, 
+    so handing a dataset to another page copies nothing. It is stored in a 
+    mapping such as st.session_state, and once the registered DataFrames use 
+    more than max_bytes the least recently used ones are dropped.
+
+    Attributes:
+        datasets (OrderedDict): The registered datasets by name, from the least 
+        to the most recently used.
+        max_bytes (int): The memory above which datasets are evicted.
+    """
+
+    def __init__(self,
+                 store=None,
+                 key: str = 'dataset_registry',
+                 max_bytes: int = 4 << 30):
+        """
+        Initializes the DatasetRegistry on top of a mapping, reusing the 
+        datasets already stored in it under the given key.
+
+        Args:
+            store (MutableMapping): The mapping the datasets live in, e.g. 
+            st.session_state. A new dict when None.
+            key (str): The key of the datasets in the store.
+            max_bytes (int): The memory above which datasets are evicted.
+        """
+        store = store if store is not None else {}
+        if key not in store:
+            store[key] = OrderedDict()
+        self.datasets = store[key]
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame):
+        """
+        Hashes the content of a DataFrame, index and row order included.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to hash.
+
+        Returns:
+            str: The hexadecimal fingerprint of the DataFrame.
+        """
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        digest.update(pd.util.hash_pandas_object(pd.Index(df.columns.astype(str))).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def __len__(self):
+        return len(self.datasets)
+
+    def __contains__(self,
+                     name: str):
+        return name in self.datasets
+
+    def register(self,
+                 name: str,
+                 df: pd.DataFrame,
+                 kind: str = 'source',
+                 dataset_id: str = None,
+                 parents: list = None,
+                 params: dict = None):
+        """
+        Registers a DataFrame under a name, replacing the dataset previously 
+        registered under it. Registering the same content again only marks 
+        the dataset as used, so pages can call this on every rerun.
+
+        Args:
+            name (str): The name to register the dataset under.
+            df (pd.DataFrame): The DataFrame to register.
+            kind (str): What the dataset is, e.g. 'source', 'pivot', 'sample' or 'replaced'.
+            dataset_id (str): An identifier of the content, such as the id of 
+            the uploaded file. The fingerprint of the DataFrame when None.
+            parents (list): The names of the datasets this one was derived from.
+            params (dict): The parameters used to derive the dataset.
+
+        Returns:
+            Dataset: The registered dataset.
+        """
+        if dataset_id is None:
+            dataset_id = self.fingerprint(df)
+        dataset = self.datasets.get(name)
+        if dataset is None or dataset.dataset_id != dataset_id:
+            dataset = Dataset(name, df, kind, dataset_id, parents, params)
+            self.datasets[name] = dataset
+        self.datasets.move_to_end(name)
+        self.evict(keep=name)
+        return dataset
+
+    def get(self,
+            name: str):
+        """
+        Returns a registered dataset and marks it as the most recently used.
+
+        Args:
+            name (str): The name of the dataset.
+
+        Returns:
+            Dataset: The dataset, or None when it is not registered.
+        """
+        dataset = self.datasets.get(name)
+        if dataset is not None:
+            self.datasets.move_to_end(name)
+        return dataset
+
+    def names(self,
+              kinds: list = None):
+        """
+        Lists the names of the registered datasets, the most recently used first.
+
+        Args:
+            kinds (list): The kinds of datasets to list. All of them when None.
+
+        Returns:
+            list: The names of the datasets.
+        """
+        return [name for name, dataset in reversed(self.datasets.items())
+                if kinds is None or dataset.kind in kinds]
+
+    def lineage(self,
+                name: str):
+        """
+        Walks the parents of a dataset back to its sources. Parents that have 
+        been evicted end the walk on their branch.
+
+        Args:
+            name (str): The name of the dataset.
+
+        Returns:
+            list: The names of the dataset and its ancestors, nearest first.
+        """
+        lineage = []
+        pending = [name]
+        while pending != []:
+            current = pending.pop(0)
+            if current in lineage or current not in self.datasets:
+                continue
+            lineage.append(current)
+            pending.extend(self.datasets[current].parents)
+        return lineage
+
+    def remove(self,
+               name: str):
+        """
+        Removes a dataset from the registry.
+
+        Args:
+            name (str): The name of the dataset.
+
+        Returns:
+            Dataset: The removed dataset, or None when it was not registered.
+        """
+        return self.datasets.pop(name, None)
+
+    def memory_usage(self):
+        """
+        Returns the memory in bytes used by the registered DataFrames.
+        """
+        return sum(dataset.nbytes for dataset in self.datasets.values())
+
+    def evict(self,
+              keep: str = None):
+        """
+        Removes the least recently used datasets until the registered 
+        DataFrames fit in max_bytes.
+
+        Args:
+            keep (str): The name of a dataset that must not be removed.
+
+        Returns:
+            list: The names of the removed datasets.
+        """
+        total = self.memory_usage()
+        removed = []
+        for name in list(self.datasets):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self.datasets.pop(name).nbytes
+            removed.append(name)
+        return removed
+
+    def summary(self):
+        """
+        Describes the registered datasets, the most recently used first.
+
+        Returns:
+            pd.DataFrame: One row per dataset with its name, kind, shape, 
+            memory and parents.
+        """
+        return pd.DataFrame([{'Name': dataset.name,
+                              'Kind': dataset.kind,
+                              'Rows': dataset.df.shape[0],
+                              'Columns': dataset.df.shape[1],
+                              'Memory_MB': round(dataset.nbytes / 2**20, 2),
+                              'Parents': ', '.join(dataset.parents)}
+                             for dataset in reversed(self.datasets.values())],
+                            columns=['Name', 'Kind', 'Rows', 'Columns', 'Memory_MB', 'Parents'])
@@ -0,0 +1,247 @@
+import pandas as pd
+import numpy as np
+
+
+class IdentifierIndex:
+    """
+    A sorted index of the identifier column of a DataFrame, built once per 
+    dataset and shared by samplers and replacers for sorting, membership 
+    tests and lookups by identifier with binary search.
+
+    Attributes:
+        order (np.ndarray): The row positions that sort the identifiers, 
+        missing identifiers last.
+        keys (np.ndarray): The sorted identifiers, without missing ones.
+        key_positions (np.ndarray): The row position of each sorted key.
+        has_duplicates (bool): Whether an identifier appears more than once.
+        sortable (bool): Whether the identifiers compare with each other. 
+        Mixed identifiers, such as strings and integers in one column, are 
+        ordered by type and text and looked up by hashing instead.
+    """
+
+    def __init__(self,
+                 identifiers):
+        """
+        Initializes the IdentifierIndex by sorting the identifiers once.
+
+        Args:
+            identifiers (array-like): The identifier of each row.
+        """
+        identifiers = pd.Series(identifiers).reset_index(drop=True)
+        try:
+            sorted_identifiers = identifiers.sort_values(kind='stable')
+            self.sortable = True
+        except TypeError:
+            sort_keys = identifiers.map(
+                lambda identifier: f'{type(identifier).__name__}:{identifier}',
+                na_action='ignore')
+            sorted_identifiers = identifiers.loc[
+                sort_keys.sort_values(kind='stable').index]
+            self.sortable = False
+        self.order = sorted_identifiers.index.to_numpy()
+
+        present = sorted_identifiers.notna().to_numpy()
+        self.keys = sorted_identifiers.to_numpy()[present]
+        self.key_positions = self.order[present]
+
+        self._duplicated = np.zeros(len(self.keys), dtype=bool)
+        if len(self.keys) > 1:
+            same_as_previous = self.keys[1:] == self.keys[:-1]
+            self._duplicated[1:] |= same_as_previous
+            self._duplicated[:-1] |= same_as_previous
+        self.has_duplicates = bool(self._duplicated.any())
+
+        self._string_keys = (self.keys.dtype == object and
+                             pd.api.types.infer_dtype(self.keys) == 'string')
+        self._key_index = None
+
+    @classmethod
+    def from_df(cls,
+                df: pd.DataFrame,
+                identifier_col: str):
+        """
+        Builds the IdentifierIndex of a DataFrame column.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to index.
+            identifier_col (str): The column that identifies the rows.
+
+        Returns:
+            IdentifierIndex: The index of the column.
+        """
+        return cls(df[identifier_col])
+
+    def __len__(self):
+        return len(self.order)
+
+    def __as_keys__(self,
+                    values):
+        """
+        Converts the looked up values to an array comparable with the keys, 
+        parsing text as numbers for numeric keys and formatting numbers as 
+        text for text keys. Values that cannot be converted match nothing.
+
+        Args:
+            values (array-like): The identifiers to look up.
+
+        Returns:
+            np.ndarray: The values as an array of the keys' type.
+        """
+        values = pd.Series(values)
+        numeric_kinds = 'iufb'
+        if self.keys.dtype.kind in numeric_kinds:
+            if values.dtype.kind not in numeric_kinds:
+                values = pd.to_numeric(values, errors='coerce')
+            return values.to_numpy(dtype=float, na_value=np.nan) \
+                if values.hasnans else values.to_numpy()
+        if self._string_keys and values.dtype.kind in 'iuf':
+            if values.dtype.kind == 'f' and (values.dropna() % 1 == 0).all():
+                values = values.astype('Int64')
+            values = values.astype(object).map(str, na_action='ignore')
+        return values.to_numpy(dtype=object)
+
+    def __hashed_keys__(self):
+        """
+        Builds, once, the hash index of the keys used when the keys or the 
+        looked up values cannot be ordered.
+
+        Returns:
+            tuple: The keys as a pd.Index, the first occurrence of each 
+            distinct key as a pd.Index and the offset of that occurrence.
+        """
+        if self._key_index is None:
+            key_index = pd.Index(self.keys, dtype=object)
+            first_keys = ~key_index.duplicated(keep='first')
+            self._key_index = (key_index, key_index[first_keys],
+                               np.flatnonzero(first_keys))
+        return self._key_index
+
+    def __lookup__(self,
+                   values):
+        """
+        Binary-searches every value among the sorted keys, or hashes it when 
+        the keys and values cannot be ordered together.
+
+        Args:
+            values (array-like): The identifiers to look up.
+
+        Returns:
+            tuple: The position of each value among the keys, its first 
+            occurrence when duplicated, and whether the key at that position 
+            is the value.
+        """
+        values = self.__as_keys__(values)
+        if len(self.keys) == 0:
+            return (np.zeros(len(values), dtype=np.int64),
+                    np.zeros(len(values), dtype=bool))
+        if self.sortable:
+            try:
+                search_positions = np.searchsorted(self.keys, values)
+                clipped_positions = np.minimum(search_positions,
+                                               len(self.keys) - 1)
+                found = self.keys[clipped_positions] == values
+                return clipped_positions, np.asarray(found, dtype=bool)
+            except TypeError:
+                pass
+        _, first_key_index, first_key_offsets = self.__hashed_keys__()
+        first_key_positions = first_key_index.get_indexer(values)
+        found = first_key_positions >= 0
+        return (first_key_offsets[np.where(found, first_key_positions, 0)],
+                found)
+
+    def contains(self,
+                 values):
+        """
+        Checks which values are identifiers of the dataset.
+
+        Args:
+            values (array-like): The identifiers to look up.
+
+        Returns:
+            np.ndarray: True for each value present in the dataset.
+        """
+        _, found = self.__lookup__(values)
+        return found
+
+    def positions_of(self,
+                     values):
+        """
+        Retrieves the row position of every value, the first row when the 
+        identifier is duplicated.
+
+        Args:
+            values (array-like): The identifiers to look up.
+
+        Returns:
+            np.ndarray: The row position of each value, -1 when missing.
+        """
+        search_positions, found = self.__lookup__(values)
+        return np.where(found, self.key_positions[search_positions], -1)
+
+    def rows_of(self,
+                values):
+        """
+        Retrieves the row positions of every row whose identifier is one of 
+        the values, including all the rows of duplicated identifiers.
+
+        Args:
+            values (array-like): The identifiers to look up.
+
+        Returns:
+            np.ndarray: The sorted row positions of the matching rows.
+        """
+        values = pd.unique(self.__as_keys__(values))
+        if len(self.keys) == 0 or len(values) == 0:
+            return np.empty(0, dtype=np.int64)
+        bounds = None
+        if self.sortable:
+            try:
+                bounds = (np.searchsorted(self.keys, values, side='left'),
+                          np.searchsorted(self.keys, values, side='right'))
+            except TypeError:
+                pass
+        if bounds is None:
+            key_index, _, _ = self.__hashed_keys__()
+            return np.sort(self.key_positions[key_index.isin(values)])
+        starts, stops = bounds
+        lengths = stops - starts
+        run_offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        key_offsets = np.arange(int(lengths.sum())) + run_offsets
+        return np.sort(self.key_positions[key_offsets])
+
+    def is_duplicated(self,
+                      values):
+        """
+        Checks which values are identifiers of more than one row.
+
+        Args:
+            values (array-like): The identifiers to look up.
+
+        Returns:
+            np.ndarray: True for each value that appears more than once in 
+            the dataset.
+        """
+        search_positions, found = self.__lookup__(values)
+        return found & self._duplicated[search_positions]
+
+    def duplicated_ids(self):
+        """
+        Lists the identifiers that appear more than once.
+
+        Returns:
+            np.ndarray: The duplicated identifiers, sorted.
+        """
+        return pd.unique(self.keys[self._duplicated])
+
+    def sort(self,
+             df: pd.DataFrame):
+        """
+        Sorts the indexed DataFrame by its identifier without sorting again.
+
+        Args:
+            df (pd.DataFrame): The DataFrame this index was built from.
+
+        Returns:
+            pd.DataFrame: The DataFrame sorted by identifier.
+        """
+        return df.iloc[self.order]
@@ -1,4 +1,11 @@
+import abc
 import pandas as pd
+import numpy as np
+from modules import StratumIndex as si
+from modules import IdentifierIndex as ii
+from modules import Seeding as sd
+from modules import JobExecutor as jb
+from modules import Profiling as pf
 
 
 class ItemReplacerCheck:
@@ -6,24 +13,109 @@ class ItemReplacerCheck:
     A class to check if a working DataFrame is a subdataframe of a master 
     DataFrame.
 
+    Rows are compared through 64-bit fingerprints of their values, so the 
+    check is a membership test on uint64 arrays instead of a merge on every 
+    column.
+
     Attributes:
         master (pd.DataFrame): The master DataFrame.
         working (pd.DataFrame): The working DataFrame to be checked.
+        master_fingerprints (np.ndarray): The sorted, unique fingerprints of 
+        the master rows.
     """
 
     def __init__(self,
                  master_df: pd.DataFrame,
-                 working_df: pd.DataFrame):
+                 working_df: pd.DataFrame,
+                 master_fingerprints: np.ndarray = None):
         """
         Initializes the ItemReplacerCheck with the master and working DataFrames.
 
         Args:
             master_df (pd.DataFrame): The master DataFrame.
             working_df (pd.DataFrame): The working DataFrame to be checked.
+            master_fingerprints (np.ndarray): The output of 
+            ItemReplacerCheck.fingerprint_set(master_df), when it is cached 
+            by the caller. It is computed on first use otherwise.
         """
         self.master = master_df
         self.working = working_df
+        self.master_fingerprints = master_fingerprints
+
+    @staticmethod
+    def row_fingerprints(df: pd.DataFrame):
+        """
+        Hashes every row of a DataFrame into a 64-bit fingerprint.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to hash.
+
+        Returns:
+            np.ndarray: The uint64 fingerprint of each row.
+        """
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    @staticmethod
+    def fingerprint_set(df: pd.DataFrame):
+        """
+        Builds the sorted set of row fingerprints of a DataFrame, ready for 
+        membership tests.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to hash.
+
+        Returns:
+            np.ndarray: The sorted, unique uint64 fingerprints of the rows.
+        """
+        return np.unique(ItemReplacerCheck.row_fingerprints(df))
+
+    def __working_as_master_dtypes__(self):
+        """
+        Casts the working columns to the master dtypes, column by column, so 
+        equal values parsed with different dtypes hash the same. Columns that 
+        cannot be cast are kept as they are.
 
+        Returns:
+            pd.DataFrame: The working DataFrame with the master dtypes.
+        """
+        working_df = self.working
+        for col, dtype in self.master.dtypes.items():
+            if working_df[col].dtype != dtype:
+                try:
+                    working_df = working_df.assign(
+                        **{col: working_df[col].astype(dtype)})
+                except (ValueError, TypeError):
+                    pass
+        return working_df
+
+    def missing_rows(self):
+        """
+        Retrieves the working rows that are not rows of the master DataFrame.
+
+        Returns:
+            pd.DataFrame: The working rows missing from the master DataFrame, 
+            all of them when the columns differ.
+        """
+        if self.working.shape[1] != self.master.shape[1]:
+            return self.working
+        if not all(self.working.columns == self.master.columns):
+            return self.working
+
+        if self.master_fingerprints is None:
+            self.master_fingerprints = self.fingerprint_set(self.master)
+
+        working_fingerprints = self.row_fingerprints(
+            self.__working_as_master_dtypes__())
+        if len(self.master_fingerprints) == 0:
+            return self.working
+
+        found_positions = np.searchsorted(self.master_fingerprints,
+                                          working_fingerprints)
+        found_positions[found_positions == len(self.master_fingerprints)] = 0
+        found = self.master_fingerprints[found_positions] == working_fingerprints
+        return self.working[~found]
+
+    @pf.profiled('ItemReplacerCheck.is_subdataframe')
     def is_subdataframe(self):
         """
         Checks if the working DataFrame is a subdataframe of the master 
@@ -36,45 +128,131 @@ class ItemReplacerCheck:
             return False
         if not all(self.working.columns == self.master.columns):
             return False
-        merged = pd.merge(self.working,
-                          self.master,
-                          on=list(self.working.columns),
-                          how='left',
-                          indicator=True)
-        return merged['_merge'].eq('both').all()
+        return self.missing_rows().empty
 
 
-class DirectItemReplacer:
+class ItemValidator:
     """
-    A class to replace specific items in a working DataFrame with new items 
-    from a master DataFrame.
+    A class to validate the items requested for replacement against the 
+    identifier indexes of the working and master DataFrames. The indexes 
+    are the IdentifierIndex the replacers use, so an item such as '15' is 
+    valid exactly when the replacement finds the rows of 15. Every request 
+    is checked in one pass, so a validator can be kept across reruns for 
+    the same working DataFrame.
 
     Attributes:
-        master (pd.DataFrame): The master DataFrame.
-        working (pd.DataFrame): The working DataFrame.
         identifier_col (str): The column name used to identify items.
-        items_to_replace (list): The list of items to replace in the working DataFrame.
+        working_index (IdentifierIndex): The index of the working identifiers.
+        master_index (IdentifierIndex): The index of the master identifiers.
     """
 
     def __init__(self,
                  master_df: pd.DataFrame,
                  working_df: pd.DataFrame,
                  identifier_col: str,
-                 items_to_replace: list):
+                 master_index: ii.IdentifierIndex = None,
+                 working_index: ii.IdentifierIndex = None):
         """
-        Initializes the DirectItemReplacer with the master and working 
-        DataFrames, identifier column, and items to replace.
+        Initializes the ItemValidator by indexing the identifiers of the 
+        master and working DataFrames.
 
         Args:
             master_df (pd.DataFrame): The master DataFrame.
             working_df (pd.DataFrame): The working DataFrame.
             identifier_col (str): The column name used to identify items.
-            items_to_replace (list): The list of items to replace in the working DataFrame.
+            master_index (IdentifierIndex): The index of the identifier 
+            column of master_df, when it is cached by the caller.
+            working_index (IdentifierIndex): The index of the identifier 
+            column of working_df, when it is cached by the caller.
         """
-        self.master = master_df
-        self.working = working_df
         self.identifier_col = identifier_col
-        self.items_to_replace = items_to_replace
+        self.master_index = master_index if master_index is not None else \
+            ii.IdentifierIndex.from_df(master_df, identifier_col)
+        self.working_index = working_index if working_index is not None else \
+            ii.IdentifierIndex.from_df(working_df, identifier_col)
+        self._results = {}
+
+    def validate(self,
+                 items_to_replace: list):
+        """
+        Checks all the requested items at once.
+
+        Args:
+            items_to_replace (list): The list of items to replace in the working DataFrame.
+
+        Returns:
+            dict: The diagnostics of the request: 'missing_from_working', 
+            'duplicated_in_request', 'duplicated_in_working' and 
+            'absent_from_master' list the offending items, and 'valid' is 
+            True when every item is in the working DataFrame.
+        """
+        request_key = tuple(items_to_replace)
+        if request_key not in self._results:
+            requested_ids = pd.Index(items_to_replace)
+            working_positions = self.working_index.positions_of(requested_ids)
+            missing = working_positions < 0
+            absent = ~self.master_index.contains(requested_ids)
+            duplicated_in_working = self.working_index.is_duplicated(requested_ids)
+            duplicated_in_request = np.where(
+                missing,
+                requested_ids.duplicated(),
+                pd.Series(working_positions).duplicated().to_numpy())
+
+            self._results[request_key] = {
+                'missing_from_working': requested_ids[missing].unique().tolist(),
+                'duplicated_in_request': requested_ids[
+                    duplicated_in_request].unique().tolist(),
+                'duplicated_in_working': requested_ids[
+                    duplicated_in_working].unique().tolist(),
+                'absent_from_master': requested_ids[absent].unique().tolist(),
+                'valid': not missing.any()}
+        return self._results[request_key]
+
+
+class ItemReplacer(abc.ABC):
+    """
+    The steps shared by the replacers: validating the items to replace, 
+    locating their rows in the working DataFrame through its identifier 
+    index, and reporting progress. Subclasses implement replacer.
+
+    Attributes:
+        master (pd.DataFrame): The master DataFrame.
+        working (pd.DataFrame): The working DataFrame.
+        identifier_col (str): The column name used to identify items.
+        items_to_replace (list): The list of items to replace in the working DataFrame.
+        item_validator (ItemValidator): The validator of the items, built 
+        on first use.
+        identifier_index (IdentifierIndex): The index of the working 
+        identifiers, built on first use.
+        random_state (int): The seed of the replacement draw.
+        progress (jb.Progress): Receives the step being run, None to not report.
+    """
+
+    def __stage__(self,
+                  name: str):
+        """
+        Reports the step being run, if a progress is attached.
+
+        Args:
+            name (str): The name of the step.
+        """
+        if self.progress is not None:
+            self.progress.stage(name)
+
+    def validate_items(self):
+        """
+        Validates the items to replace against the working and master 
+        DataFrames.
+
+        Returns:
+            dict: The diagnostics returned by ItemValidator.validate.
+        """
+        if self.item_validator is None:
+            self.item_validator = ItemValidator(self.master,
+                                                self.working,
+                                                self.identifier_col,
+                                                working_index=self.identifier_index)
+        return self.item_validator.validate(self.items_to_replace)
 
     def check_items_in_working_df(self):
         """
@@ -83,11 +261,32 @@ class DirectItemReplacer:
         Returns:
             bool: True if all items are present, False otherwise.
         """
-        missing_items = [item for item in self.items_to_replace if item not in
-                         self.working[self.identifier_col].values]
-        if len(missing_items) > 1:
-            return False
-        return True
+        return self.validate_items()['valid']
+
+    def __working_identifier_index__(self):
+        """
+        Retrieves the identifier index of the working DataFrame, building it 
+        on first use.
+
+        Returns:
+            IdentifierIndex: The index of the working identifier column.
+        """
+        if self.identifier_index is None:
+            self.identifier_index = ii.IdentifierIndex.from_df(
+                self.working, self.identifier_col)
+        return self.identifier_index
+
+    def __items_mask__(self):
+        """
+        Flags the working rows whose identifier is in items_to_replace.
+
+        Returns:
+            np.ndarray: True for each working row to replace.
+        """
+        items_mask = np.zeros(len(self.working), dtype=bool)
+        items_mask[self.__working_identifier_index__().rows_of(
+            self.items_to_replace)] = True
+        return items_mask
 
     def __remove_rows_from_working_df__(self):
         """
@@ -97,9 +296,7 @@ class DirectItemReplacer:
         Returns:
             pd.DataFrame: The working DataFrame with the specified rows removed.
         """
-        filter_condition = self.working[self.identifier_col].isin(
-            self.items_to_replace)
-        return self.working[~filter_condition]
+        return self.working[~self.__items_mask__()]
 
     def __remainder_rows_from_master_df__(self):
         """
@@ -109,27 +306,106 @@ class DirectItemReplacer:
         Returns:
             pd.DataFrame: The remaining rows in the master DataFrame.
         """
-        filter_condition = self.master[self.identifier_col].isin(
-            self.working[self.identifier_col])
+        filter_condition = self.__working_identifier_index__().contains(
+            self.master[self.identifier_col])
         return self.master[~filter_condition]
 
+    @abc.abstractmethod
+    def replacer(self):
+        """
+        Replaces the items of the working DataFrame with rows of the master 
+        DataFrame.
+
+        Returns:
+            pd.DataFrame: The updated working DataFrame.
+        """
+
+
+class DirectItemReplacer(ItemReplacer):
+    """
+    A class to replace specific items in a working DataFrame with new items 
+    from a master DataFrame.
+
+    Attributes:
+        master (pd.DataFrame): The master DataFrame.
+        working (pd.DataFrame): The working DataFrame.
+        identifier_col (str): The column name used to identify items.
+        items_to_replace (list): The list of items to replace in the working DataFrame.
+        random_state (int): The seed of the replacement draw.
+        progress (jb.Progress): Receives the step being run, None to not report.
+    """
+
+    def __init__(self,
+                 master_df: pd.DataFrame,
+                 working_df: pd.DataFrame,
+                 identifier_col: str,
+                 items_to_replace: list,
+                 item_validator: ItemValidator = None,
+                 identifier_index: ii.IdentifierIndex = None,
+                 random_state: int = None,
+                 progress: jb.Progress = None):
+        """
+        Initializes the DirectItemReplacer with the master and working 
+        DataFrames, identifier column, and items to replace.
+
+        Args:
+            master_df (pd.DataFrame): The master DataFrame.
+            working_df (pd.DataFrame): The working DataFrame.
+            identifier_col (str): The column name used to identify items.
+            items_to_replace (list): The list of items to replace in the working DataFrame.
+            item_validator (ItemValidator): A validator already built for 
+            these DataFrames and identifier column, to reuse its indexes.
+            identifier_index (IdentifierIndex): The index of the identifier 
+            column of working_df, built once per dataset.
+            random_state (int): The seed of the replacement draw. A fresh 
+            seed is drawn and recorded when None.
+            progress (jb.Progress): Receives the step being run, None to not 
+            report. Reporting raises jb.JobCancelled once the job is cancelled.
+        """
+        self.master = master_df
+        self.working = working_df
+        self.identifier_col = identifier_col
+        self.items_to_replace = items_to_replace
+        self.item_validator = item_validator
+        self.identifier_index = identifier_index
+        self.random_state = random_state if random_state is not None else sd.new_seed()
+        self.progress = progress
+
+    @pf.profiled('DirectItemReplacer.replacer')
     def replacer(self):
         """
         Replaces the specified rows in the working DataFrame with rows from 
-        the master DataFrame.
+        the master DataFrame. One master row is drawn per removed working 
+        row, so items requested twice are replaced once.
 
         Returns:
             pd.DataFrame: The updated working DataFrame with the specified rows replaced.
+
+        Raises:
+            ValueError: If the master DataFrame has fewer rows left than the 
+            rows to replace.
         """
-        removed_items_length = len(self.items_to_replace)
-        new_rows = self.__remainder_rows_from_master_df__().sample(
-            n=removed_items_length)
-        new_working = pd.concat([self.__remove_rows_from_working_df__(),
-                                 new_rows])
+        items_mask = self.__items_mask__()
+        removed_items_length = int(items_mask.sum())
+        self.__stage__('draw')
+        with pf.stage('DirectItemReplacer.draw',
+                      rows=len(self.master),
+                      items=removed_items_length):
+            remainder_df = self.__remainder_rows_from_master_df__()
+            if len(remainder_df) < removed_items_length:
+                raise ValueError(
+                    'The Master Dataframe does not have enough rows left to replace every item.')
+            new_rows = remainder_df.sample(
+                n=removed_items_length,
+                random_state=sd.substream(self.random_state, 'replacement'))
+        self.__stage__('gather')
+        with pf.stage('DirectItemReplacer.concat', rows=len(self.working)):
+            new_working = pd.concat([self.working[~items_mask],
+                                     new_rows])
         return new_working
 
 
-class StructuredItemReplacer:
+class StructuredItemReplacer(ItemReplacer):
     """
     A class to replace specific items in a working DataFrame with new items 
     from a master DataFrame, based on structure columns.
@@ -140,6 +416,8 @@ class StructuredItemReplacer:
         identifier_col (str): The column name used to identify items.
         items_to_replace (list): The list of items to replace in the working DataFrame.
         structure_cols (list): The columns used to define the structure for replacement.
+        random_state (int): The seed of the replacement draw.
+        progress (jb.Progress): Receives the step being run, None to not report.
     """
 
     def __init__(self,
@@ -147,7 +425,11 @@ class StructuredItemReplacer:
                  working_df: pd.DataFrame,
                  identifier_col: str,
                  items_to_replace: list,
-                 structure_cols: list):
+                 structure_cols: list,
+                 item_validator: ItemValidator = None,
+                 identifier_index: ii.IdentifierIndex = None,
+                 random_state: int = None,
+                 progress: jb.Progress = None):
         """
         Initializes the StructuredItemReplacer with the master and working 
         DataFrames, identifier column, items to replace, and structure columns.
@@ -158,36 +440,24 @@ class StructuredItemReplacer:
             identifier_col (str): The column name used to identify items.
             items_to_replace (list): The list of items to replace in the working DataFrame.
             structure_cols (list): The columns used to define the structure for replacement.
+            item_validator (ItemValidator): A validator already built for 
+            these DataFrames and identifier column, to reuse its indexes.
+            identifier_index (IdentifierIndex): The index of the identifier 
+            column of working_df, built once per dataset.
+            random_state (int): The seed of the replacement draw. A fresh 
+            seed is drawn and recorded when None.
+            progress (jb.Progress): Receives the step being run, None to not 
+            report. Reporting raises jb.JobCancelled once the job is cancelled.
         """
         self.master = master_df
         self.working = working_df
         self.identifier_col = identifier_col
         self.items_to_replace = items_to_replace
         self.structure_cols = structure_cols
-
-    def check_items_in_working_df(self):
-        """
-        Checks if all items to replace are present in the working DataFrame.
-
-        Returns:
-            bool: True if all items are present, False otherwise.
-        """
-        missing_items = [item for item in self.items_to_replace if item not in
-                         self.working[self.identifier_col].values]
-        if len(missing_items) > 1:
-            return False
-        return True
-
-    def __remove_rows_from_working_df__(self):
-        """ Removes rows in the working DataFrame that are listed in 
-        items_to_replace.
-
-        Returns:
-            pd.DataFrame: The working DataFrame with the specified rows removed.
-        """
-        filter_condition = self.working[self.identifier_col].isin(
-            self.items_to_replace)
-        return self.working[~filter_condition]
+        self.item_validator = item_validator
+        self.identifier_index = identifier_index
+        self.random_state = random_state if random_state is not None else sd.new_seed()
+        self.progress = progress
 
     def __removed_rows_from_working_df__(self):
         """ Retrieves the rows removed from the working DataFrame based on 
@@ -196,9 +466,7 @@ class StructuredItemReplacer:
         Returns:
             pd.DataFrame: The rows removed from the working DataFrame.
         """
-        filter_condition = self.working[self.identifier_col].isin(
-            self.items_to_replace)
-        return self.working[filter_condition]
+        return self.working[self.__items_mask__()]
 
     def __remainder_rows_from_master_df__(self):
         """ Retrieves the remaining rows in the master DataFrame that are not 
@@ -207,34 +475,79 @@ class StructuredItemReplacer:
         Returns:
             pd.DataFrame: The remaining rows in the master DataFrame.
         """
-        filter_condition = self.master[self.identifier_col].isin(
-            self.working[self.identifier_col])
+        filter_condition = self.__working_identifier_index__().contains(
+            self.master[self.identifier_col])
         return self.master[~filter_condition]
 
+    def __fill_unmatched_positions__(self,
+                                     replacement_positions,
+                                     remainder_size: int,
+                                     random_state=None):
+        """ Gives the replacements without a structure match random rows of 
+        the master remainder that were not handed out yet.
+
+        Args:
+            replacement_positions (np.ndarray): The remainder position drawn 
+            for each removed row, -1 when none matched. Filled in place.
+            remainder_size (int): The number of rows of the master remainder.
+            random_state (np.random.Generator): The generator of the draw.
+        """
+        unmatched = replacement_positions < 0
+        unmatched_count = int(unmatched.sum())
+        if unmatched_count == 0:
+            return
+
+        used = np.zeros(remainder_size, dtype=bool)
+        used[replacement_positions[~unmatched]] = True
+        available_positions = np.flatnonzero(~used)
+        if len(available_positions) < unmatched_count:
+            raise ValueError(
+                'The Master Dataframe does not have enough rows left to replace every item.')
+        replacement_positions[unmatched] = sd.as_generator(random_state).choice(
+            available_positions, size=unmatched_count, replace=False)
+
+    @pf.profiled('StructuredItemReplacer.replacer')
     def replacer(self):
         """ Replaces the specified rows in the working DataFrame with rows 
         from the master DataFrame based on structure columns.
 
+        The master remainder is indexed once for every priority prefix of 
+        the structure columns and every removed row pops a unique random 
+        candidate from the pool of its stratum. When a stratum has no 
+        candidates left the lowest priority column is dropped and the 
+        coarser stratum is tried, down to a random unused row of the 
+        remainder.
+
         Returns:
             pd.DataFrame: The updated working DataFrame with the specified rows replaced.
         """
-        updated_working_df = self.__remove_rows_from_working_df__()
-        removed_from_working_df = self.__removed_rows_from_working_df__()
-        replacement_rows = pd.DataFrame(columns=self.master.columns)
-        for _, row in removed_from_working_df.iterrows():
-            temp_df = self.__remainder_rows_from_master_df__()
-            for col in self.structure_cols:
-                temp_df = temp_df[temp_df[col] == row[col]]
-                if temp_df.empty:
-                    break
-            if temp_df.empty:
-                replacement_row = self.__remainder_rows_from_master_df__(
-                ).iloc[0]
-            else:
-                replacement_row = temp_df.iloc[0]
-            replacement_rows = pd.concat(
-                [replacement_rows, replacement_row.to_frame().transpose()])
-        final_df = pd.concat(
-            [updated_working_df, replacement_rows]).reset_index(drop=True)
+        self.__stage__('remove')
+        with pf.stage('StructuredItemReplacer.remove',
+                      rows=len(self.working),
+                      items=len(self.items_to_replace)):
+            updated_working_df = self.__remove_rows_from_working_df__()
+            removed_from_working_df = self.__removed_rows_from_working_df__()
+            remainder_df = self.__remainder_rows_from_master_df__()
+        rng = sd.substream(self.random_state, 'replacement')
+
+        self.__stage__('index')
+        with pf.stage('StructuredItemReplacer.lattice',
+                      rows=len(remainder_df),
+                      levels=len(self.structure_cols)):
+            stratum_lattice = si.StratumLattice(remainder_df, self.structure_cols)
+        self.__stage__('draw')
+        with pf.stage('StructuredItemReplacer.draw',
+                      items=len(removed_from_working_df)) as stage:
+            replacement_positions = stratum_lattice.draw_unique(
+                removed_from_working_df, len(remainder_df), rng)
+            stage.count(unmatched=int((replacement_positions < 0).sum()))
+            self.__fill_unmatched_positions__(replacement_positions,
+                                              len(remainder_df),
+                                              rng)
+        self.__stage__('gather')
+        with pf.stage('StructuredItemReplacer.concat', rows=len(updated_working_df)):
+            replacement_rows = remainder_df.iloc[replacement_positions]
+            final_df = pd.concat(
+                [updated_working_df, replacement_rows]).reset_index(drop=True)
         self.working = final_df
         return self.working
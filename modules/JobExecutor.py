@@ -0,0 +1,345 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+JOB_STATES = ('pending', 'running', 'done', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job when its cancellation was requested.
+    """
+
+
+class Progress:
+    """
+    A class used by a running job to report how far it got and to learn 
+    that it was cancelled. Samplers and replacers receive it as an optional 
+    progress argument and call stage() and update() between steps; both 
+    raise JobCancelled once cancel() was called, so the work stops at the 
+    next step.
+
+    Attributes:
+        current_stage (str): The name of the step being run.
+        counters (dict): The (done, total) pairs reported per counter, e.g. 
+        'strata' or 'rows'. total is None when unknown.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty Progress.
+        """
+        self.current_stage = None
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    def check_cancelled(self):
+        """
+        Raises JobCancelled when the job was cancelled.
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def cancel(self):
+        """
+        Requests the job to stop at its next progress report.
+        """
+        self._cancel_event.set()
+
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def stage(self,
+              name: str):
+        """
+        Starts a new step, clearing the counters of the previous one.
+
+        Args:
+            name (str): The name of the step.
+        """
+        with self._lock:
+            self.current_stage = name
+            self.counters = {}
+        self.check_cancelled()
+
+    def update(self,
+               name: str,
+               done: int,
+               total: int = None):
+        """
+        Reports the value of a counter of the current step.
+
+        Args:
+            name (str): The name of the counter, e.g. 'strata' or 'rows'.
+            done (int): The units processed so far.
+            total (int): The units to process, None when unknown.
+        """
+        with self._lock:
+            self.counters[name] = (int(done), None if total is None else int(total))
+        self.check_cancelled()
+
+    def snapshot(self):
+        """
+        Copies the current step and counters, safe to read from another 
+        thread.
+
+        Returns:
+            dict: The 'stage' name and the 'counters' (done, total) pairs.
+        """
+        with self._lock:
+            return {'stage': self.current_stage,
+                    'counters': dict(self.counters)}
+
+    def fraction(self):
+        """
+        Returns the completed fraction of the first counter with a known 
+        total, or None when no counter has one.
+        """
+        for done, total in self.snapshot()['counters'].values():
+            if total:
+                return min(done / total, 1.0)
+        return None
+
+    def describe(self):
+        """
+        Describes the progress in one line, e.g. 
+        'strata: 120/400 · rows: 1200000/5000000'.
+        """
+        snapshot = self.snapshot()
+        counters = ' · '.join(f'{name}: {done}' + (f'/{total}' if total is not None else '')
+                              for name, (done, total) in snapshot['counters'].items())
+        return ' '.join(part for part in (snapshot['stage'], counters) if part)
+
+
+class Job:
+    """
+    A class holding the state of one submitted job.
+
+    Attributes:
+        job_id (str): The id of the job.
+        key (str): The key the job was submitted under, e.g. a ResultCache 
+        key, so a rerun with the same inputs reattaches to it.
+        status (str): One of 'pending', 'running', 'done', 'failed' or 
+        'cancelled'.
+        progress (Progress): The progress reported by the job.
+        result: The return value of the job once done.
+        error (BaseException): The exception raised by the job if it failed.
+        submitted_at (float): The submission time.
+        finished_at (float): The time the job stopped, None while running.
+    """
+
+    def __init__(self,
+                 job_id: str,
+                 key: str = None):
+        """
+        Initializes a pending Job.
+
+        Args:
+            job_id (str): The id of the job.
+            key (str): The key the job was submitted under.
+        """
+        self.job_id = job_id
+        self.key = key
+        self.status = 'pending'
+        self.progress = Progress()
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.future = None
+
+    def done(self):
+        """
+        Returns whether the job stopped, whatever its outcome.
+        """
+        return self.status in ('done', 'failed', 'cancelled')
+
+    def cancel(self):
+        """
+        Cancels the job: a pending job never starts and a running one stops 
+        at its next progress report.
+        """
+        self.progress.cancel()
+        if self.future is not None and self.future.cancel():
+            self.status = 'cancelled'
+            self.finished_at = time.time()
+
+    def elapsed(self):
+        """
+        Returns the seconds since submission, or until the job stopped.
+        """
+        return (self.finished_at or time.time()) - self.submitted_at
+
+
+class JobExecutor:
+    """
+    A class used to run sampling and replacement jobs in a background 
+    thread pool, so the caller can poll their progress, cancel them, and 
+    reattach to a running or finished job by its key instead of starting it 
+    again. Threads share the loaded DataFrames without copying them; the 
+    stratum draws still use their own process pool when n_jobs is set.
+
+    Attributes:
+        max_workers (int): The number of jobs run at the same time.
+        max_finished (int): The number of finished jobs kept for reattaching, 
+        the oldest being forgotten first.
+    """
+
+    def __init__(self,
+                 max_workers: int = 2,
+                 max_finished: int = 32):
+        """
+        Initializes the JobExecutor.
+
+        Args:
+            max_workers (int): The number of jobs run at the same time.
+            max_finished (int): The number of finished jobs kept.
+        """
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._keys = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __run__(self,
+                job: Job,
+                function,
+                args: tuple,
+                kwargs: dict):
+        """
+        Runs a job in a worker thread and records its outcome.
+        """
+        if job.progress.cancelled():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            return
+        job.status = 'running'
+        try:
+            job.result = function(*args, progress=job.progress, **kwargs)
+            job.status = 'done'
+        except JobCancelled:
+            job.status = 'cancelled'
+        except Exception as error:
+            job.error = error
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            self.__forget_finished__()
+
+    def __forget_finished__(self):
+        """
+        Drops the oldest finished jobs beyond max_finished.
+        """
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.done()]
+            for job in finished[:max(len(finished) - self.max_finished, 0)]:
+                self.__remove__(job)
+
+    def __remove__(self,
+                   job: Job):
+        self._jobs.pop(job.job_id, None)
+        if job.key is not None and self._keys.get(job.key) == job.job_id:
+            del self._keys[job.key]
+
+    def submit(self,
+               function,
+               *args,
+               key: str = None,
+               **kwargs):
+        """
+        Submits function(*args, progress=..., **kwargs) to the pool. When a 
+        job with the same key is still known, whatever its status, that job 
+        is returned instead, so reruns reattach to it; forget() it first to 
+        start over.
+
+        Args:
+            function (callable): The work to run. It receives the Progress 
+            of the job as its progress keyword argument.
+            *args: The positional arguments of function.
+            key (str): The key identifying the work, None to always submit.
+            **kwargs: The keyword arguments of function.
+
+        Returns:
+            Job: The new or existing job.
+        """
+        with self._lock:
+            if key is not None and key in self._keys:
+                return self._jobs[self._keys[key]]
+            job = Job(f'job-{next(self._ids)}', key)
+            self._jobs[job.job_id] = job
+            if key is not None:
+                self._keys[key] = job.job_id
+        job.future = self._pool.submit(self.__run__, job, function, args, kwargs)
+        return job
+
+    def get(self,
+            job_id: str):
+        """
+        Returns the job with the given id, None if it is unknown.
+        """
+        return self._jobs.get(job_id)
+
+    def job_for(self,
+                key: str):
+        """
+        Returns the job submitted under key, None if there is none.
+        """
+        job_id = self._keys.get(key)
+        return self._jobs.get(job_id) if job_id is not None else None
+
+    def jobs(self,
+             states: tuple = None):
+        """
+        Lists the known jobs in submission order.
+
+        Args:
+            states (tuple): The statuses to keep. All of them when None.
+
+        Returns:
+            list: The jobs.
+        """
+        return [job for job in list(self._jobs.values())
+                if states is None or job.status in states]
+
+    def cancel(self,
+               job_id: str):
+        """
+        Cancels the job with the given id, if it is known.
+        """
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def forget(self,
+               job_id: str):
+        """
+        Drops a job so that its key can be submitted again, cancelling it 
+        first if it is still running.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+        if not job.done():
+            job.cancel()
+        with self._lock:
+            self.__remove__(job)
+
+    def shutdown(self,
+                 cancel: bool = True):
+        """
+        Stops the pool, cancelling the pending and running jobs by default.
+        """
+        if cancel:
+            for job in self.jobs(('pending', 'running')):
+                job.cancel()
+        self._pool.shutdown(wait=True)
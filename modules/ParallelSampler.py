@@ -0,0 +1,152 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from modules import StratumIndex as si
+from modules import Seeding as sd
+
+
+def draw_blocks(block_counts,
+                block_sample_sizes,
+                seed_sequences):
+    """
+    Draws the rows of a batch of stratum blocks, each block with its own 
+    random stream. Only the stratum sizes travel to the worker: the draw 
+    returns offsets within each block and the caller maps them to row 
+    positions.
+
+    Args:
+        block_counts (list): The stratum counts of each block.
+        block_sample_sizes (list): The stratum sample sizes of each block.
+        seed_sequences (list): One np.random.SeedSequence per block.
+
+    Returns:
+        list: The sorted offsets drawn within each block.
+    """
+    return [si.draw_block(counts, sample_sizes, seed_sequence)
+            for counts, sample_sizes, seed_sequence
+            in zip(block_counts, block_sample_sizes, seed_sequences)]
+
+
+class ParallelStratumSampler:
+    """
+    A class used to draw the rows of every stratum of a StratumIndex across 
+    a process pool. Strata are drawn in the same blocks, with the same child 
+    streams, as StratumIndex.sample_positions, so the sample only depends on 
+    the seed and never on the number of workers.
+
+    Attributes:
+        stratum_index (StratumIndex): The index of the strata to sample.
+        sample_sizes (np.ndarray): The number of rows to draw from each stratum.
+        random_state (int): The seed the per-block streams are spawned from.
+        n_jobs (int): The number of worker processes, -1 for all the cores.
+        progress (Progress): Receives the strata and rows drawn after 
+        every batch, None to not report.
+    """
+
+    def __init__(self,
+                 stratum_index,
+                 sample_sizes,
+                 random_state: int = None,
+                 n_jobs: int = -1,
+                 progress=None):
+        """
+        Initializes the ParallelStratumSampler with the stratum index and the 
+        per-stratum sample sizes.
+
+        Args:
+            stratum_index (StratumIndex): The index of the strata to sample.
+            sample_sizes (array-like): The number of rows to draw from each 
+            stratum, indexed by stratum code.
+            random_state (int): The seed the per-block streams are spawned from.
+            n_jobs (int): The number of worker processes, -1 for all the cores.
+            progress (Progress): Receives the strata and rows drawn after 
+            every batch, None to not report.
+        """
+        self.stratum_index = stratum_index
+        self.sample_sizes = np.asarray(sample_sizes, dtype=np.int64)
+        self.random_state = random_state
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count() or 1
+        self.n_jobs = n_jobs
+        self.progress = progress
+
+    def __report__(self,
+                   stop: int):
+        """
+        Reports that the strata before stop were drawn.
+
+        Args:
+            stop (int): The stratum code bound of the last drawn batch.
+        """
+        if self.progress is not None:
+            offsets = self.stratum_index.offsets
+            self.progress.update('strata', stop, len(self.stratum_index))
+            self.progress.update('rows', offsets[stop], offsets[-1])
+
+    def __batches__(self,
+                    bounds):
+        """
+        Groups consecutive blocks into batches of similar row counts, a few 
+        per worker so that uneven blocks still balance out.
+
+        Args:
+            bounds (np.ndarray): The stratum code bounds of the blocks.
+
+        Returns:
+            list: The (start, stop) block ranges of the batches.
+        """
+        n_blocks = len(bounds) - 1
+        n_batches = min(n_blocks, self.n_jobs * 4)
+        if n_batches <= 1:
+            return [(0, n_blocks)]
+        block_rows = np.diff(self.stratum_index.offsets[bounds]) + 1
+        cumulative_rows = np.cumsum(block_rows)
+        targets = cumulative_rows[-1] * np.arange(1, n_batches) / n_batches
+        batch_bounds = np.unique(np.concatenate(
+            ([0], np.searchsorted(cumulative_rows, targets), [n_blocks])))
+        return list(zip(batch_bounds[:-1], batch_bounds[1:]))
+
+    def sample_positions(self):
+        """
+        Draws the sample of every stratum, in a process pool when more than 
+        one worker is requested.
+
+        Returns:
+            np.ndarray: The row positions of the sample, grouped by stratum 
+            and in their original order within each stratum.
+        """
+        counts = self.stratum_index.counts
+        bounds = si.stratum_blocks(counts)
+        seed_sequences = sd.spawn(self.random_state, 'strata', len(bounds) - 1)
+        blocks = list(zip(bounds[:-1], bounds[1:]))
+        batch_ranges = self.__batches__(bounds)
+        batches = [([counts[start:stop] for start, stop in blocks[first:last]],
+                    [self.sample_sizes[start:stop] for start, stop in blocks[first:last]],
+                    seed_sequences[first:last])
+                   for first, last in batch_ranges]
+
+        drawn_offsets = []
+        if self.n_jobs == 1 or len(batches) == 1:
+            for (first, last), batch in zip(batch_ranges, batches):
+                drawn_offsets.append(draw_blocks(*batch))
+                self.__report__(bounds[last])
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+                try:
+                    for (first, last), batch_offsets in zip(batch_ranges,
+                                                            executor.map(draw_blocks,
+                                                                         *zip(*batches))):
+                        drawn_offsets.append(batch_offsets)
+                        self.__report__(bounds[last])
+                except BaseException:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+        block_offsets = [offsets for batch_offsets in drawn_offsets
+                         for offsets in batch_offsets]
+        if block_offsets == []:
+            return np.empty(0, dtype=np.int64)
+        local_offsets = np.concatenate([self.stratum_index.offsets[start] + offsets
+                                        for (start, stop), offsets
+                                        in zip(blocks, block_offsets)])
+        return self.stratum_index.positions[local_offsets]
@@ -0,0 +1,260 @@
+import os
+import hashlib
+import pandas as pd
+from modules import DataReader as rd
+
+try:
+    import pyarrow
+    from pyarrow import feather
+    STORE_ERRORS = (OSError, ValueError, TypeError, pyarrow.ArrowException)
+except ImportError:
+    feather = None
+    STORE_ERRORS = (OSError, ValueError, TypeError)
+
+
+class ParseCache:
+    """
+    A class used to parse uploaded text files, such as plain or compressed 
+    CSV, once and keep the parsed DataFrames on disk, keyed by a hash of the 
+    uploaded bytes. Entries are stored as uncompressed Arrow IPC (Feather) 
+    files and memory-mapped when read back, so a rerun of a page costs a 
+    hash of the bytes instead of a full parse. When pyarrow is not 
+    installed the entries are pickled.
+
+    Attributes:
+        cache_dir (str): The directory where the parsed files are stored.
+        max_bytes (int): The size of the directory above which the least 
+        recently used entries are evicted.
+    """
+
+    BLOCK_SIZE = 1 << 22
+
+    def __init__(self,
+                 cache_dir: str = os.path.join('.cache', 'parsed'),
+                 max_bytes: int = 2 << 30):
+        """
+        Initializes the ParseCache and creates its directory.
+
+        Args:
+            cache_dir (str): The directory where the parsed files are stored.
+            max_bytes (int): The size of the directory above which the least 
+            recently used entries are evicted.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = '.feather' if feather is not None else '.pkl'
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def content_hash(self,
+                     source,
+                     encoding: str = 'UTF8'):
+        """
+        Hashes the bytes of a CSV source together with the encoding used to 
+        parse it.
+
+        Args:
+            source (str or file-like): The path or binary buffer of the CSV file.
+            encoding (str): The encoding of the CSV file.
+
+        Returns:
+            str: The hexadecimal digest that identifies the parsed DataFrame.
+        """
+        digest = hashlib.blake2b(encoding.encode(), digest_size=20)
+        if hasattr(source, 'getbuffer'):
+            digest.update(source.getbuffer())
+            return digest.hexdigest()
+        stream = source if hasattr(source, 'read') else open(source, 'rb')
+        try:
+            if stream is source:
+                source.seek(0)
+            while True:
+                block = stream.read(self.BLOCK_SIZE)
+                if not block:
+                    break
+                digest.update(block.encode(encoding) if isinstance(block, str) else block)
+        finally:
+            if stream is source:
+                source.seek(0)
+            else:
+                stream.close()
+        return digest.hexdigest()
+
+    def __path__(self,
+                 key: str):
+        """
+        Returns the path of the cache entry of a key.
+        """
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def __load__(self,
+                 path: str):
+        """
+        Reads a cache entry, memory-mapping it when it is a Feather file. 
+        Numeric columns without missing values are returned as read-only 
+        views of the mapped file; the other columns are converted one at a 
+        time, releasing each Arrow buffer once converted, so the load never 
+        holds two copies of the data.
+
+        Args:
+            path (str): The path of the cache entry.
+
+        Returns:
+            pd.DataFrame: The parsed DataFrame.
+        """
+        if feather is not None:
+            return feather.read_table(path, memory_map=True).to_pandas(
+                split_blocks=True, self_destruct=True)
+        return pd.read_pickle(path)
+
+    def __store__(self,
+                  df: pd.DataFrame,
+                  path: str):
+        """
+        Writes a cache entry through a temporary file so a concurrent reader 
+        never sees a partial file. DataFrames that Arrow cannot represent, 
+        such as object columns of mixed types, are left uncached.
+
+        Args:
+            df (pd.DataFrame): The parsed DataFrame.
+            path (str): The path of the cache entry.
+
+        Returns:
+            bool: Whether the entry was written.
+        """
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            if feather is not None:
+                feather.write_feather(df, tmp_path, compression='uncompressed')
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+            return True
+        except STORE_ERRORS:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def entries(self):
+        """
+        Lists the cache entries from the least to the most recently used.
+
+        Returns:
+            list: Tuples of (path, size in bytes, last access time).
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(self.extension):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda item: item[2])
+
+    def size(self):
+        """
+        Returns the total size in bytes of the cache entries.
+        """
+        return sum(size for path, size, last_used in self.entries())
+
+    def evict(self,
+              keep: str = None):
+        """
+        Removes the least recently used entries until the cache fits in 
+        max_bytes. Entries that cannot be removed, e.g. because another 
+        process still maps them on Windows, are skipped.
+
+        Args:
+            keep (str): The path of an entry that must not be removed.
+
+        Returns:
+            list: The paths of the removed entries.
+        """
+        entries = self.entries()
+        total = sum(size for path, size, last_used in entries)
+        removed = []
+        for path, size, last_used in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed.append(path)
+        return removed
+
+    def __key__(self,
+                reader: rd.DataReader,
+                columns: list = None,
+                content_hash: str = None):
+        """
+        Returns the cache key of a read: the content hash of the source 
+        combined with how it is parsed and which columns are kept.
+        """
+        if content_hash is None:
+            content_hash = self.content_hash(reader.source, reader.encoding)
+        digest = hashlib.blake2b(content_hash.encode(), digest_size=20)
+        digest.update(type(reader).__name__.encode())
+        digest.update((rd.matching_suffix(reader.name) or '').encode())
+        if columns is not None:
+            digest.update(repr(list(columns)).encode())
+        return digest.hexdigest()
+
+    def read(self,
+             reader: rd.DataReader,
+             columns: list = None,
+             content_hash: str = None):
+        """
+        Returns the DataFrame read by a DataReader, parsing the source only 
+        when no entry with the same key is cached. Hits refresh the entry's 
+        modification time, which is what the eviction orders by. Columnar 
+        formats are already cheap to read and bypass the cache.
+
+        Args:
+            reader (rd.DataReader): The reader of the source.
+            columns (list): The columns to read. All of them when None.
+            content_hash (str): The content_hash of the source when the 
+            caller already computed it. Computed when None.
+
+        Returns:
+            pd.DataFrame: The parsed DataFrame.
+        """
+        if not reader.cacheable:
+            return reader.read(columns)
+        path = self.__path__(self.__key__(reader, columns, content_hash))
+        if os.path.exists(path):
+            try:
+                df = self.__load__(path)
+                os.utime(path)
+                return df
+            except STORE_ERRORS:
+                pass
+        df = reader.read(columns)
+        if self.__store__(df, path):
+            self.evict(keep=path)
+        return df
+
+    def read_csv(self,
+                 source,
+                 encoding: str = 'UTF8'):
+        """
+        Returns the DataFrame of a CSV source through the cache.
+
+        Args:
+            source (str or file-like): The path or binary buffer of the CSV file.
+            encoding (str): The encoding of the CSV file.
+
+        Returns:
+            pd.DataFrame: The parsed DataFrame.
+        """
+        return self.read(rd.CsvReader(source, encoding=encoding))
+
+    def clear(self):
+        """
+        Removes every cache entry.
+        """
+        for path, size, last_used in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
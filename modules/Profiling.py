@@ -0,0 +1,307 @@
+import json
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+
+
+SINKS = []
+
+_local = threading.local()
+
+
+class LoggerSink:
+    """
+    A sink that logs every profiling event as one JSON message.
+
+    Attributes:
+        logger (logging.Logger): The logger the events go to.
+        level (int): The level the events are logged at.
+    """
+
+    def __init__(self,
+                 logger: logging.Logger = None,
+                 level: int = logging.INFO):
+        """
+        Initializes the LoggerSink.
+
+        Args:
+            logger (logging.Logger): The logger the events go to. The logger 
+            of this module when None.
+            level (int): The level the events are logged at.
+        """
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.level = level
+
+    def emit(self,
+             event: dict):
+        self.logger.log(self.level, json.dumps(event, default=str))
+
+
+class JsonLinesSink:
+    """
+    A sink that appends every profiling event to a JSON-lines file.
+
+    Attributes:
+        path (str): The path of the file.
+    """
+
+    def __init__(self,
+                 path: str):
+        """
+        Initializes the JsonLinesSink, opening the file in append mode.
+
+        Args:
+            path (str): The path of the file.
+        """
+        self.path = path
+        self._file = open(path, 'a', encoding='UTF8')
+        self._lock = threading.Lock()
+
+    def emit(self,
+             event: dict):
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class MemorySink:
+    """
+    A sink that keeps the profiling events in a list, e.g. to inspect them 
+    in a notebook or a benchmark.
+
+    Attributes:
+        events (list): The events received, in order of completion.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty MemorySink.
+        """
+        self.events = []
+        self._lock = threading.Lock()
+
+    def emit(self,
+             event: dict):
+        with self._lock:
+            self.events.append(event)
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+    def summary(self):
+        """
+        Aggregates the events by stage.
+
+        Returns:
+            dict: The 'calls', 'total_seconds' and 'max_seconds' of every 
+            stage, slowest stages first.
+        """
+        stages = {}
+        for event in list(self.events):
+            totals = stages.setdefault(event['stage'], {'calls': 0,
+                                                        'total_seconds': 0.0,
+                                                        'max_seconds': 0.0})
+            totals['calls'] += 1
+            totals['total_seconds'] += event['seconds']
+            totals['max_seconds'] = max(totals['max_seconds'], event['seconds'])
+        return dict(sorted(stages.items(),
+                           key=lambda item: item[1]['total_seconds'],
+                           reverse=True))
+
+
+def add_sink(sink):
+    """
+    Turns profiling on, sending every event to sink as well.
+
+    Args:
+        sink: An object with an emit(event) method.
+    """
+    if sink not in SINKS:
+        SINKS.append(sink)
+
+
+def remove_sink(sink):
+    """
+    Stops sending events to sink. Profiling is off once no sink is left.
+    """
+    if sink in SINKS:
+        SINKS.remove(sink)
+
+
+def enabled():
+    """
+    Returns whether any sink receives profiling events.
+    """
+    return SINKS != []
+
+
+@contextmanager
+def profiling(*sinks):
+    """
+    Sends the events of the enclosed code to sinks, e.g.
+
+        with pf.profiling(pf.MemorySink()) as (collector,):
+            sampler.structured_sample()
+        collector.summary()
+
+    Args:
+        *sinks: The sinks to add for the duration of the block.
+
+    Yields:
+        tuple: The sinks.
+    """
+    for sink in sinks:
+        add_sink(sink)
+    try:
+        yield sinks
+    finally:
+        for sink in sinks:
+            remove_sink(sink)
+
+
+class Stage:
+    """
+    A timed stage of a computation, used as a context manager. When it 
+    exits it sends one event to every sink with the stage name, its path 
+    among the enclosing stages of the same thread, its duration, its 
+    counters and the name of the exception that ended it, if any.
+
+    Attributes:
+        name (str): The name of the stage, e.g. 'StructuredSampler.pivot'.
+        counters (dict): The counters reported with the event, e.g. rows or 
+        strata.
+    """
+
+    __slots__ = ('name', 'counters', 'path', '_started_at', '_started_clock')
+
+    def __init__(self,
+                 name: str,
+                 counters: dict = None):
+        """
+        Initializes the Stage.
+
+        Args:
+            name (str): The name of the stage.
+            counters (dict): The initial counters of the stage.
+        """
+        self.name = name
+        self.counters = dict(counters) if counters is not None else {}
+        self.path = None
+
+    def count(self,
+              **counters):
+        """
+        Sets counters of the stage, e.g. stage.count(strata=120).
+        """
+        self.counters.update(counters)
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.path = '/'.join(stack)
+        self._started_at = time.time()
+        self._started_clock = time.perf_counter()
+        return self
+
+    def __exit__(self,
+                 exc_type,
+                 exc_value,
+                 traceback):
+        seconds = time.perf_counter() - self._started_clock
+        _local.stack.pop()
+        event = {'stage': self.name,
+                 'path': self.path,
+                 'seconds': seconds,
+                 'started_at': self._started_at,
+                 'thread': threading.current_thread().name}
+        event.update(self.counters)
+        if exc_type is not None:
+            event['error'] = exc_type.__name__
+        for sink in list(SINKS):
+            try:
+                sink.emit(event)
+            except Exception:
+                logging.getLogger(__name__).exception('Profiling sink %r failed.', sink)
+        return False
+
+
+class NullStage:
+    """
+    The stage returned while profiling is off: entering, counting and 
+    exiting it does nothing.
+    """
+
+    __slots__ = ()
+
+    def count(self,
+              **counters):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,
+                 exc_type,
+                 exc_value,
+                 traceback):
+        return False
+
+
+NULL_STAGE = NullStage()
+
+
+def stage(name: str,
+          **counters):
+    """
+    Times the enclosed block as a stage when profiling is on, e.g.
+
+        with pf.stage('StructuredSampler.pivot', rows=len(df)) as stage:
+            ...
+            stage.count(strata=len(pivot))
+
+    Costs a single check while profiling is off.
+
+    Args:
+        name (str): The name of the stage.
+        **counters: The initial counters of the stage.
+
+    Returns:
+        Stage or NullStage: The context manager of the stage.
+    """
+    if not SINKS:
+        return NULL_STAGE
+    return Stage(name, counters)
+
+
+def profiled(name: str = None):
+    """
+    Decorates a function or method so every call is timed as a stage when 
+    profiling is on. Costs a single check per call while it is off.
+
+    Args:
+        name (str): The name of the stage. The qualified name of the 
+        function when None.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorate(function):
+        stage_name = name if name is not None else function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not SINKS:
+                return function(*args, **kwargs)
+            with Stage(stage_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,222 @@
+from modules import DataReader as rd
+from modules import StructuredSampler as ss
+from modules import SampleSizeCalculator as ssc
+from modules import IdentifierIndex as ii
+from modules import SampleResult as sr
+from modules import Seeding as sd
+from modules import JobExecutor as jb
+
+
+class ProjectedStructuredSampler:
+    """
+    A class used to sample a structured subset of a wide table by only 
+    loading the columns the sample depends on. The identifier and structure 
+    columns are read and sampled with StructuredSampler, and the full rows 
+    of the sample are then gathered from the source in one pass, so the 
+    other columns never go through the sort, filter and concat steps. With 
+    a DataFrameReader the frame is already loaded and only those steps are 
+    saved; reading fewer columns needs a file reader.
+
+    Attributes:
+        reader (rd.DataReader): The reader of the source.
+        key_cols (list): The columns loaded to compute the sample.
+        sampler (ss.StructuredSampler): The sampler of the key columns.
+    """
+
+    def __init__(self,
+                 reader: rd.DataReader,
+                 sample_size: int,
+                 identifier_col: str,
+                 structure_parameters: list,
+                 allocation: str = 'rounding',
+                 random_state: int = None,
+                 n_jobs: int = None,
+                 identifier_index: ii.IdentifierIndex = None,
+                 progress: jb.Progress = None):
+        """
+        Initializes the ProjectedStructuredSampler by loading the key columns 
+        of the source.
+
+        Args:
+            reader (rd.DataReader): The reader of the source, e.g. from 
+            rd.reader_for or rd.DataFrameReader.
+            sample_size (int): The desired sample size.
+            identifier_col (str): The column used for sorting the DataFrame.
+            structure_parameters (list): List of columns used to define the structure.
+            allocation (str): Either 'rounding' or 'largest_remainder'.
+            random_state (int): The seed of every random step.
+            n_jobs (int): The number of worker processes drawing the strata.
+            identifier_index (IdentifierIndex): The index of identifier_col 
+            built once for the source.
+            progress (jb.Progress): Receives the step being run and the 
+            strata drawn, None to not report.
+        """
+        self.reader = reader
+        self.progress = progress
+        if progress is not None:
+            progress.stage('read')
+        source_cols = reader.columns()
+        self.key_cols = [col for col in dict.fromkeys([identifier_col] + list(structure_parameters))
+                         if isinstance(col, str) and col in source_cols]
+        key_df = reader.read(self.key_cols).reset_index(drop=True)
+        self.sampler = ss.StructuredSampler(key_df,
+                                            sample_size,
+                                            identifier_col,
+                                            structure_parameters,
+                                            allocation,
+                                            random_state,
+                                            n_jobs,
+                                            identifier_index,
+                                            progress)
+        self._cache = {}
+
+    def set_parameters(self,
+                       sample_size: int = None,
+                       structure_parameters: list = None,
+                       allocation: str = None,
+                       random_state: int = None):
+        """
+        Updates the sampling parameters, see StructuredSampler.set_parameters. 
+        Structure parameters must be among the loaded key columns.
+        """
+        if structure_parameters is not None and not set(structure_parameters).issubset(self.key_cols):
+            raise ValueError(
+                f'structure_parameters must be among the loaded columns {self.key_cols}.')
+        self.sampler.set_parameters(sample_size,
+                                    structure_parameters,
+                                    allocation,
+                                    random_state)
+        self._cache = {}
+
+    def working_pivot_df(self):
+        """
+        Creates a pivot table with counts, weights, and sample sizes by 
+        structure parameters.
+
+        Returns:
+            pd.DataFrame: The pivot table with counts and calculated weights 
+            and sample sizes.
+        """
+        return self.sampler.working_pivot_df()
+
+    def sample_positions(self):
+        """
+        Computes the structured sample on the key columns once per instance.
+
+        Returns:
+            np.ndarray: The row positions of the sample in the source.
+        """
+        if 'sample_positions' not in self._cache:
+            self._cache['sample_positions'] = self.sampler.structured_sample().index.to_numpy()
+        return self._cache['sample_positions']
+
+    def structured_sample(self,
+                          columns: list = None):
+        """
+        Gathers the rows of the structured sample from the source.
+
+        Args:
+            columns (list): The columns to return. All of them when None.
+
+        Returns:
+            pd.DataFrame: The final structured sample DataFrame.
+        """
+        sample_positions = self.sample_positions()
+        if self.progress is not None:
+            self.progress.stage('gather')
+        return self.reader.read_positions(sample_positions, columns)
+
+    def sample_result(self):
+        """
+        Returns the structured sample without gathering its rows.
+
+        Returns:
+            sr.SampleResult: The positions, seed and parameters of the sample.
+        """
+        return sr.SampleResult(self.reader,
+                               self.sample_positions(),
+                               self.sampler.random_state,
+                               {'sample_size': self.sampler.sample_size,
+                                'structure_parameters': self.sampler.structure_parameters,
+                                'allocation': self.sampler.allocation})
+
+
+class ProjectedRandomSampler:
+    """
+    A class used to sample a random subset of a table without loading it: 
+    only the row count is needed to draw the positions, and the sampled rows 
+    are then gathered from the source.
+
+    Attributes:
+        reader (rd.DataReader): The reader of the source.
+        population_size (int): The number of rows of the source.
+        sample_size (int): The calculated sample size.
+        random_state (int): The seed of the draw.
+    """
+
+    def __init__(self,
+                 reader: rd.DataReader,
+                 sample_portion: int = 50,
+                 confidence_level: int = 99,
+                 standard_error: int = 1,
+                 random_state: int = None):
+        """
+        Initializes the ProjectedRandomSampler with the source and sampling 
+        parameters.
+
+        Args:
+            reader (rd.DataReader): The reader of the source.
+            sample_portion (int): The portion of the population to sample, as a percentage.
+            confidence_level (int): The desired confidence level for the sample.
+            standard_error (int): The desired standard error for the sample.
+            random_state (int): The seed of the draw. A fresh one is drawn 
+            and recorded when None.
+        """
+        self.reader = reader
+        self.sample_portion = sample_portion
+        self.confidence_level = confidence_level
+        self.standard_error = standard_error
+        self.population_size = reader.n_rows()
+        self.sample_size = ssc.SampleSize(sample_portion=sample_portion,
+                                          confidence_level=confidence_level,
+                                          standard_error=standard_error).sample_size(
+                                              population_size=self.population_size)
+        self.random_state = random_state if random_state is not None else sd.new_seed()
+        self._cache = {}
+
+    def sample_result(self):
+        """
+        Draws the row positions of the sample once per instance.
+
+        Returns:
+            sr.SampleResult: The positions, seed and parameters of the sample.
+        """
+        if 'sample_result' not in self._cache:
+            self._cache['sample_result'] = sr.SampleResult.random(
+                self.reader,
+                self.sample_size,
+                self.random_state,
+                {'sample_size': self.sample_size,
+                 'sample_portion': self.sample_portion,
+                 'confidence_level': self.confidence_level,
+                 'standard_error': self.standard_error})
+        return self._cache['sample_result']
+
+    def sample_positions(self):
+        """
+        Returns the row positions of the sample, in random order.
+        """
+        return self.sample_result().positions
+
+    def sampled_df(self,
+                   columns: list = None):
+        """
+        Gathers the rows of the random sample from the source.
+
+        Args:
+            columns (list): The columns to return. All of them when None.
+
+        Returns:
+            pd.DataFrame: The randomly sampled DataFrame.
+        """
+        return self.sample_result().to_df(columns)
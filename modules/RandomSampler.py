@@ -1,5 +1,10 @@
+import os
+import math
 import pandas as pd
+import numpy as np
 from modules import SampleSizeCalculator as ssc
+from modules import SampleResult as sr
+from modules import Seeding as sd
 
 
 class RandomSampler:
@@ -11,13 +16,15 @@ class RandomSampler:
         sample_portion (int): The portion of the population to sample, as a percentage.
         confidence_level (int): The desired confidence level for the sample.
         standard_error (int): The desired standard error for the sample.
+        random_state (int): The seed of the draw.
     """
 
     def __init__(self,
                  df: pd.DataFrame,
                  sample_portion: int = 50,
                  confidence_level: int = 99,
-                 standard_error: int = 1):
+                 standard_error: int = 1,
+                 random_state: int = None):
         """
         Initializes the RandomSampler with the DataFrame and sampling parameters.
 
@@ -26,16 +33,274 @@ class RandomSampler:
             sample_portion (int): The portion of the population to sample, as a percentage.
             confidence_level (int): The desired confidence level for the sample.
             standard_error (int): The desired standard error for the sample.
+            random_state (int): The seed of the draw. A fresh one is drawn 
+            and recorded when None.
+        """
+        self.df = df
+        self.sample_portion = sample_portion
+        self.confidence_level = confidence_level
+        self.standard_error = standard_error
+        self.random_state = random_state if random_state is not None else sd.new_seed()
+        self.sample_size = ssc.SampleSize(sample_portion=sample_portion,
+                                          confidence_level=confidence_level,
+                                          standard_error=standard_error).sample_size(
+                                              population_size=df.shape[0])
+        self._cache = {}
+
+    def sample_result(self):
+        """
+        Draws the row positions of the sample once per instance, without 
+        copying any row of the DataFrame.
 
         Returns:
-            pd.DataFrame: The randomly sampled DataFrame.
+            sr.SampleResult: The positions, seed and parameters of the sample.
+        """
+        if 'sample_result' not in self._cache:
+            self._cache['sample_result'] = sr.SampleResult.random(
+                self.df,
+                self.sample_size,
+                self.random_state,
+                {'sample_portion': self.sample_portion,
+                 'confidence_level': self.confidence_level,
+                 'standard_error': self.standard_error})
+        return self._cache['sample_result']
+
+    def sampled_df(self):
+        return self.sample_result().to_df()
+
+
+class StreamingRandomSampler:
+    """
+    A class used to sample a random subset from a table that is never fully 
+    loaded, reading it chunk by chunk with a skip-based reservoir 
+    (Algorithm L) so memory stays constant whatever the file size.
+
+    Attributes:
+        source (str, file-like or iterable): The CSV path or buffer, or an 
+        iterable of DataFrame chunks.
+        sample_portion (int): The portion of the population to sample, as a percentage.
+        confidence_level (int): The desired confidence level for the sample.
+        standard_error (int): The desired standard error for the sample.
+        population_size (int): The number of rows of the table, if known.
+        chunksize (int): The number of rows read per chunk from a CSV source.
+        random_state (int): The seed of the reservoir.
+    """
+
+    def __init__(self,
+                 source,
+                 sample_portion: int = 50,
+                 confidence_level: int = 99,
+                 standard_error: int = 1,
+                 population_size: int = None,
+                 chunksize: int = 100000,
+                 encoding: str = 'UTF8',
+                 random_state: int = None):
+        """
+        Initializes the StreamingRandomSampler with the source and sampling 
+        parameters.
+
+        Args:
+            source (str, file-like or iterable): The CSV path or buffer, or an 
+            iterable of DataFrame chunks.
+            sample_portion (int): The portion of the population to sample, as a percentage.
+            confidence_level (int): The desired confidence level for the sample.
+            standard_error (int): The desired standard error for the sample.
+            population_size (int): The number of rows of the table. For CSV 
+            sources it is counted from the line breaks when not given.
+            chunksize (int): The number of rows read per chunk from a CSV source.
+            encoding (str): The encoding of a CSV source.
+            random_state (int): The seed of the reservoir. A fresh seed is 
+            drawn and recorded when None.
+        """
+        self.source = source
+        self.sample_size_calculator = ssc.SampleSize(sample_portion=sample_portion,
+                                                     confidence_level=confidence_level,
+                                                     standard_error=standard_error)
+        self.population_size = population_size
+        self.chunksize = chunksize
+        self.encoding = encoding
+        self.random_state = random_state if random_state is not None else sd.new_seed()
+        self.random_sampled_df = None
+
+    def __is_path__(self):
+        return isinstance(self.source, (str, os.PathLike))
+
+    def __is_csv_source__(self):
+        """
+        Tells CSV paths and seekable buffers apart from iterables of chunks. 
+        Readers like pd.read_csv(..., chunksize=...) have a read method too, 
+        but cannot be rewound and are iterated as chunks.
+
+        Returns:
+            bool: True when the source is read as a CSV file.
+        """
+        return self.__is_path__() or (hasattr(self.source, 'read')
+                                      and hasattr(self.source, 'seek'))
+
+    def __count_csv_rows__(self):
+        """
+        Counts the data rows of a CSV source from its line breaks, reading it 
+        in binary blocks. Quoted fields with line breaks are counted as 
+        extra rows, pass population_size explicitly for such files.
+
+        Returns:
+            int: The number of data rows, without the header.
         """
-        population_size = df.shape[0]
-        sample_size = ssc.SampleSize(sample_portion=sample_portion,
-                                     confidence_level=confidence_level,
-                                     standard_error=standard_error).sample_size(
-                                         population_size=population_size)
-        self.random_sampled_df = df.sample(n=sample_size)
+        if self.__is_path__():
+            csv_file = open(self.source, 'rb')
+        else:
+            csv_file = self.source
+            csv_file.seek(0)
+
+        line_breaks = 0
+        last_block = b''
+        try:
+            while True:
+                block = csv_file.read(1 << 20)
+                if not block:
+                    break
+                if isinstance(block, str):
+                    block = block.encode(self.encoding)
+                line_breaks += block.count(b'\n')
+                last_block = block
+        finally:
+            if self.__is_path__():
+                csv_file.close()
+            else:
+                csv_file.seek(0)
+
+        if last_block and not last_block.endswith(b'\n'):
+            line_breaks += 1
+        return max(line_breaks - 1, 0)
+
+    def __max_sample_size__(self):
+        """
+        Bounds the sample size over every population size, the formula 
+        growing towards Z^2pq/e^2 as the population grows.
+
+        Returns:
+            int: The largest sample size any population can need.
+        """
+        calculator = self.sample_size_calculator
+        return int(math.ceil((calculator.Z_score**2) * calculator.p_value *
+                             calculator.q_value / (calculator.standard_error**2)))
+
+    def __chunks__(self):
+        """
+        Iterates over the chunks of the source.
+
+        Returns:
+            Iterator[pd.DataFrame]: The chunks of the table.
+        """
+        if self.__is_csv_source__():
+            if hasattr(self.source, 'seek'):
+                self.source.seek(0)
+            return pd.read_csv(self.source,
+                               chunksize=self.chunksize,
+                               encoding=self.encoding)
+        return iter(self.source)
+
+    def __reservoir_sample__(self,
+                             reservoir_size: int):
+        """
+        Draws a uniform sample of reservoir_size rows with Algorithm L. The 
+        positions of the rows that enter the reservoir are generated by 
+        geometric skips, so only O(k(1 + log(N/k))) random numbers are drawn 
+        and the rows in between are never copied.
+
+        Args:
+            reservoir_size (int): The number of rows to keep.
+
+        Returns:
+            tuple: The sampled rows, indexed by their row position, and the 
+            number of rows read.
+        """
+        reservoir_df = None
+        rows_read = 0
+        if reservoir_size <= 0:
+            for chunk in self.__chunks__():
+                rows_read += len(chunk)
+            return None, rows_read
+
+        rng = sd.substream(self.random_state, 'reservoir')
+        weight = math.exp(math.log(rng.random()) / reservoir_size)
+        next_position = reservoir_size + int(
+            math.log(rng.random()) / math.log(1 - weight))
+
+        for chunk in self.__chunks__():
+            chunk_start = rows_read
+            rows_read += len(chunk)
+            chunk = chunk.set_axis(np.arange(chunk_start, rows_read))
+
+            if chunk_start < reservoir_size:
+                filling_rows = chunk.iloc[:reservoir_size - chunk_start]
+                reservoir_df = filling_rows if reservoir_df is None else pd.concat(
+                    [reservoir_df, filling_rows])
+
+            replaced_slots = []
+            replacing_positions = []
+            while next_position < rows_read:
+                replaced_slots.append(int(rng.integers(reservoir_size)))
+                replacing_positions.append(next_position - chunk_start)
+                weight *= math.exp(math.log(rng.random()) / reservoir_size)
+                next_position += int(
+                    math.log(rng.random()) / math.log(1 - weight)) + 1
+
+            if replaced_slots:
+                events = pd.Series(replacing_positions,
+                                   index=replaced_slots)
+                events = events[~events.index.duplicated(keep='last')]
+                keep_mask = np.ones(len(reservoir_df), dtype=bool)
+                keep_mask[events.index.to_numpy()] = False
+                reservoir_df = pd.concat([reservoir_df[keep_mask],
+                                          chunk.iloc[events.to_numpy()]])
+
+        return reservoir_df, rows_read
+
+    def sample_size(self):
+        """
+        Calculates the sample size from the population size, counting the 
+        rows of a CSV source when the population size was not given.
+
+        Returns:
+            int: The calculated sample size, or None when the population 
+            size is only known after streaming an iterable of chunks.
+        """
+        if self.population_size is None and self.__is_csv_source__():
+            self.population_size = self.__count_csv_rows__()
+        if self.population_size is None:
+            return None
+        return self.sample_size_calculator.sample_size(
+            population_size=self.population_size)
 
     def sampled_df(self):
+        """
+        Draws the random sample in one pass over the source. When the 
+        population size is unknown the reservoir holds the largest sample 
+        size any population can need, and once the pass has counted the rows 
+        the exact sample size is drawn from it.
+
+        Returns:
+            pd.DataFrame: The randomly sampled DataFrame.
+        """
+        if self.random_sampled_df is not None:
+            return self.random_sampled_df
+
+        sample_size = self.sample_size()
+        if sample_size is None:
+            reservoir_df, rows_read = self.__reservoir_sample__(
+                self.__max_sample_size__())
+            self.population_size = rows_read
+            sample_size = self.sample_size_calculator.sample_size(
+                population_size=rows_read)
+            if reservoir_df is not None and len(reservoir_df) > sample_size:
+                reservoir_df = reservoir_df.sample(
+                    n=sample_size,
+                    random_state=sd.substream(self.random_state, 'random'))
+        else:
+            reservoir_df, rows_read = self.__reservoir_sample__(sample_size)
+
+        if reservoir_df is None:
+            reservoir_df = pd.DataFrame()
+        self.random_sampled_df = reservoir_df
         return self.random_sampled_df
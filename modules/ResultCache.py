@@ -0,0 +1,319 @@
+import os
+import sys
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+
+def estimate_nbytes(value):
+    """
+    Estimates the memory held by a cached result: DataFrames and Series are 
+    measured deeply, arrays by their buffer, and containers by their items.
+
+    Args:
+        value: The cached result.
+
+    Returns:
+        int: The estimated size in bytes.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(key) + estimate_nbytes(item)
+                                          for key, item in value.items())
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    A class used to keep the outputs of samplers and replacers, keyed by the 
+    fingerprint of the input datasets, the operation, its parameters and its 
+    seed, so a rerun with the same inputs returns the same result without 
+    recomputing it. Results live in an in-memory LRU tier bounded by entry 
+    count and bytes, and optionally in an on-disk tier of pickles that keeps 
+    evicted results and survives restarts. The in-memory tier and the 
+    counters are guarded by a lock, so one cache can be shared by the 
+    sessions and job threads of a server; pickling to and from disk happens 
+    outside the lock, through temporary files renamed into place.
+
+    Attributes:
+        max_entries (int): The number of results kept in memory.
+        max_bytes (int): The memory above which results are evicted.
+        cache_dir (str): The directory of the on-disk tier, None without it.
+        max_disk_bytes (int): The size of the on-disk tier above which the 
+        least recently used files are removed.
+        hits (int): The number of lookups served from either tier.
+        misses (int): The number of lookups that had to compute the result.
+    """
+
+    def __init__(self,
+                 max_entries: int = 64,
+                 max_bytes: int = 1 << 30,
+                 cache_dir: str = None,
+                 max_disk_bytes: int = 4 << 30):
+        """
+        Initializes the ResultCache.
+
+        Args:
+            max_entries (int): The number of results kept in memory.
+            max_bytes (int): The memory above which results are evicted.
+            cache_dir (str): The directory of the on-disk tier. Results are 
+            only kept in memory when None.
+            max_disk_bytes (int): The size of the on-disk tier above which 
+            the least recently used files are removed.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._nbytes = {}
+        self._lock = threading.Lock()
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(dataset_ids,
+            operation: str,
+            params: dict = None,
+            seed: int = None):
+        """
+        Builds the key of a result.
+
+        Args:
+            dataset_ids (str or tuple): The fingerprint of the input dataset, 
+            or a tuple of them when there are several inputs.
+            operation (str): The name of the operation, e.g. 'structured_sample'.
+            params (dict): The parameters of the operation.
+            seed (int): The seed of the operation.
+
+        Returns:
+            str: The hexadecimal key.
+        """
+        if not isinstance(dataset_ids, tuple):
+            dataset_ids = (dataset_ids,)
+        params = sorted((params or {}).items())
+        digest = hashlib.blake2b(repr((dataset_ids, operation, params, seed)).encode(),
+                                 digest_size=20)
+        return digest.hexdigest()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self,
+                     key: str):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.cache_dir is not None and os.path.exists(self.__path__(key))
+
+    def __path__(self,
+                 key: str):
+        return os.path.join(self.cache_dir, key + '.pkl')
+
+    def memory_usage(self):
+        """
+        Returns the estimated memory in bytes of the in-memory tier.
+        """
+        with self._lock:
+            return sum(self._nbytes.values())
+
+    def __evict_memory__(self,
+                         keep: str = None):
+        """
+        Drops the least recently used in-memory results until the tier fits 
+        in max_entries and max_bytes. Evicted results stay on disk when the 
+        on-disk tier is enabled.
+
+        Args:
+            keep (str): The key of a result that must not be dropped.
+        """
+        total = sum(self._nbytes.values())
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries and total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            del self._entries[key]
+            total -= self._nbytes.pop(key)
+
+    def __evict_disk__(self,
+                       keep: str = None):
+        """
+        Removes the least recently used files until the on-disk tier fits in 
+        max_disk_bytes.
+
+        Args:
+            keep (str): The path of a file that must not be removed.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        total = sum(size for last_used, path, size in entries)
+        for last_used, path, size in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def __store_memory__(self,
+                         key: str,
+                         value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._nbytes[key] = estimate_nbytes(value)
+        self.__evict_memory__(keep=key)
+
+    def __store_disk__(self,
+                       key: str,
+                       value):
+        """
+        Pickles a result through a temporary file so a concurrent reader 
+        never sees a partial file. Results that cannot be pickled are only 
+        kept in memory.
+        """
+        path = self.__path__(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as result_file:
+                pickle.dump(value, result_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.__evict_disk__(keep=path)
+
+    def __load_disk__(self,
+                      key: str):
+        """
+        Reads a result from the on-disk tier, refreshing its modification 
+        time. Unreadable files are removed. A file evicted by another thread 
+        while it is read is still returned.
+
+        Returns:
+            tuple: Whether the result was found, and the result.
+        """
+        if self.cache_dir is None:
+            return False, None
+        path = self.__path__(key)
+        try:
+            with open(path, 'rb') as result_file:
+                value = pickle.load(result_file)
+        except FileNotFoundError:
+            return False, None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True, value
+
+    def get(self,
+            key: str,
+            default=None):
+        """
+        Looks a result up in memory first and then on disk, promoting disk 
+        hits to memory.
+
+        Args:
+            key (str): The key of the result.
+            default: The value returned when the result is not cached.
+
+        Returns:
+            The cached result, or default.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        found, value = self.__load_disk__(key)
+        with self._lock:
+            if found:
+                self.hits += 1
+                self.__store_memory__(key, value)
+                return value
+            self.misses += 1
+            return default
+
+    def put(self,
+            key: str,
+            value):
+        """
+        Stores a result in memory and, when enabled, on disk.
+
+        Args:
+            key (str): The key of the result.
+            value: The result.
+        """
+        with self._lock:
+            self.__store_memory__(key, value)
+        if self.cache_dir is not None:
+            self.__store_disk__(key, value)
+
+    def get_or_compute(self,
+                       key: str,
+                       compute):
+        """
+        Returns the cached result stored under key, computing and storing it 
+        first if it is not cached yet.
+
+        Args:
+            key (str): The key of the result.
+            compute (callable): The function that computes the result.
+
+        Returns:
+            The cached or computed result.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self,
+              disk: bool = True):
+        """
+        Drops every cached result.
+
+        Args:
+            disk (bool): Whether to also remove the on-disk tier.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes.clear()
+        if disk and self.cache_dir is not None:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and entry.name.endswith('.pkl'):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
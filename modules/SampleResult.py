@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from modules import DataReader as rd
+from modules import Seeding as sd
+
+
+class SampleResult:
+    """
+    A class used to hold a sample as the row positions it selects from its 
+    source, together with the seed and parameters that produced it. The 
+    DataFrame of the sample is only gathered when it is displayed or 
+    exported, and is then kept for later calls.
+
+    Attributes:
+        reader (rd.DataReader): The reader of the sampled source.
+        positions (np.ndarray): The row positions of the sample, in sample order.
+        seed (int): The seed the positions were drawn with.
+        params (dict): The parameters the sample was drawn with.
+    """
+
+    def __init__(self,
+                 source,
+                 positions,
+                 seed: int = None,
+                 params: dict = None):
+        """
+        Initializes the SampleResult without materializing any row.
+
+        Args:
+            source (pd.DataFrame or rd.DataReader): The sampled DataFrame or 
+            the reader of the sampled file.
+            positions (array-like): The row positions of the sample.
+            seed (int): The seed the positions were drawn with.
+            params (dict): The parameters the sample was drawn with.
+        """
+        if isinstance(source, pd.DataFrame):
+            source = rd.DataFrameReader(source)
+        self.reader = source
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.seed = seed
+        self.params = dict(params) if params is not None else {}
+        self._cache = {}
+
+    @classmethod
+    def random(cls,
+               source,
+               sample_size: int,
+               seed: int = None,
+               params: dict = None):
+        """
+        Draws a simple random sample without replacement. Only the row count 
+        of the source is read, and the draw costs O(sample_size).
+
+        Args:
+            source (pd.DataFrame or rd.DataReader): The DataFrame or the 
+            reader of the file to sample.
+            sample_size (int): The number of rows to draw.
+            seed (int): The seed of the draw. A fresh one is recorded when None.
+            params (dict): The parameters to record with the sample.
+
+        Returns:
+            SampleResult: The positions of the drawn rows, in random order.
+        """
+        if isinstance(source, pd.DataFrame):
+            source = rd.DataFrameReader(source)
+        seed = seed if seed is not None else sd.new_seed()
+        positions = sd.substream(seed, 'random').choice(source.n_rows(),
+                                                        size=sample_size,
+                                                        replace=False)
+        params = dict(params) if params is not None else {}
+        params.setdefault('sample_size', sample_size)
+        return cls(source, positions, seed, params)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def to_df(self,
+              columns: list = None):
+        """
+        Gathers the rows of the sample from the source.
+
+        Args:
+            columns (list): The columns to return. All of them when None.
+
+        Returns:
+            pd.DataFrame: The sampled rows.
+        """
+        key = tuple(columns) if columns is not None else None
+        if key not in self._cache:
+            self._cache[key] = self.reader.read_positions(self.positions, columns)
+        return self._cache[key]
+
+    def to_csv(self,
+               columns: list = None,
+               **kwargs):
+        """
+        Exports the sample as CSV, without the index unless asked for.
+
+        Args:
+            columns (list): The columns to export. All of them when None.
+            **kwargs: Passed to pd.DataFrame.to_csv.
+
+        Returns:
+            str: The CSV text when no path is given.
+        """
+        kwargs.setdefault('index', False)
+        return self.to_df(columns).to_csv(**kwargs)
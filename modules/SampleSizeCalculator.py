@@ -1,3 +1,169 @@
+import math
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+
+z_score_dict = {99: 2.576,
+                98: 2.326,
+                95: 1.96,
+                90: 1.645,
+                85: 1.44,
+                80: 1.282}
+
+# Coefficients of Acklam's rational approximation of the inverse normal CDF.
+acklam_a = (-3.969683028665376e+01, 2.209460984245205e+02,
+            -2.759285104469687e+02, 1.383577518672690e+02,
+            -3.066479806614716e+01, 2.506628277459239e+00)
+acklam_b = (-5.447609879822406e+01, 1.615858368580409e+02,
+            -1.556989798598866e+02, 6.680131188771972e+01,
+            -1.328068155288572e+01)
+acklam_c = (-7.784894002430293e-03, -3.223964580411365e-01,
+            -2.400758277161838e+00, -2.549671348594009e+00,
+            4.374664141464968e+00, 2.938163982698783e+00)
+acklam_d = (7.784695709041462e-03, 3.224671290700398e-01,
+            2.445134137142996e+00, 3.754408661907416e+00)
+
+
+def erfc(x):
+    """
+    Computes the complementary error function elementwise with NumPy only: 
+    the Maclaurin series of erf below 2 and Laplace's continued fraction 
+    from 2 on, both evaluated to a fixed depth over the whole array. The 
+    relative error stays near double precision, including far in the tail 
+    where erfc is tiny.
+
+    Args:
+        x (array-like): The arguments.
+
+    Returns:
+        np.ndarray: erfc(x).
+    """
+    x = np.asarray(x, dtype=float)
+    magnitude = np.abs(x)
+    result = np.empty_like(magnitude)
+
+    near = magnitude < 2
+    s = magnitude[near]
+    s2 = s*s
+    term = s.copy()
+    series = s.copy()
+    for n in range(1, 60):
+        term = -term*s2/n
+        series += term/(2*n + 1)
+    result[near] = 1 - 2/math.sqrt(math.pi)*series
+
+    t = magnitude[~near]
+    fraction = np.zeros_like(t)
+    for k in range(60, 0, -1):
+        fraction = (k/2)/(t + fraction)
+    result[~near] = np.exp(-t*t)/math.sqrt(math.pi)/(t + fraction)
+
+    return np.where(x < 0, 2 - result, result)
+
+
+def inverse_normal_cdf(probability):
+    """
+    Computes the standard normal quantile of each probability with Acklam's 
+    rational approximation followed by one Halley refinement step, which 
+    gives full double precision using NumPy only. The lower half is computed 
+    and mirrored, so upper-tail probabilities keep their precision.
+
+    Args:
+        probability (array-like): Probabilities strictly between 0 and 1.
+
+    Returns:
+        np.ndarray: The standard normal quantiles.
+    """
+    probability = np.asarray(probability, dtype=float)
+    tail_probability = np.minimum(probability, 1 - probability)
+    quantile = np.empty_like(tail_probability)
+
+    lower = tail_probability < 0.02425
+    central = ~lower
+
+    q = tail_probability[central] - 0.5
+    r = q*q
+    quantile[central] = (np.polyval(acklam_a, r)*q) / \
+        np.polyval(acklam_b + (1.0,), r)
+
+    q = np.sqrt(-2*np.log(tail_probability[lower]))
+    quantile[lower] = np.polyval(acklam_c, q) / \
+        np.polyval(acklam_d + (1.0,), q)
+
+    error = 0.5*erfc(-quantile/math.sqrt(2)) - tail_probability
+    u = error*math.sqrt(2*math.pi)*np.exp(quantile**2/2)
+    quantile = quantile - u/(1 + quantile*u/2)
+
+    return np.where(probability > 0.5, -quantile, quantile)
+
+
+@lru_cache(maxsize=1024)
+def exact_z_score(confidence_level: float):
+    """
+    Computes the exact two-sided Z-score of a confidence level, memoized in a 
+    bounded cache.
+
+    Args:
+        confidence_level (float): The confidence level, as a percentage 
+        strictly between 0 and 100.
+
+    Returns:
+        float: The Z-score such that P(|Z| <= z) equals the confidence level.
+    """
+    if not 0 < confidence_level < 100:
+        raise ValueError(
+            f'The confidence level must be between 0 and 100, got {confidence_level}.')
+    return float(inverse_normal_cdf(0.5 + confidence_level/200))
+
+
+def z_score(confidence_level: float,
+            exact: bool = False):
+    """
+    Retrieves the Z-score of a confidence level. The tabulated three-decimal 
+    values are kept for the usual levels so published sample sizes do not 
+    change, and any other level gets its exact quantile.
+
+    Args:
+        confidence_level (float): The confidence level, as a percentage.
+        exact (bool): Whether to use the exact quantile for tabulated levels too.
+
+    Returns:
+        float: The Z-score of the confidence level.
+    """
+    confidence_level = float(confidence_level)
+    if not exact and confidence_level in z_score_dict:
+        return z_score_dict[confidence_level]
+    return exact_z_score(confidence_level)
+
+
+def z_scores(confidence_levels,
+             exact: bool = False):
+    """
+    Retrieves the Z-scores of an array of confidence levels, computing each 
+    distinct level only once.
+
+    Args:
+        confidence_levels (array-like): The confidence levels, as percentages.
+        exact (bool): Whether to use the exact quantile for tabulated levels too.
+
+    Returns:
+        np.ndarray: The Z-scores, with the shape of confidence_levels.
+    """
+    confidence_levels = np.asarray(confidence_levels, dtype=float)
+    levels, inverse = np.unique(confidence_levels, return_inverse=True)
+    if not np.all((levels > 0) & (levels < 100)):
+        raise ValueError(
+            f'The confidence levels must be between 0 and 100, got {levels[(levels <= 0) | (levels >= 100)]}.')
+    level_z_scores = inverse_normal_cdf(0.5 + levels/200)
+    if not exact:
+        tabulated_levels = np.array(list(z_score_dict), dtype=float)
+        tabulated = np.isin(levels, tabulated_levels)
+        level_z_scores[tabulated] = [z_score_dict[level]
+                                     for level in levels[tabulated].tolist()]
+    return level_z_scores[inverse.ravel()].reshape(confidence_levels.shape)
+
+
 class SampleSize:
     """
     A class used to calculate the sample size needed for a given population size
@@ -5,10 +171,10 @@ class SampleSize:
 
     Attributes:
         sample_portion (int): The portion of the population to sample, as a percentage.
-        confidence_level (int): The desired confidence level for the sample.
+        confidence_level (float): The desired confidence level for the sample.
         standard_error (int): The desired standard error for the sample.
         p_value (float): The proportion of the population to sample, as a decimal.
-        confidence_level (int): The desired confidence level for the sample.
+        confidence_level (float): The desired confidence level for the sample.
         standard_error (float): The desired standard error for the sample, as a decimal.
         q_value (float): The complement of the p-value (1 - p_value).
         Z_score (float): The z-score corresponding to the confidence level.
@@ -23,23 +189,17 @@ class SampleSize:
 
         Args:
             sample_portion (int): The portion of the population to sample, as a percentage.
-            confidence_level (int): The desired confidence level for the sample.
+            confidence_level (float): The desired confidence level for the 
+            sample, any level between 0 and 100.
             standard_error (int): The desired standard error for the sample.
         """
 
         self.p_value = float(sample_portion)/100
-        self.confidence_level = int(confidence_level)
+        self.confidence_level = float(confidence_level)
         self.standard_error = float(standard_error)/100
 
-        z_score_dict = {99: 2.576,
-                        98: 2.326,
-                        95: 1.96,
-                        90: 1.645,
-                        85: 1.44,
-                        80: 1.282}
-
         self.q_value = 1 - self.p_value
-        self.Z_score = z_score_dict[self.confidence_level]
+        self.Z_score = z_score(self.confidence_level)
 
     def sample_size(self,
                     population_size: int):
@@ -57,3 +217,94 @@ class SampleSize:
             (self.Z_score**2)*self.p_value*self.q_value
         sample_size = int(numerator/denominator)
         return sample_size
+
+
+class SampleSizeGrid:
+    """
+    A vectorized version of SampleSize that takes NumPy arrays, or anything 
+    broadcastable, for every sampling parameter and computes all the sample 
+    sizes in one call.
+
+    Attributes:
+        p_value (np.ndarray): The proportions of the population to sample, as decimals.
+        confidence_level (np.ndarray): The desired confidence levels.
+        standard_error (np.ndarray): The desired standard errors, as decimals.
+        q_value (np.ndarray): The complements of the p-values (1 - p_value).
+        Z_score (np.ndarray): The z-scores corresponding to the confidence levels.
+    """
+
+    def __init__(self,
+                 sample_portion=50,
+                 confidence_level=99,
+                 standard_error=1):
+        """
+        Initializes the SampleSizeGrid with arrays of sampling parameters.
+
+        Args:
+            sample_portion (array-like): The portions of the population to sample, as percentages.
+            confidence_level (array-like): The desired confidence levels.
+            standard_error (array-like): The desired standard errors, as percentages.
+        """
+        self.p_value = np.asarray(sample_portion, dtype=float)/100
+        self.confidence_level = np.asarray(confidence_level, dtype=float)
+        self.standard_error = np.asarray(standard_error, dtype=float)/100
+
+        self.q_value = 1 - self.p_value
+        self.Z_score = z_scores(self.confidence_level)
+
+    def sample_size(self,
+                    population_size):
+        """
+        Calculates the sample sizes needed for the given population sizes, 
+        broadcasting them against the sampling parameters. The arithmetic 
+        follows SampleSize.sample_size, so both give the same integers.
+
+        Args:
+            population_size (array-like): The sizes of the populations.
+
+        Returns:
+            np.ndarray: The calculated sample sizes.
+        """
+        population_size = np.asarray(population_size, dtype=float)
+        numerator = population_size*(self.Z_score**2)*self.p_value*self.q_value
+        denominator = (self.standard_error**2)*(population_size-1) + \
+            (self.Z_score**2)*self.p_value*self.q_value
+        sample_size = np.zeros(np.broadcast(numerator, denominator).shape)
+        np.divide(numerator, denominator, out=sample_size,
+                  where=denominator != 0)
+        return np.trunc(sample_size).astype(np.int64)
+
+    @staticmethod
+    def scenarios(population_size,
+                  sample_portion=50,
+                  confidence_level=99,
+                  standard_error=1):
+        """
+        Calculates the sample size of every combination of the given 
+        parameter values, as used in planning reports.
+
+        Args:
+            population_size (array-like): The population sizes to combine.
+            sample_portion (array-like): The sample portions to combine, as percentages.
+            confidence_level (array-like): The confidence levels to combine.
+            standard_error (array-like): The standard errors to combine, as percentages.
+
+        Returns:
+            pd.DataFrame: One row per scenario with its parameters and sample size.
+        """
+        grid = np.meshgrid(np.atleast_1d(population_size),
+                           np.atleast_1d(sample_portion),
+                           np.atleast_1d(confidence_level),
+                           np.atleast_1d(standard_error),
+                           indexing='ij')
+        population_sizes, sample_portions, confidence_levels, standard_errors = [
+            values.ravel() for values in grid]
+        sample_sizes = SampleSizeGrid(sample_portion=sample_portions,
+                                      confidence_level=confidence_levels,
+                                      standard_error=standard_errors).sample_size(
+                                          population_size=population_sizes)
+        return pd.DataFrame({'Population_size': population_sizes,
+                             'Sample_portion(%)': sample_portions,
+                             'Confidence_level(%)': confidence_levels,
+                             'Standard_error(%)': standard_errors,
+                             'Sample_size': sample_sizes})
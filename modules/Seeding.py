@@ -0,0 +1,110 @@
+import numpy as np
+
+
+STREAMS = {'allocation': 0,
+           'strata': 1,
+           'correction': 2,
+           'replacement': 3,
+           'reservoir': 4,
+           'random': 5}
+
+
+def new_seed():
+    """
+    Draws a fresh 32-bit seed from the operating system's entropy, to be 
+    recorded with a sample so it can be drawn again.
+    """
+    return int(np.random.SeedSequence().entropy % 2**32)
+
+
+def as_seed_sequence(random_state=None):
+    """
+    Converts any accepted seed to a np.random.SeedSequence.
+
+    Args:
+        random_state (None, int, SeedSequence or Generator): The seed. None 
+        draws fresh entropy; a Generator is advanced to draw the entropy of 
+        the seed sequence, so successive calls give different sequences.
+
+    Returns:
+        np.random.SeedSequence: The seed sequence.
+    """
+    if isinstance(random_state, np.random.SeedSequence):
+        return random_state
+    if isinstance(random_state, np.random.Generator):
+        return np.random.SeedSequence(random_state.integers(2**63, size=4))
+    return np.random.SeedSequence(random_state)
+
+
+def as_generator(random_state=None):
+    """
+    Converts any accepted seed to a np.random.Generator. Generators are 
+    returned as they are, so their state is shared with the caller.
+
+    Args:
+        random_state (None, int, SeedSequence or Generator): The seed.
+
+    Returns:
+        np.random.Generator: The generator.
+    """
+    if isinstance(random_state, np.random.Generator):
+        return random_state
+    return np.random.default_rng(as_seed_sequence(random_state))
+
+
+def stream_seed(random_state,
+                stream: str):
+    """
+    Derives the seed sequence of a named stream. Every stream of one seed is 
+    independent of the others and does not depend on the order in which 
+    they are used, so each step of a sampler (apportionment, stratum draws, 
+    corrections, ...) can be reproduced alone. Unlike SeedSequence.spawn, 
+    deriving a stream does not change the parent seed sequence.
+
+    Args:
+        random_state (None, int, SeedSequence or Generator): The root seed.
+        stream (str): The name of the stream, one of STREAMS.
+
+    Returns:
+        np.random.SeedSequence: The seed sequence of the stream.
+    """
+    root = as_seed_sequence(random_state)
+    return np.random.SeedSequence(root.entropy,
+                                  spawn_key=tuple(root.spawn_key) + (STREAMS[stream],),
+                                  pool_size=root.pool_size)
+
+
+def substream(random_state,
+              stream: str):
+    """
+    Returns a generator for a named stream of a seed, see stream_seed. A 
+    Generator passed as random_state is used as it is.
+
+    Args:
+        random_state (None, int, SeedSequence or Generator): The root seed.
+        stream (str): The name of the stream, one of STREAMS.
+
+    Returns:
+        np.random.Generator: The generator of the stream.
+    """
+    if isinstance(random_state, np.random.Generator):
+        return random_state
+    return np.random.default_rng(stream_seed(random_state, stream))
+
+
+def spawn(random_state,
+          stream: str,
+          n_children: int):
+    """
+    Spawns the child seed sequences of a named stream, e.g. one per block of 
+    strata. The same seed always spawns the same children.
+
+    Args:
+        random_state (None, int, SeedSequence or Generator): The root seed.
+        stream (str): The name of the stream, one of STREAMS.
+        n_children (int): The number of children.
+
+    Returns:
+        list: The child np.random.SeedSequence objects.
+    """
+    return stream_seed(random_state, stream).spawn(n_children)
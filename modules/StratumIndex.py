@@ -0,0 +1,312 @@
+import pandas as pd
+import numpy as np
+from modules import Seeding as sd
+
+
+BLOCK_ROWS = 1 << 16
+
+
+def group_ranks(codes):
+    """
+    Numbers the occurrences of every code in order of appearance, like a 
+    groupby cumcount.
+
+    Args:
+        codes (array-like): The group code of each element.
+
+    Returns:
+        np.ndarray: The rank of each element within its group, from 0.
+    """
+    codes = np.asarray(codes)
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    is_group_start = np.ones(len(codes), dtype=bool)
+    is_group_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    group_starts = np.maximum.accumulate(
+        np.where(is_group_start, np.arange(len(codes)), 0))
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[order] = np.arange(len(codes)) - group_starts
+    return ranks
+
+
+def stratum_blocks(counts,
+                   block_rows: int = BLOCK_ROWS):
+    """
+    Splits consecutive strata into blocks of about block_rows rows. The 
+    blocks only depend on the stratum counts, so every backend draws the 
+    same blocks with the same random streams.
+
+    Args:
+        counts (array-like): The number of rows of each stratum.
+        block_rows (int): The target number of rows per block.
+
+    Returns:
+        np.ndarray: The stratum code bounds of the blocks, block b being 
+        strata bounds[b]:bounds[b + 1].
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if len(counts) == 0:
+        return np.zeros(1, dtype=np.int64)
+    block_ids = (np.cumsum(counts) - counts) // block_rows
+    starts = np.flatnonzero(np.diff(block_ids)) + 1
+    return np.concatenate(([0], starts, [len(counts)])).astype(np.int64)
+
+
+def draw_block(counts,
+               sample_sizes,
+               seed_sequence):
+    """
+    Draws sample_sizes[k] rows from every stratum k of a block in one 
+    vectorized pass. Each row gets a random key, rows are ordered by 
+    (stratum, key) and the first rows of every stratum are kept.
+
+    Args:
+        counts (np.ndarray): The number of rows of each stratum of the block.
+        sample_sizes (np.ndarray): The number of rows to draw from each stratum.
+        seed_sequence (np.random.SeedSequence): The stream of the block.
+
+    Returns:
+        np.ndarray: The offsets of the drawn rows from the first row of the 
+        block, sorted, hence grouped by stratum.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    sorted_codes = np.repeat(np.arange(len(counts)), counts)
+    random_keys = np.random.default_rng(seed_sequence).random(len(sorted_codes))
+    order = np.lexsort((random_keys, sorted_codes))
+    ranks = np.arange(len(order)) - (np.cumsum(counts) - counts)[sorted_codes]
+    keep = ranks < np.asarray(sample_sizes, dtype=np.int64)[sorted_codes]
+    return np.sort(order[keep])
+
+
+class StratumIndex:
+    """
+    A factorized index of the strata defined by the structure columns of a 
+    DataFrame. It is built once and can be shared (and pickled) by samplers 
+    and replacers, so the rows of a stratum are an O(1) slice instead of a 
+    full-table comparison.
+
+    Attributes:
+        structure_cols (list): The columns that define the strata.
+        keys (pd.DataFrame): One row per stratum with its structure values, 
+        in stratum code order (sorted like a groupby).
+        codes (np.ndarray): The int32 stratum code of each row, -1 for rows 
+        with missing structure values.
+        counts (np.ndarray): The number of rows in each stratum.
+        offsets (np.ndarray): CSR-style offsets into positions, the rows of 
+        stratum k being positions[offsets[k]:offsets[k + 1]].
+        positions (np.ndarray): The row positions grouped by stratum, in 
+        their original order within each stratum.
+        n_strata (int): The number of strata.
+    """
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 structure_cols: list):
+        """
+        Initializes the StratumIndex by factorizing the structure columns.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to index.
+            structure_cols (list): The columns that define the strata.
+        """
+        self.structure_cols = list(structure_cols)
+        grouped = df.groupby(self.structure_cols, sort=True)
+
+        self.keys = grouped.size().index.to_frame(index=False)
+        self.n_strata = len(self.keys)
+        self.codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int32)
+
+        self.counts = np.bincount(self.codes[self.codes >= 0],
+                                  minlength=self.n_strata).astype(np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)))
+
+        missing_rows = len(self.codes) - int(self.offsets[-1])
+        self.positions = np.argsort(self.codes,
+                                    kind='stable')[missing_rows:].astype(np.int64)
+        self._keys_index = None
+
+    def __len__(self):
+        return self.n_strata
+
+    def rows(self,
+             code: int):
+        """
+        Retrieves the row positions of one stratum.
+
+        Args:
+            code (int): The stratum code.
+
+        Returns:
+            np.ndarray: The row positions of the stratum.
+        """
+        return self.positions[self.offsets[code]:self.offsets[code + 1]]
+
+    def codes_for(self,
+                  df: pd.DataFrame):
+        """
+        Looks up the stratum code of every row of another DataFrame that has 
+        the same structure columns.
+
+        Args:
+            df (pd.DataFrame): The DataFrame whose rows are looked up.
+
+        Returns:
+            np.ndarray: The stratum code of each row, -1 for rows whose 
+            structure values are not in the index.
+        """
+        if self._keys_index is None:
+            self._keys_index = pd.MultiIndex.from_frame(self.keys)
+        lookup_index = pd.MultiIndex.from_frame(df[self.structure_cols])
+        return self._keys_index.get_indexer(lookup_index).astype(np.int32)
+
+    def sample_positions(self,
+                         sample_sizes,
+                         random_state=None,
+                         progress=None):
+        """
+        Draws sample_sizes[k] rows from every stratum k, block by block, 
+        each block of strata with its own child stream of the 'strata' 
+        stream. ParallelStratumSampler draws the same blocks with the same 
+        streams, so both return the same sample for a given seed.
+
+        Args:
+            sample_sizes (array-like): The number of rows to draw from each 
+            stratum, indexed by stratum code.
+            random_state (None, int, SeedSequence or Generator): The seed of 
+            the draw.
+            progress (Progress): Receives the strata and rows drawn after 
+            every block, None to not report.
+
+        Returns:
+            np.ndarray: The row positions of the sample, grouped by stratum 
+            and in their original order within each stratum.
+        """
+        sample_sizes = np.asarray(sample_sizes, dtype=np.int64)
+        bounds = stratum_blocks(self.counts)
+        seed_sequences = sd.spawn(random_state, 'strata', len(bounds) - 1)
+        drawn_offsets = []
+        for start, stop, seed_sequence in zip(bounds[:-1], bounds[1:], seed_sequences):
+            drawn_offsets.append(self.offsets[start] + draw_block(self.counts[start:stop],
+                                                                  sample_sizes[start:stop],
+                                                                  seed_sequence))
+            if progress is not None:
+                progress.update('strata', stop, self.n_strata)
+                progress.update('rows', self.offsets[stop], self.offsets[-1])
+        if drawn_offsets == []:
+            return np.empty(0, dtype=np.int64)
+        return self.positions[np.concatenate(drawn_offsets)]
+
+    def draw_unique(self,
+                    requested_codes,
+                    excluded=None,
+                    random_state=None):
+        """
+        Pops one random row from the stratum of every request, never handing 
+        out the same row twice. Each stratum is a randomly ordered pool and 
+        the r-th request for stratum k takes the r-th row of its pool, so 
+        all the requests are served in one vectorized pass.
+
+        Args:
+            requested_codes (array-like): The stratum code of each request, 
+            -1 for requests without a stratum.
+            excluded (np.ndarray): A boolean mask over the rows that must not 
+            be drawn, e.g. rows already handed out.
+            random_state (None, int, SeedSequence or Generator): The seed of 
+            the pools' order.
+
+        Returns:
+            np.ndarray: The row position drawn for each request, -1 when its 
+            stratum is missing or has no rows left.
+        """
+        requested_codes = np.asarray(requested_codes, dtype=np.int64)
+        sorted_codes = np.repeat(np.arange(self.n_strata), self.counts)
+        random_keys = sd.as_generator(random_state).random(len(self.positions))
+        order = np.lexsort((random_keys, sorted_codes))
+        pool_positions = self.positions[order]
+        pool_codes = sorted_codes
+
+        if excluded is not None:
+            available = ~excluded[pool_positions]
+            pool_positions = pool_positions[available]
+            pool_codes = pool_codes[available]
+
+        pool_counts = np.bincount(pool_codes, minlength=self.n_strata)
+        pool_offsets = np.cumsum(pool_counts) - pool_counts
+
+        drawn_positions = np.full(len(requested_codes), -1, dtype=np.int64)
+        has_stratum = requested_codes >= 0
+        codes = requested_codes[has_stratum]
+        ranks = group_ranks(codes)
+        served = ranks < pool_counts[codes]
+
+        drawn = np.full(len(codes), -1, dtype=np.int64)
+        drawn[served] = pool_positions[pool_offsets[codes[served]]
+                                       + ranks[served]]
+        drawn_positions[has_stratum] = drawn
+        return drawn_positions
+
+
+class StratumLattice:
+    """
+    The stratum indexes of every priority prefix of a list of structure 
+    columns (cols[:k], cols[:k - 1], ..., cols[:1]), built once so that a 
+    request without a match at one level is relaxed to the next one with an 
+    O(1) pool lookup instead of a new filter over the DataFrame.
+
+    Attributes:
+        structure_cols (list): The structure columns, by priority.
+        levels (list): The StratumIndex of each prefix, longest first.
+    """
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 structure_cols: list):
+        """
+        Initializes the StratumLattice by indexing every prefix of the 
+        structure columns.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to index.
+            structure_cols (list): The structure columns, by priority.
+        """
+        self.structure_cols = list(structure_cols)
+        self.levels = [StratumIndex(df, self.structure_cols[:prefix_length])
+                       for prefix_length in range(len(self.structure_cols), 0, -1)]
+
+    def draw_unique(self,
+                    requests_df: pd.DataFrame,
+                    row_count: int,
+                    random_state=None):
+        """
+        Pops one random row for every request, matching all the structure 
+        columns first and dropping the lowest priority column each time a 
+        request finds no row left. No row is handed out twice.
+
+        Args:
+            requests_df (pd.DataFrame): The rows to match, with the structure 
+            columns.
+            row_count (int): The number of rows of the indexed DataFrame.
+            random_state (None, int, SeedSequence or Generator): The seed of 
+            the draw, one generator being shared by all the levels.
+
+        Returns:
+            np.ndarray: The row position drawn for each request, -1 when not 
+            even the first structure column matches.
+        """
+        drawn_positions = np.full(len(requests_df), -1, dtype=np.int64)
+        used = np.zeros(row_count, dtype=bool)
+        rng = sd.as_generator(random_state)
+
+        for level_index in self.levels:
+            pending = np.flatnonzero(drawn_positions < 0)
+            if len(pending) == 0:
+                break
+            pending_codes = level_index.codes_for(requests_df.iloc[pending])
+            level_positions = level_index.draw_unique(pending_codes,
+                                                      excluded=used,
+                                                      random_state=rng)
+            matched = level_positions >= 0
+            drawn_positions[pending[matched]] = level_positions[matched]
+            used[level_positions[matched]] = True
+
+        return drawn_positions
@@ -0,0 +1,231 @@
+import pandas as pd
+import numpy as np
+from modules import StructuredSampler as ss
+from modules import IdentifierIndex as ii
+from modules import Seeding as sd
+
+
+class StreamingStructuredSampler:
+    """
+    A class used to sample a structured subset from a CSV file that does not 
+    fit in memory. The file is read in chunks twice: the first pass counts 
+    the strata and the second pass keeps a reservoir per stratum, so peak 
+    memory is bounded by the chunk size plus the sample size.
+
+    Attributes:
+        source (str or file-like): The path or buffer of the CSV file.
+        sample_size (int): The desired sample size.
+        identifier_col (str): The column the sample is sorted by, as the 
+        samples of StructuredSampler are.
+        structure_parameters (list): List of columns used to define the structure.
+        chunksize (int): The number of rows read per chunk.
+        random_state (int): The seed of the apportionment ties and of the 
+        reservoir keys.
+    """
+
+    def __init__(self,
+                 source,
+                 sample_size: int,
+                 identifier_col: str,
+                 structure_parameters: list,
+                 chunksize: int = 100000,
+                 random_state: int = None,
+                 encoding: str = 'UTF8'):
+        """
+        Initializes the StreamingStructuredSampler with the CSV source and 
+        sampling parameters.
+
+        Args:
+            source (str or file-like): The path or buffer of the CSV file. 
+            Buffers must be seekable since the file is read twice.
+            sample_size (int): The desired sample size.
+            identifier_col (str): The column the sample is sorted by. The 
+            sample keeps the file order when the column is missing.
+            structure_parameters (list): List of columns used to define the structure.
+            chunksize (int): The number of rows read per chunk.
+            random_state (int): The seed of the apportionment ties and of the 
+            reservoir keys. A fresh seed is drawn and recorded when None.
+            encoding (str): The encoding of the CSV file.
+        """
+        self.source = source
+        self.sample_size = sample_size
+        self.identifier_col = identifier_col
+        self.structure_parameters = list(structure_parameters)
+        self.chunksize = chunksize
+        self.random_state = random_state if random_state is not None else sd.new_seed()
+        self.encoding = encoding
+        self._cache = {}
+
+    def __read_chunks__(self,
+                        usecols: list = None):
+        """
+        Reads the CSV source in chunks. Structure parameters are read as 
+        strings so their values compare equal across chunks whatever dtype 
+        pandas infers for each chunk.
+
+        Args:
+            usecols (list): The columns to read. All of them when None.
+
+        Returns:
+            Iterator[pd.DataFrame]: The chunks of the CSV file.
+        """
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+        return pd.read_csv(self.source,
+                           usecols=usecols,
+                           chunksize=self.chunksize,
+                           encoding=self.encoding,
+                           dtype={col: str for col in self.structure_parameters})
+
+    def __restore_structure_dtypes__(self,
+                                     df: pd.DataFrame):
+        """
+        Converts the structure parameters read as strings back to numbers 
+        when all their values are numeric, as pd.read_csv would.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to convert.
+
+        Returns:
+            pd.DataFrame: The DataFrame with restored structure dtypes.
+        """
+        for col in self.structure_parameters:
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                pass
+        return df
+
+    def __stratum_counts__(self):
+        """
+        Counts the rows of every stratum in a first pass over the file.
+
+        Returns:
+            pd.Series: The number of rows by stratum, sorted by stratum.
+        """
+        if 'stratum_counts' not in self._cache:
+            stratum_counts = None
+            population_size = 0
+            for chunk in self.__read_chunks__(usecols=self.structure_parameters):
+                population_size += len(chunk)
+                chunk_counts = chunk.groupby(self.structure_parameters).size()
+                if stratum_counts is None:
+                    stratum_counts = chunk_counts
+                else:
+                    stratum_counts = stratum_counts.add(chunk_counts,
+                                                        fill_value=0)
+            self._cache['population_size'] = population_size
+            self._cache['stratum_counts'] = stratum_counts.astype(
+                np.int64).sort_index()
+        return self._cache['stratum_counts']
+
+    def __population_size__(self):
+        """
+        Retrieves the number of rows of the file, counted in the first pass.
+
+        Returns:
+            int: The number of rows of the file.
+        """
+        self.__stratum_counts__()
+        return self._cache['population_size']
+
+    def working_pivot_df(self):
+        """
+        Creates a pivot table with counts, weights, and sample sizes by 
+        structure parameters, the sample size being apportioned with the 
+        largest-remainder method so no correction pass is needed.
+
+        Returns:
+            pd.DataFrame: The pivot table with counts and calculated weights 
+            and sample sizes.
+        """
+        if 'working_pivot_df' not in self._cache:
+            population_size = self.__population_size__()
+            if self.sample_size > population_size:
+                raise ValueError(
+                    'The sample size is greater than the Dataframe size. Change it.')
+            working_pivot_df = self.__stratum_counts__().reset_index(name='Count')
+            self._cache['working_pivot_df'] = ss.weighted_pivot_df(
+                working_pivot_df,
+                population_size,
+                self.sample_size,
+                'largest_remainder',
+                self.random_state)
+        return self.__restore_structure_dtypes__(
+            self._cache['working_pivot_df'].copy())
+
+    def structured_sample(self):
+        """
+        Draws the structured sample in a second pass over the file. Every 
+        row gets a random key and each stratum keeps the rows with the 
+        smallest keys seen so far (a bottom-k reservoir, which gives the same 
+        uniform sample as Algorithm R and merges chunk by chunk). Rows whose 
+        key cannot enter a full reservoir are dropped before any copy.
+
+        Returns:
+            pd.DataFrame: The structured sample, indexed by the row position 
+            in the file and sorted by identifier_col.
+        """
+        self.working_pivot_df()
+        working_pivot_df = self._cache['working_pivot_df']
+        sample_sizes = working_pivot_df['Sample_size_by_weight'].to_numpy()
+        keys_index = pd.MultiIndex.from_frame(
+            working_pivot_df[self.structure_parameters])
+
+        thresholds = np.full(len(sample_sizes), np.inf)
+        reservoir_df = None
+        reservoir_keys = np.empty(0)
+        reservoir_codes = np.empty(0, dtype=np.int64)
+        rows_read = 0
+        rng = sd.substream(self.random_state, 'reservoir')
+
+        for chunk in self.__read_chunks__():
+            chunk.index = np.arange(rows_read, rows_read + len(chunk))
+            rows_read += len(chunk)
+
+            chunk_codes = keys_index.get_indexer(
+                pd.MultiIndex.from_frame(chunk[self.structure_parameters]))
+            chunk_keys = rng.random(len(chunk))
+            candidates = chunk_codes >= 0
+            candidates[candidates] = (chunk_keys[candidates]
+                                      < thresholds[chunk_codes[candidates]])
+            if not candidates.any():
+                continue
+
+            if reservoir_df is None:
+                reservoir_df = chunk.iloc[0:0]
+            merged_df = pd.concat([reservoir_df, chunk[candidates]])
+            merged_keys = np.concatenate([reservoir_keys,
+                                          chunk_keys[candidates]])
+            merged_codes = np.concatenate([reservoir_codes,
+                                           chunk_codes[candidates]])
+
+            order = np.lexsort((merged_keys, merged_codes))
+            sorted_codes = merged_codes[order]
+            stratum_counts = np.bincount(sorted_codes,
+                                         minlength=len(sample_sizes))
+            stratum_starts = np.cumsum(stratum_counts) - stratum_counts
+            ranks = np.arange(len(order)) - stratum_starts[sorted_codes]
+            keep = order[ranks < sample_sizes[sorted_codes]]
+
+            reservoir_df = merged_df.iloc[keep]
+            reservoir_keys = merged_keys[keep]
+            reservoir_codes = merged_codes[keep]
+
+            kept_counts = np.bincount(reservoir_codes,
+                                      minlength=len(sample_sizes))
+            thresholds = np.full(len(sample_sizes), np.inf)
+            full_strata = (kept_counts == sample_sizes) & (sample_sizes > 0)
+            max_keys = np.full(len(sample_sizes), -np.inf)
+            np.maximum.at(max_keys, reservoir_codes, reservoir_keys)
+            thresholds[full_strata] = max_keys[full_strata]
+            thresholds[sample_sizes == 0] = -np.inf
+
+        if reservoir_df is None:
+            if hasattr(self.source, 'seek'):
+                self.source.seek(0)
+            return pd.read_csv(self.source, nrows=0, encoding=self.encoding)
+        sample_df = self.__restore_structure_dtypes__(reservoir_df.copy())
+        if self.identifier_col in sample_df.columns:
+            return ii.IdentifierIndex.from_df(sample_df, self.identifier_col).sort(sample_df)
+        return sample_df.sort_index()
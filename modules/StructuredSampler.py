@@ -1,5 +1,91 @@
 import pandas as pd
 import numpy as np
+from modules import StratumIndex as si
+from modules import ParallelSampler as ps
+from modules import IdentifierIndex as ii
+from modules import Seeding as sd
+from modules import JobExecutor as jb
+from modules import Profiling as pf
+
+
+ALLOCATION_MODES = ('rounding', 'largest_remainder')
+
+
+def largest_remainder_allocation(counts,
+                                 sample_size: int,
+                                 random_state: int = None):
+    """
+    Apportions a sample size among strata with the largest-remainder 
+    (Hamilton) method. Every stratum first gets the floor of its quota and 
+    the leftover units go to the strata with the largest remainders, ties 
+    being broken by a random key from the 'allocation' stream of the seed.
+
+    Args:
+        counts (array-like): The number of rows in each stratum.
+        sample_size (int): The total sample size to apportion.
+        random_state (None, int, SeedSequence or Generator): The seed used 
+        to break ties between remainders.
+
+    Returns:
+        np.ndarray: The sample size of each stratum, summing to sample_size.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    population_size = counts.sum()
+    if population_size == 0:
+        return np.zeros(len(counts), dtype=np.int64)
+
+    scaled_counts = counts * int(sample_size)
+    allocation = scaled_counts // population_size
+    remainders = scaled_counts % population_size
+    leftover = int(sample_size) - int(allocation.sum())
+
+    if leftover > 0:
+        tie_breakers = sd.substream(random_state, 'allocation').random(len(counts))
+        order = np.lexsort((tie_breakers, -remainders))
+        allocation[order[:leftover]] += 1
+
+    return allocation
+
+
+def weighted_pivot_df(working_pivot_df: pd.DataFrame,
+                      population_size: int,
+                      sample_size: int,
+                      allocation: str = 'rounding',
+                      random_state: int = None):
+    """
+    Adds the weight and sample size columns to a pivot of stratum counts.
+
+    Args:
+        working_pivot_df (pd.DataFrame): The pivot with the structure 
+        parameters and a 'Count' column.
+        population_size (int): The number of rows of the population.
+        sample_size (int): The desired sample size.
+        allocation (str): Either 'rounding' or 'largest_remainder'.
+        random_state (int): The seed used to break apportionment ties.
+
+    Returns:
+        pd.DataFrame: The pivot table with counts and calculated weights 
+        and sample sizes.
+    """
+    for column in working_pivot_df.columns:
+        if column == 'Count':
+            weight_column_name = 'Weight(%)'
+            sample_size_col_name = 'Sample_size_by_weight'
+
+            working_pivot_df[weight_column_name] = np.round(
+                (working_pivot_df[column] / population_size) * 100, 4)
+
+            if allocation == 'largest_remainder':
+                working_pivot_df[sample_size_col_name] = largest_remainder_allocation(
+                    working_pivot_df[column].to_numpy(),
+                    sample_size,
+                    random_state)
+            else:
+                working_pivot_df[sample_size_col_name] = np.round(
+                    (working_pivot_df[column] / population_size
+                     ) * sample_size).astype(int)
+
+    return working_pivot_df
 
 
 class StructuredSampler:
@@ -11,13 +97,32 @@ class StructuredSampler:
         sample_size (int): The desired sample size.
         identifier_col (str): The column used for sorting the DataFrame.
         structure_parameters (list): List of columns used to define the structure.
+        allocation (str): How the sample size is split among strata, either 
+        'rounding' or 'largest_remainder'.
+        random_state (int): The seed of every random step: apportionment 
+        ties, stratum draws and size corrections each use their own stream.
+        n_jobs (int): The number of worker processes drawing the strata, 
+        None to draw them in this process.
+        identifier_index (IdentifierIndex): The index of the identifier column.
+        progress (jb.Progress): Receives the step being run and the strata 
+        drawn, None to not report.
+
+    Intermediate results (the pivot, the stratum index and the 
+    pre-structured draw) are computed once per instance and cached, so every 
+    method of one sampler works on the same draw. Use set_parameters() or 
+    invalidate_cache() when the parameters change.
     """
 
     def __init__(self,
                  df: pd.DataFrame,
                  sample_size: int,
                  identifier_col: str,
-                 structure_parameters: list):
+                 structure_parameters: list,
+                 allocation: str = 'rounding',
+                 random_state: int = None,
+                 n_jobs: int = None,
+                 identifier_index: ii.IdentifierIndex = None,
+                 progress: jb.Progress = None):
         """
         Initializes the StructuredSampler with the DataFrame and sampling parameters.
 
@@ -26,33 +131,161 @@ class StructuredSampler:
             sample_size (int): The desired sample size.
             identifier_col (str): The column used for sorting the DataFrame.
             structure_parameters (list): List of columns used to define the structure.
-        """
+            allocation (str): 'rounding' rounds each stratum's weighted size 
+            and corrects the difference afterwards, 'largest_remainder' 
+            apportions the exact sample size before any row is drawn.
+            random_state (int): The seed of every random step: apportionment 
+            ties, stratum draws and size corrections each use their own 
+            stream. A fresh seed is drawn and recorded when None.
+            n_jobs (int): The number of worker processes drawing the strata, 
+            -1 for all the cores. The sample only depends on random_state, 
+            not on n_jobs. None draws the strata in this process.
+            identifier_index (IdentifierIndex): The index of identifier_col 
+            built once for df, reused instead of sorting df again.
+            progress (jb.Progress): Receives the step being run and the 
+            strata drawn, e.g. from a JobExecutor job. Reporting raises 
+            jb.JobCancelled once the job is cancelled.
+        """
+        if allocation not in ALLOCATION_MODES:
+            raise ValueError(
+                f'allocation must be one of {ALLOCATION_MODES}, got {allocation!r}.')
+
         self.df_cols = df.columns.to_list()
+        self.identifier_col = identifier_col
         self.sample_size = sample_size
         self.structure_parameters = structure_parameters
-
-        if identifier_col in self.df_cols:
-            self.df = df.sort_values(identifier_col)
-        else:
-            self.df = df.sort_index()
+        self.allocation = allocation
+        self.random_state = random_state if random_state is not None else sd.new_seed()
+        self.n_jobs = n_jobs
+        self.progress = progress
+        self._cache = {}
+
+        with pf.stage('StructuredSampler.sort', rows=len(df)):
+            if identifier_col in self.df_cols:
+                if identifier_index is None:
+                    identifier_index = ii.IdentifierIndex.from_df(df,
+                                                                  identifier_col)
+                self.df = identifier_index.sort(df)
+            else:
+                self.df = df.sort_index()
+        self.identifier_index = identifier_index
 
         self.population_size = self.df.shape[0]
 
-        if self.sample_size > self.population_size:
+        warning_message = self.__parameters_warning__(self.sample_size,
+                                                      self.structure_parameters)
+        if warning_message is not None:
+            return print(warning_message)
+
+    def __parameters_warning__(self,
+                               sample_size: int,
+                               structure_parameters: list):
+        """
+        Checks a sample size and structure parameters against the DataFrame.
+
+        Args:
+            sample_size (int): The desired sample size.
+            structure_parameters (list): List of columns used to define the structure.
+
+        Returns:
+            str: The warning message of the first invalid parameter, or None 
+            when both are valid.
+        """
+        if sample_size > self.population_size:
             warning_message_size = '''
             The sample size is greater than the Dataframe size. Change it.
             '''
-            return print(warning_message_size)
+            return warning_message_size
 
-        available_cols = [col for col in self.df_cols if col != identifier_col]
+        available_cols = [col for col in self.df_cols if col != self.identifier_col]
 
-        if set(self.structure_parameters).issubset(available_cols) == False:
+        if set(structure_parameters).issubset(available_cols) == False:
             warning_message_parameters = '''
             Verify structure parameter(s).
             '''
-            return print(warning_message_parameters)
+            return warning_message_parameters
+        return None
+
+    def __cached__(self,
+                   key: str,
+                   compute):
+        """
+        Returns the cached result stored under key, computing it first if it 
+        is not cached yet.
+
+        Args:
+            key (str): The name of the intermediate result.
+            compute (callable): The function that computes the result.
+
+        Returns:
+            The cached result.
+        """
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def __stage__(self,
+                  name: str):
+        """
+        Reports the step being run, if a progress is attached.
+
+        Args:
+            name (str): The name of the step.
+        """
+        if self.progress is not None:
+            self.progress.stage(name)
+
+    def invalidate_cache(self,
+                         keys: list = None):
+        """
+        Drops cached intermediate results.
+
+        Args:
+            keys (list): The names of the results to drop. All of them are 
+            dropped when None.
+        """
+        if keys is None:
+            self._cache = {}
         else:
-            self.structure_parameters = self.structure_parameters
+            for key in keys:
+                self._cache.pop(key, None)
+
+    def set_parameters(self,
+                       sample_size: int = None,
+                       structure_parameters: list = None,
+                       allocation: str = None,
+                       random_state: int = None):
+        """
+        Updates the sampling parameters and invalidates the cached results 
+        that depend on them. Parameters left as None are kept. The values 
+        are checked like in __init__, and a ValueError is raised before 
+        anything changes when they are invalid.
+
+        Args:
+            sample_size (int): The desired sample size.
+            structure_parameters (list): List of columns used to define the structure.
+            allocation (str): Either 'rounding' or 'largest_remainder'.
+            random_state (int): The seed of every random step.
+        """
+        if allocation is not None and allocation not in ALLOCATION_MODES:
+            raise ValueError(
+                f'allocation must be one of {ALLOCATION_MODES}, got {allocation!r}.')
+        warning_message = self.__parameters_warning__(
+            sample_size if sample_size is not None else self.sample_size,
+            structure_parameters if structure_parameters is not None else self.structure_parameters)
+        if warning_message is not None:
+            raise ValueError(warning_message.strip())
+
+        if structure_parameters is not None:
+            self.structure_parameters = structure_parameters
+            self.invalidate_cache()
+        if sample_size is not None:
+            self.sample_size = sample_size
+        if allocation is not None:
+            self.allocation = allocation
+        if random_state is not None:
+            self.random_state = random_state
+        self.invalidate_cache(['working_pivot_df', 'prestructure_positions'])
 
     def working_pivot_df(self):
         """
@@ -63,50 +296,86 @@ class StructuredSampler:
             pd.DataFrame: The pivot table with counts and calculated weights 
             and sample sizes.
         """
-        working_pivot_df = self.df.groupby(
-            self.structure_parameters).size().reset_index(name='Count')
-        for column in working_pivot_df.columns:
-            if column == 'Count':
-                weight_column_name = f'Weight(%)'
-                sample_size_col_name = f'Sample_size_by_weight'
-
-                working_pivot_df[weight_column_name] = np.round(
-                    (working_pivot_df[column] / self.population_size) * 100, 4)
+        return self.__cached__('working_pivot_df',
+                               self.__compute_working_pivot_df__).copy()
 
-                working_pivot_df[sample_size_col_name] = np.round(
-                    (working_pivot_df[column] / self.population_size
-                     ) * self.sample_size).astype(int)
+    def __compute_working_pivot_df__(self):
+        """
+        Computes the pivot table returned by working_pivot_df.
 
-        return working_pivot_df
+        Returns:
+            pd.DataFrame: The pivot table with counts and calculated weights 
+            and sample sizes.
+        """
+        self.__stage__('pivot')
+        with pf.stage('StructuredSampler.pivot', rows=self.population_size) as stage:
+            working_pivot_df = self.df.groupby(
+                self.structure_parameters).size().reset_index(name='Count')
+            stage.count(strata=len(working_pivot_df))
+            return weighted_pivot_df(working_pivot_df,
+                                     self.population_size,
+                                     self.sample_size,
+                                     self.allocation,
+                                     self.random_state)
 
-    def prestructure_sampling_df(self):
+    def stratum_index(self):
         """
-        Creates the initial sample DataFrame before adjusting for the actual 
-        sample size difference.
+        Builds the factorized index of the structure parameters once per 
+        instance. Stratum codes follow the row order of working_pivot_df.
 
         Returns:
-            pd.DataFrame: The pre-structured sample DataFrame.
+            si.StratumIndex: The stratum index of the DataFrame.
         """
-        working_pivot_df = self.working_pivot_df()
-        prestructure_sampling_df = pd.DataFrame(columns=self.df_cols)
-        sub_df = self.df.copy()
-        for _, row in working_pivot_df.iterrows():
-            temporal_indices_list = []
-            temporal_sample_size = int(row['Sample_size_by_weight'])
+        return self.__cached__('stratum_index',
+                               self.__build_stratum_index__)
 
-            filtered_working_pivot_df = sub_df.loc[(
-                sub_df[self.structure_parameters] ==
-                row[self.structure_parameters]).all(axis=1)]
+    @pf.profiled('StructuredSampler.stratum_index')
+    def __build_stratum_index__(self):
+        return si.StratumIndex(self.df, self.structure_parameters)
 
-            incomplete_stucture_sample_rows = filtered_working_pivot_df.sample(
-                n=temporal_sample_size)
+    def __prestructure_positions__(self):
+        """
+        Draws the pre-structured sample once per instance.
 
-            prestructure_sampling_df = pd.concat(
-                [prestructure_sampling_df, incomplete_stucture_sample_rows])
+        Returns:
+            np.ndarray: The row positions of the pre-structured sample.
+        """
+        def compute_prestructure_positions():
+            sample_sizes = self.__cached__(
+                'working_pivot_df',
+                self.__compute_working_pivot_df__)['Sample_size_by_weight'].to_numpy()
+            self.__stage__('strata')
+            stratum_index = self.stratum_index()
+            with pf.stage('StructuredSampler.stratum_draw',
+                          rows=self.population_size,
+                          strata=len(stratum_index),
+                          n_jobs=self.n_jobs) as stage:
+                if self.n_jobs is not None:
+                    positions = ps.ParallelStratumSampler(stratum_index,
+                                                          sample_sizes,
+                                                          self.random_state,
+                                                          self.n_jobs,
+                                                          self.progress).sample_positions()
+                else:
+                    positions = stratum_index.sample_positions(sample_sizes,
+                                                               self.random_state,
+                                                               self.progress)
+                stage.count(sampled_rows=len(positions))
+            return positions
+
+        return self.__cached__('prestructure_positions',
+                               compute_prestructure_positions)
 
-            temporal_indices_list.extend(
-                incomplete_stucture_sample_rows.index.tolist())
+    def prestructure_sampling_df(self):
+        """
+        Creates the initial sample DataFrame before adjusting for the actual 
+        sample size difference.
 
+        Returns:
+            pd.DataFrame: The pre-structured sample DataFrame.
+        """
+        prestructure_sampling_df = self.df.iloc[
+            self.__prestructure_positions__()]
         return prestructure_sampling_df
 
     def original_without_prestructure(self):
@@ -117,24 +386,9 @@ class StructuredSampler:
             pd.DataFrame: The DataFrame excluding the pre-structured sample 
             rows.
         """
-        working_pivot_df = self.working_pivot_df()
-        sub_df = self.df.copy()
-        for _, row in working_pivot_df.iterrows():
-            temporal_indices_list = []
-            temporal_sample_size = int(row['Sample_size_by_weight'])
-
-            filtered_working_pivot_df = sub_df.loc[(
-                sub_df[self.structure_parameters] ==
-                row[self.structure_parameters]).all(axis=1)]
-
-            incomplete_stucture_sample_rows = filtered_working_pivot_df.sample(
-                n=temporal_sample_size)
-
-            temporal_indices_list.extend(
-                incomplete_stucture_sample_rows.index.tolist())
-
-            sub_df = sub_df.drop(temporal_indices_list)
-        original_without_prestructure = sub_df
+        keep_mask = np.ones(self.population_size, dtype=bool)
+        keep_mask[self.__prestructure_positions__()] = False
+        original_without_prestructure = self.df[keep_mask]
         return original_without_prestructure
 
     def actual_vs_sample_size_difference(self):
@@ -144,8 +398,7 @@ class StructuredSampler:
         Returns:
             int: The difference between the actual and desired sample size.
         """
-        prestructure_sampling_df = self.prestructure_sampling_df()
-        actual_vs_sample_size_difference = (prestructure_sampling_df.shape[0]
+        actual_vs_sample_size_difference = (len(self.__prestructure_positions__())
                                             - self.sample_size)
         return actual_vs_sample_size_difference
 
@@ -215,7 +468,8 @@ class StructuredSampler:
     def __get_ascending_filtered_working_pivot__(self,
                                                  working_pivot_df,
                                                  values_ascending_filter,
-                                                 actual_vs_sample_size_difference):
+                                                 actual_vs_sample_size_difference,
+                                                 random_state=None):
         """
         Filters the working pivot DataFrame based on the ascending filter 
         values.
@@ -226,6 +480,7 @@ class StructuredSampler:
             values.
             actual_vs_sample_size_difference (int): The difference between the 
             actual and desired sample size.
+            random_state (np.random.Generator): The generator of the draw.
 
         Returns:
             pd.DataFrame: The filtered working pivot DataFrame.
@@ -237,11 +492,13 @@ class StructuredSampler:
         if available_rows < needed_rows:
             return filtered_df
         else:
-            return filtered_df.sample(n=abs(actual_vs_sample_size_difference))
+            return filtered_df.sample(n=abs(actual_vs_sample_size_difference),
+                                      random_state=random_state)
 
     def __get_to_fill_ascending_working_pivot__(self,
                                                 ascending_filtered_working_pivot,
-                                                original_without_prestructure):
+                                                original_without_prestructure,
+                                                random_state=None):
         """
         Creates a DataFrame with rows to be added to the pre-structured sample 
         to achieve the desired sample size.
@@ -251,6 +508,7 @@ class StructuredSampler:
             working pivot DataFrame.
             original_without_prestructure (pd.DataFrame): The DataFrame 
             excluding the pre-structured sample rows.
+            random_state (np.random.Generator): The generator of the draw.
 
         Returns:
             pd.DataFrame: The DataFrame with rows to be added.
@@ -261,7 +519,7 @@ class StructuredSampler:
             temporal_fill = original_without_prestructure.loc[
                 (original_without_prestructure[self.structure_parameters]
                  == row[self.structure_parameters]).all(axis=1)
-            ].sample(n=1)
+            ].sample(n=1, random_state=random_state)
 
             to_fill_ascending_working_pivot = pd.concat(
                 [to_fill_ascending_working_pivot, temporal_fill])
@@ -281,6 +539,7 @@ class StructuredSampler:
         actual_vs_sample_size_difference = self.actual_vs_sample_size_difference()
         auxiliar_df_ascending = self.auxiliar_df_ascending()
         working_pivot_df = self.working_pivot_df()
+        rng = sd.substream(self.random_state, 'correction')
 
         sub_df_ascending_auxiliar = self.__get_sub_df_ascending_auxiliar__(
             auxiliar_df_ascending, actual_vs_sample_size_difference)
@@ -289,7 +548,7 @@ class StructuredSampler:
 
         try:
             ascending_filtered_working_pivot = self.__get_ascending_filtered_working_pivot__(
-                working_pivot_df, values_ascending_filter, actual_vs_sample_size_difference)
+                working_pivot_df, values_ascending_filter, actual_vs_sample_size_difference, rng)
             if len(ascending_filtered_working_pivot) < abs(actual_vs_sample_size_difference):
                 additional_needed = abs(
                     actual_vs_sample_size_difference) - len(ascending_filtered_working_pivot)
@@ -302,7 +561,7 @@ class StructuredSampler:
                     next_sizes
                 ])
             to_fill_ascending_working_pivot = self.__get_to_fill_ascending_working_pivot__(
-                ascending_filtered_working_pivot, original_without_prestructure)
+                ascending_filtered_working_pivot, original_without_prestructure, rng)
             return pd.concat([prestructure_sampling_df, to_fill_ascending_working_pivot])
 
         except ValueError as e:
@@ -346,7 +605,8 @@ class StructuredSampler:
     def __get_descending_filtered_working_pivot__(self,
                                                   working_pivot_df,
                                                   values_descending_filter,
-                                                  actual_vs_sample_size_difference):
+                                                  actual_vs_sample_size_difference,
+                                                  random_state=None):
         """
         Filters the working pivot DataFrame based on the descending filter 
         values.
@@ -357,6 +617,7 @@ class StructuredSampler:
             values.
             actual_vs_sample_size_difference (int): The difference between the 
             actual and desired sample size.
+            random_state (np.random.Generator): The generator of the draw.
 
         Returns:
             pd.DataFrame: The filtered working pivot DataFrame.
@@ -364,12 +625,14 @@ class StructuredSampler:
         descending_filtered_working_pivot = working_pivot_df[
             working_pivot_df['Sample_size_by_weight'].isin(
                 values_descending_filter)
-        ].sample(n=abs(actual_vs_sample_size_difference))
+        ].sample(n=abs(actual_vs_sample_size_difference),
+                 random_state=random_state)
         return descending_filtered_working_pivot
 
     def __get_to_remove_descending_working_pivot__(self,
                                                    descending_filtered_working_pivot,
-                                                   prestructure_sampling_df):
+                                                   prestructure_sampling_df,
+                                                   random_state=None):
         """
         Creates a DataFrame with rows to be removed from the pre-structured 
         sample to achieve the desired sample size.
@@ -379,6 +642,7 @@ class StructuredSampler:
             working pivot DataFrame.
             prestructure_sampling_df (pd.DataFrame): The pre-structured sample 
             DataFrame.
+            random_state (np.random.Generator): The generator of the draw.
 
         Returns:
             pd.DataFrame: The DataFrame with rows to be removed.
@@ -389,7 +653,7 @@ class StructuredSampler:
             temporal_remove = prestructure_sampling_df.loc[
                 (prestructure_sampling_df[self.structure_parameters]
                  == row[self.structure_parameters]).all(axis=1)
-            ].sample(n=1)
+            ].sample(n=1, random_state=random_state)
 
             to_remove_descending_working_pivot = pd.concat(
                 [to_remove_descending_working_pivot, temporal_remove])
@@ -400,7 +664,10 @@ class StructuredSampler:
                                           prestructure_sampling_df,
                                           to_remove_descending_working_pivot):
         """
-        Removes specified rows from the pre-structured sample.
+        Removes specified rows from the pre-structured sample. Rows are 
+        dropped by label when the labels are unique, which keeps the labels 
+        of the remaining rows pointing at the sampled DataFrame; otherwise 
+        the rows equal to a removed one are merged out.
 
         Args:
             prestructure_sampling_df (pd.DataFrame): The pre-structured sample 
@@ -411,15 +678,24 @@ class StructuredSampler:
         Returns:
             pd.DataFrame: The adjusted structured sample DataFrame.
         """
-        pre_merge_to_remove = pd.merge(
-            prestructure_sampling_df,
-            to_remove_descending_working_pivot,
-            how='left',
-            indicator=True)
-        structured_sampled_df = pre_merge_to_remove[pre_merge_to_remove['_merge'] ==
-                                                    'left_only'].drop(
-            columns='_merge')
-        return structured_sampled_df
+        with pf.stage('StructuredSampler.remove_rows',
+                      rows=len(prestructure_sampling_df),
+                      removed_rows=len(to_remove_descending_working_pivot)) as stage:
+            if prestructure_sampling_df.index.is_unique:
+                stage.count(method='drop')
+                return prestructure_sampling_df.drop(
+                    index=to_remove_descending_working_pivot.index)
+
+            stage.count(method='merge')
+            pre_merge_to_remove = pd.merge(
+                prestructure_sampling_df,
+                to_remove_descending_working_pivot,
+                how='left',
+                indicator=True)
+            structured_sampled_df = pre_merge_to_remove[pre_merge_to_remove['_merge'] ==
+                                                        'left_only'].drop(
+                columns='_merge')
+            return structured_sampled_df
 
     def __structured_sample_positive_difference__(self):
         """
@@ -433,20 +709,22 @@ class StructuredSampler:
         auxiliar_df_descending = self.auxiliar_df_descending()
         working_pivot_df = self.working_pivot_df()
         prestructure_sampling_df = self.prestructure_sampling_df()
+        rng = sd.substream(self.random_state, 'correction')
 
         sub_df_descending_auxiliar = self.__get_sub_df_descending_auxiliar__(
             auxiliar_df_descending, actual_vs_sample_size_difference)
         values_descending_filter = sub_df_descending_auxiliar['Sample_size_by_weight'].tolist(
         )
         descending_filtered_working_pivot = self.__get_descending_filtered_working_pivot__(
-            working_pivot_df, values_descending_filter, actual_vs_sample_size_difference)
+            working_pivot_df, values_descending_filter, actual_vs_sample_size_difference, rng)
         to_remove_descending_working_pivot = self.__get_to_remove_descending_working_pivot__(
-            descending_filtered_working_pivot, prestructure_sampling_df)
+            descending_filtered_working_pivot, prestructure_sampling_df, rng)
 
         structured_sampled_df = self.__remove_rows_from_prestructure__(
             prestructure_sampling_df, to_remove_descending_working_pivot)
         return structured_sampled_df
 
+    @pf.profiled('StructuredSampler.structured_sample')
     def structured_sample(self):
         """
         Generates the final structured sample DataFrame adjusted for the 
@@ -455,13 +733,21 @@ class StructuredSampler:
         Returns:
             pd.DataFrame: The final structured sample DataFrame.
         """
+        if self.allocation == 'largest_remainder':
+            return self.prestructure_sampling_df()
+
         actual_vs_sample_size_difference = self.actual_vs_sample_size_difference()
+        self.__stage__('correction')
 
         if actual_vs_sample_size_difference < 0:
-            return self.__structured_sample_negative_difference__()
+            with pf.stage('StructuredSampler.correction',
+                          difference=actual_vs_sample_size_difference):
+                return self.__structured_sample_negative_difference__()
 
         if actual_vs_sample_size_difference > 0:
-            return self.__structured_sample_positive_difference__()
+            with pf.stage('StructuredSampler.correction',
+                          difference=actual_vs_sample_size_difference):
+                return self.__structured_sample_positive_difference__()
 
         if actual_vs_sample_size_difference == 0:
             return self.prestructure_sampling_df()
@@ -0,0 +1,5 @@
+import sys
+from modules import CommandLine as cl
+
+
+sys.exit(cl.main())
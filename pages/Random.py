@@ -1,6 +1,11 @@
 import streamlit as st
-import pandas as pd
 from modules import CustomStreamlit as cst
+from modules import DataReader as rd
+from modules import DatasetRegistry as dr
+from modules import SampleResult as sr
+from modules import Seeding as sd
+
+registry = dr.DatasetRegistry(st.session_state)
 
 cst.Header('Random Sampler | App', 'images/NIQ_logo.png')
 
@@ -29,23 +34,37 @@ if selected == 'Sampling':
             st.write(
                 'Upload the CSV file that contains the working Dataframe:')
             uploaded_file = st.file_uploader("Choose a file",
-                                             type=['csv'],
+                                             type=rd.upload_types(),
                                              key='gral_settings_df'
                                              )
+            dataset = None
             if uploaded_file is not None:
 
-                df = pd.read_csv(uploaded_file, encoding='UTF8')
+                dataset_id, df = cst.read_upload(uploaded_file)
+                dataset = registry.register(rd.dataset_name(uploaded_file.name),
+                                            df,
+                                            dataset_id=dataset_id)
+
+            elif len(registry) > 0:
+                dataset_name = st.selectbox('Or pick a Dataframe already loaded in this session:',
+                                            [''] + registry.names(['source', 'sample', 'replaced']))
+                if dataset_name != '':
+                    dataset = registry.get(dataset_name)
+
+            if dataset is not None:
 
-                file_name_df = uploaded_file.name.replace('.csv', '')
+                df = dataset.df
+
+                file_name_df = dataset.name
 
                 st.write(df)
 
         st.markdown('')
 
-        if uploaded_file is None:
+        if dataset is None:
             cst.ColoredCaption('Please upload a Dataframe to continue.')
 
-        if uploaded_file is not None:
+        if dataset is not None:
             col_sample_size_left, col_sample_size, col_sample_size_right = st.columns(
                 [1, 5, 1], gap='medium')
 
@@ -58,19 +77,24 @@ if selected == 'Sampling':
             st.write('')
 
             with st.expander('Expand this section to show your **Randomly Sampled Dataframe**:'):
-                @st.cache_data
-                def cached_df(df, sample_size):
-                    cached_df = df.sample(frac=1).sample(n=sample_size)
-                    return cached_df
-
-                def second_cached_df(df, sample_size):
-                    second_cached_df = df.sample(frac=1).sample(n=sample_size)
-                    return second_cached_df
-
-                sampled_df = cached_df(df, n)
+                seed_key = f'random_seed_{dataset.dataset_id}'
+                if seed_key not in st.session_state:
+                    st.session_state[seed_key] = sd.new_seed()
                 if st.button(':inbox_tray: Press here to re-sample :inbox_tray:'):
-                    df = df.sample(frac=1)
-                    sampled_df = second_cached_df(df, n)
+                    st.session_state[seed_key] += 1
+
+                seed = st.session_state[seed_key]
+                result_cache = cst.cache_result_cache()
+                sample_key = result_cache.key(dataset.dataset_id, 'random_sample', {'sample_size': n}, seed)
+                sampled_df = result_cache.get_or_compute(
+                    sample_key,
+                    lambda: sr.SampleResult.random(df, n, seed).to_df())
+                registry.register(f'SAMPLED_{file_name_df}',
+                                  sampled_df,
+                                  kind='sample',
+                                  dataset_id=sample_key,
+                                  parents=[dataset.name],
+                                  params={'sample_size': n, 'seed': seed})
 
                 st.write(sampled_df)
                 sampled_df_csv = sampled_df.to_csv(index=False)
@@ -2,6 +2,12 @@ import streamlit as st
 import pandas as pd
 from modules import CustomStreamlit as cst
 from modules import ItemReplacer as ir
+from modules import DataReader as rd
+from modules import DatasetRegistry as dr
+from modules import Seeding as sd
+from modules import ResultCache as rc
+
+registry = dr.DatasetRegistry(st.session_state)
 
 cst.Header('Item Replacing | App', 'images/NIQ_logo.png')
 
@@ -15,65 +21,101 @@ if selected == 'Replacing':
 
     cst.Subheader('Item Replacing App', '')
 
+    def replace_items(replacer, progress=None):
+        replacer.progress = progress
+        return replacer.replacer()
+
     @st.cache_data
-    def cache_df(df):
-        df = df.copy()
-        cached_df = df
-        return cached_df
+    def cache_master_fingerprints(master_id, _master_df):
+        return ir.ItemReplacerCheck.fingerprint_set(_master_df)
 
-    def cache_df_2(df):
-        df_2 = df.copy()
-        cached_df_2 = df_2
-        return cached_df_2
+    @st.cache_resource
+    def cache_item_validator(master_id, working_id, identifier_col,
+                             _master_df, _working_df, _master_index, _working_index):
+        return ir.ItemValidator(_master_df, _working_df, identifier_col,
+                                _master_index, _working_index)
 
     st.write(
         'Please provide Dataframes such that the Master Dataframe contains the Working Dataframe.')
     st.write('')
     with st.expander('Upload the CSV file that contains the  **Master Dataframe**:'):
         master_uploaded_file = st.file_uploader("Choose a file",
-                                                type=['csv'],
+                                                type=rd.upload_types(),
                                                 key='master_df'
                                                 )
+        master_dataset = None
         if master_uploaded_file is not None:
-            master_df = pd.read_csv(master_uploaded_file, encoding='UTF8')
+            master_id, master_df = cst.read_upload(master_uploaded_file)
+            master_dataset = registry.register(rd.dataset_name(master_uploaded_file.name),
+                                               master_df,
+                                               dataset_id=master_id)
+
+        elif len(registry) > 0:
+            master_dataset_name = st.selectbox('Or pick a Dataframe already loaded in this session:',
+                                               [''] + registry.names(['source', 'replaced']),
+                                               key='master_dataset_name')
+            if master_dataset_name != '':
+                master_dataset = registry.get(master_dataset_name)
 
-            master_file_name_df = master_uploaded_file.name.replace('.csv', '')
+        if master_dataset is not None:
+            master_df = master_dataset.df
+
+            master_file_name_df = master_dataset.name
 
-            master_df = cache_df(master_df)
             st.write(master_df)
         st.caption('You can collapse this section if you want.')
     st.markdown('')
     with st.expander('Upload the CSV file that contains the  **Working Dataframe**:'):
         working_master_uploaded_file = st.file_uploader("Choose a file",
-                                                        type=['csv'],
+                                                        type=rd.upload_types(),
                                                         key='working_df'
                                                         )
+        working_dataset = None
         if working_master_uploaded_file is not None:
 
-            working_df = pd.read_csv(
-                working_master_uploaded_file, encoding='UTF8')
+            working_id, working_df = cst.read_upload(working_master_uploaded_file)
+            working_dataset = registry.register(rd.dataset_name(working_master_uploaded_file.name),
+                                                working_df,
+                                                dataset_id=working_id)
+
+        elif len(registry) > 0:
+            working_dataset_name = st.selectbox('Or pick a Dataframe already loaded in this session:',
+                                                [''] + registry.names(['sample', 'replaced', 'source']),
+                                                key='working_dataset_name')
+            if working_dataset_name != '':
+                working_dataset = registry.get(working_dataset_name)
 
-            working_file_name_df = working_master_uploaded_file.name.replace(
-                '.csv', '')
+        if working_dataset is not None:
+
+            working_df = working_dataset.df
+
+            working_file_name_df = working_dataset.name
 
-            working_df = cache_df_2(working_df)
             st.write(working_df)
         st.caption('You can collapse this section if you want.')
 
-    if master_uploaded_file is None and working_master_uploaded_file is None:
+    if master_dataset is None and working_dataset is None:
         st.write('')
         cst.ColoredCaption(
             'Please upload the Master Dataframe and the Working Dataframe.')
-    if master_uploaded_file is not None and working_master_uploaded_file is None:
+    if master_dataset is not None and working_dataset is None:
         st.write('')
         cst.ColoredCaption('Please upload the Working Dataframe.')
-    if master_uploaded_file is None and working_master_uploaded_file is not None:
+    if master_dataset is None and working_dataset is not None:
         st.write('')
         cst.ColoredCaption('Please upload the Master Dataframe.')
-    if master_uploaded_file is not None and working_master_uploaded_file is not None:
-        if not ir.ItemReplacerCheck(master_df, working_df).is_subdataframe():
+    if master_dataset is not None and working_dataset is not None:
+        master_fingerprints = cache_master_fingerprints(master_dataset.dataset_id,
+                                                        master_df)
+        subdataframe_check = ir.ItemReplacerCheck(master_df,
+                                                  working_df,
+                                                  master_fingerprints)
+        if not subdataframe_check.is_subdataframe():
             cst.WarningCaption(
                 'Your Working Dataframe is not a subdataframe of your Master Dataframe.')
+            if list(working_df.columns) == list(master_df.columns):
+                st.write('Rows of the Working Dataframe missing from the Master Dataframe:')
+                st.write(subdataframe_check.missing_rows())
 
         else:
             st.write('')
@@ -87,6 +129,22 @@ if selected == 'Replacing':
 
             if identifier_col_list != []:
                 identifier_col = identifier_col_list[0]
+                working_identifier_index = cst.cache_identifier_index(working_dataset.dataset_id,
+                                                                      identifier_col,
+                                                                      working_df)
+                item_validator = cache_item_validator(master_dataset.dataset_id,
+                                                      working_dataset.dataset_id,
+                                                      identifier_col,
+                                                      master_df,
+                                                      working_df,
+                                                      cst.cache_identifier_index(master_dataset.dataset_id,
+                                                                                 identifier_col,
+                                                                                 master_df),
+                                                      working_identifier_index)
+                seed_key = f'replacement_seed_{working_dataset.dataset_id}'
+                if seed_key not in st.session_state:
+                    st.session_state[seed_key] = sd.new_seed()
+                replacement_datasets = (working_dataset.dataset_id, master_dataset.dataset_id)
 
                 with replacement_option:
 
@@ -112,13 +170,16 @@ if selected == 'Replacing':
 
                 if remove_mode_answer == 'Upload a Dataframe that contains the items you want to remove.':
                     removing_items_file = st.file_uploader('Choose a file containing the selected identifier column and the items you want to replace:',
-                                                           type=['csv'],
+                                                           type=rd.upload_types(),
                                                            key='removing_items_df'
                                                            )
                     if removing_items_file is not None:
 
-                        removing_items_df = pd.read_csv(
-                            removing_items_file, encoding='UTF8')
+                        try:
+                            removing_items_df = rd.reader_for(
+                                removing_items_file).read()
+                        except (ValueError, ImportError) as error:
+                            st.error(str(error))
 
                         if identifier_col in removing_items_df.columns:
 
@@ -133,15 +194,31 @@ if selected == 'Replacing':
                         'You must verify that the file you uploaded contains the same identifier column.')
 
                 if replacement_mode == 'Direct replacement' and identifier_col in removing_items_df.columns:
-                    replacing_condition = ir.DirectItemReplacer(master_df,
-                                                                working_df,
-                                                                identifier_col,
-                                                                items_to_replace).check_items_in_working_df()
-                    if replacing_condition == True:
-                        replaced_df = ir.DirectItemReplacer(master_df,
+                    direct_replacer = ir.DirectItemReplacer(master_df,
                                                             working_df,
                                                             identifier_col,
-                                                            items_to_replace).replacer()
+                                                            items_to_replace,
+                                                            item_validator,
+                                                            working_identifier_index,
+                                                            st.session_state[seed_key])
+                    items_check = direct_replacer.validate_items()
+                    if items_check['valid'] == True:
+                        replacement_key = rc.ResultCache.key(replacement_datasets,
+                                                             'direct_replacement',
+                                                             {'identifier_col': identifier_col,
+                                                              'items_to_replace': list(items_to_replace)},
+                                                             st.session_state[seed_key])
+                        replaced_df = cst.run_cached_job(
+                            replacement_key,
+                            replace_items,
+                            direct_replacer)
+                        registry.register(f'REPLACED_ITEMS_{working_file_name_df}',
+                                          replaced_df,
+                                          kind='replaced',
+                                          dataset_id=replacement_key,
+                                          parents=[working_dataset.name, master_dataset.name],
+                                          params={'identifier_col': identifier_col,
+                                                  'items_to_replace': list(items_to_replace)})
 
                         st.write('Working Dataframe with replaced items:')
 
@@ -167,6 +244,8 @@ if selected == 'Replacing':
                     else:
                         cst.WarningCaption(
                             'You must verify that your selected items are in you working Dataframe.')
+                        st.write(
+                            f'Items missing from the Working Dataframe: {items_check["missing_from_working"]}')
 
                 if replacement_mode == 'Structured replacement' and identifier_col in removing_items_df.columns:
                     st.write('')
@@ -186,17 +265,34 @@ if selected == 'Replacing':
 
                     else:
 
-                        replacing_condition = ir.StructuredItemReplacer(master_df,
+                        structured_replacer = ir.StructuredItemReplacer(master_df,
                                                                         working_df,
                                                                         identifier_col,
                                                                         items_to_replace,
-                                                                        structure_col_list).check_items_in_working_df()
-                        if replacing_condition == True:
-                            replaced_df = ir.StructuredItemReplacer(master_df,
-                                                                    working_df,
-                                                                    identifier_col,
-                                                                    items_to_replace,
-                                                                    structure_col_list).replacer()
+                                                                        structure_col_list,
+                                                                        item_validator,
+                                                                        working_identifier_index,
+                                                                        st.session_state[seed_key])
+                        items_check = structured_replacer.validate_items()
+                        if items_check['valid'] == True:
+                            replacement_key = rc.ResultCache.key(replacement_datasets,
+                                                                 'structured_replacement',
+                                                                 {'identifier_col': identifier_col,
+                                                                  'items_to_replace': list(items_to_replace),
+                                                                  'structure_cols': structure_col_list},
+                                                                 st.session_state[seed_key])
+                            replaced_df = cst.run_cached_job(
+                                replacement_key,
+                                replace_items,
+                                structured_replacer)
+                            registry.register(f'REPLACED_ITEMS_{working_file_name_df}',
+                                              replaced_df,
+                                              kind='replaced',
+                                              dataset_id=replacement_key,
+                                              parents=[working_dataset.name, master_dataset.name],
+                                              params={'identifier_col': identifier_col,
+                                                      'items_to_replace': list(items_to_replace),
+                                                      'structure_cols': structure_col_list})
 
                             st.write('Working Dataframe with replaced items:')
 
@@ -222,6 +318,8 @@ if selected == 'Replacing':
                         else:
                             cst.WarningCaption(
                                 'You must verify that your selected items are in you working Dataframe.')
+                            st.write(
+                                f'Items missing from the Working Dataframe: {items_check["missing_from_working"]}')
 
 
 if selected == 'Home':
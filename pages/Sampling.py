@@ -1,9 +1,14 @@
 import streamlit as st
-import pandas as pd
 from modules import CustomStreamlit as cst
 from modules import SampleSizeCalculator as ssc
 from modules import RandomSampler as rs
-from modules import StructuredSampler as ss
+from modules import Seeding as sd
+from modules import ProjectedSampler as prs
+from modules import DataReader as rd
+from modules import DatasetRegistry as dr
+from modules import ResultCache as rc
+
+registry = dr.DatasetRegistry(st.session_state)
 
 cst.Header('Sample Size Calculator | App', 'images/NIQ_logo.png')
 
@@ -40,13 +45,16 @@ if selected == 'Sampling':
             st.write(
                 'Upload the CSV file that contains the working Dataframe:')
             uploaded_file = st.file_uploader("Choose a file",
-                                             type=['csv'],
+                                             type=rd.upload_types(),
                                              key='gral_settings_df'
                                              )
             if uploaded_file is not None:
-                df = pd.read_csv(uploaded_file, encoding='UTF8')
+                dataset_id, df = cst.read_upload(uploaded_file)
 
-                file_name_df = uploaded_file.name.replace('.csv', '')
+                file_name_df = rd.dataset_name(uploaded_file.name)
+                registry.register(file_name_df,
+                                  df,
+                                  dataset_id=dataset_id)
 
                 st.write(df)
 
@@ -60,20 +68,17 @@ if selected == 'Sampling':
         col_conf_lev, col_z_score = st.columns(2, gap='medium')
 
         with col_conf_lev:
-            st.write('Select the **confidence level** (%):')
-            conf_lev = st.selectbox(
-                r'',
-                ('99', '98', '95', '90', '85', '80'))
+            st.write('Type the **confidence level** (%):')
+            conf_lev = st.number_input(r'',
+                                       min_value=0.01,
+                                       max_value=99.99,
+                                       value=99.0,
+                                       step=0.5,
+                                       format='%.2f')
 
         with col_z_score:
-            z_score_dict = {99: 2.576,
-                            98: 2.326,
-                            95: 1.96,
-                            90: 1.645,
-                            85: 1.44,
-                            80: 1.282}
             st.write(r'Then, the **Z-score value**, $Z$, is:')
-            z_s = str(z_score_dict[int(conf_lev)])
+            z_s = str(round(ssc.z_score(conf_lev), 4))
             z_box = st.selectbox(r'',
                                  (f'{z_s}', '0'), disabled=True)
 
@@ -127,28 +132,33 @@ if selected == 'Sampling':
                                      'Yes, with a stratified (structured) method.'))
 
                 if samp_ans == 'Yes, with a non-stratified (random) method.':
-                    @st.cache_data
-                    def cached_df(df, p, conf_lev, s_e):
-                        cached_df = rs.RandomSampler(df=df,
-                                                     sample_portion=p,
-                                                     confidence_level=conf_lev,
-                                                     standard_error=s_e).sampled_df()
-                        return cached_df
-
-                    def second_cached_df(df, p, conf_lev, s_e):
-                        second_cached_df = rs.RandomSampler(df=df,
-                                                            sample_portion=p,
-                                                            confidence_level=conf_lev,
-                                                            standard_error=s_e).sampled_df()
-                        return second_cached_df
-
-                    sampled_df = cached_df(df, p=p, conf_lev=conf_lev, s_e=s_e)
+                    seed_key = f'random_seed_{dataset_id}'
+                    if seed_key not in st.session_state:
+                        st.session_state[seed_key] = sd.new_seed()
                     if st.button(':inbox_tray: Press here to re-sample :inbox_tray:'):
-                        df = df.sample(frac=1)
-                        sampled_df = second_cached_df(df,
-                                                      p=p,
-                                                      conf_lev=conf_lev,
-                                                      s_e=s_e)
+                        st.session_state[seed_key] += 1
+
+                    random_params = {'sample_portion': p,
+                                     'confidence_level': conf_lev,
+                                     'standard_error': s_e}
+                    result_cache = cst.cache_result_cache()
+                    sample_key = result_cache.key(dataset_id,
+                                                  'random_sample',
+                                                  random_params,
+                                                  st.session_state[seed_key])
+                    sampled_df = result_cache.get_or_compute(
+                        sample_key,
+                        lambda: rs.RandomSampler(df=df,
+                                                 random_state=st.session_state[seed_key],
+                                                 **random_params).sampled_df())
+                    registry.register(f'SAMPLED_{file_name_df}',
+                                      sampled_df,
+                                      kind='sample',
+                                      dataset_id=sample_key,
+                                      parents=[file_name_df],
+                                      params=dict(random_params,
+                                                  sample_size=n,
+                                                  seed=st.session_state[seed_key]))
 
                     st.write(sampled_df)
                     sampled_df_csv = sampled_df.to_csv(index=False)
@@ -205,14 +215,49 @@ if selected == 'Sampling':
                         with structured_warning:
                             cst.ColoredCaption(
                                 'You must be aware that in order to preserve the structure the most close value to the calculated sample size will be chosen.')
-                        structured_pivot_df = ss.StructuredSampler(df,
-                                                                   n,
-                                                                   identifier_col,
-                                                                   structure_parameters_list).working_pivot_df()
-                        structured_df = ss.StructuredSampler(df,
-                                                             n,
-                                                             identifier_col,
-                                                             structure_parameters_list).structured_sample()
+                        seed_key = f'structured_seed_{dataset_id}'
+                        if seed_key not in st.session_state:
+                            st.session_state[seed_key] = sd.new_seed()
+                        seed = st.session_state[seed_key]
+                        structure_params = {'sample_size': n,
+                                            'identifier_col': identifier_col,
+                                            'structure_parameters': structure_parameters_list,
+                                            'seed': seed}
+                        identifier_index = None
+                        if identifier_col in df_cols:
+                            identifier_index = cst.cache_identifier_index(dataset_id,
+                                                                          identifier_col,
+                                                                          df)
+
+                        def structured_sample(progress=None):
+                            structured_sampler = prs.ProjectedStructuredSampler(rd.DataFrameReader(df),
+                                                                                n,
+                                                                                identifier_col,
+                                                                                structure_parameters_list,
+                                                                                identifier_index=identifier_index,
+                                                                                random_state=seed,
+                                                                                progress=progress)
+                            return structured_sampler.working_pivot_df(), structured_sampler.structured_sample()
+
+                        structured_key = rc.ResultCache.key(dataset_id,
+                                                            'structured_sample',
+                                                            structure_params,
+                                                            seed)
+                        structured_pivot_df, structured_df = cst.run_cached_job(
+                            structured_key,
+                            structured_sample)
+                        registry.register(f'PIVOT_STRUCTURE_{file_name_df}',
+                                          structured_pivot_df,
+                                          kind='pivot',
+                                          dataset_id=structured_key,
+                                          parents=[file_name_df],
+                                          params=structure_params)
+                        registry.register(f'STRUCTURED_SAMPLE_{file_name_df}',
+                                          structured_df,
+                                          kind='sample',
+                                          dataset_id=structured_key,
+                                          parents=[file_name_df],
+                                          params=structure_params)
                         st.write(
                             f'Total structure-preserving sample size: **{structured_df.shape[0]}**')
                         st.write(
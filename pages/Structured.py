@@ -1,7 +1,12 @@
 import streamlit as st
-import pandas as pd
 from modules import CustomStreamlit as cst
-from modules import StructuredSampler as ss
+from modules import ProjectedSampler as prs
+from modules import DataReader as rd
+from modules import DatasetRegistry as dr
+from modules import Seeding as sd
+from modules import ResultCache as rc
+
+registry = dr.DatasetRegistry(st.session_state)
 
 cst.Header('Structured Sampler | App', 'images/NIQ_logo.png')
 
@@ -32,23 +37,37 @@ if selected == 'Sampling':
             st.write(
                 'Upload the CSV file that contains the working Dataframe:')
             uploaded_file = st.file_uploader("Choose a file",
-                                             type=['csv'],
+                                             type=rd.upload_types(),
                                              key='gral_settings_df'
                                              )
+            dataset = None
             if uploaded_file is not None:
 
-                df = pd.read_csv(uploaded_file, encoding='UTF8')
+                dataset_id, df = cst.read_upload(uploaded_file)
+                dataset = registry.register(rd.dataset_name(uploaded_file.name),
+                                            df,
+                                            dataset_id=dataset_id)
+
+            elif len(registry) > 0:
+                dataset_name = st.selectbox('Or pick a Dataframe already loaded in this session:',
+                                            [''] + registry.names(['source', 'sample', 'replaced']))
+                if dataset_name != '':
+                    dataset = registry.get(dataset_name)
+
+            if dataset is not None:
+
+                df = dataset.df
 
-                file_name_df = uploaded_file.name.replace('.csv', '')
+                file_name_df = dataset.name
 
                 st.write(df)
 
         st.markdown('')
 
-        if uploaded_file is None:
+        if dataset is None:
             cst.ColoredCaption('Please upload a Dataframe to continue.')
 
-        if uploaded_file is not None:
+        if dataset is not None:
             col_sample_size_left, col_sample_size, col_sample_size_right = st.columns(
                 [1, 5, 1], gap='medium')
 
@@ -90,14 +109,49 @@ if selected == 'Sampling':
                     l_warning, structured_warning, r_warning = st.columns([1, 5, 1], gap='small')
                     with structured_warning:
                         cst.ColoredCaption('You must be aware that in order to preserve the structure the most close value to the calculated sample size will be chosen.') 
-                    structured_pivot_df = ss.StructuredSampler(df,
-                                                               n,
-                                                               identifier_col,
-                                                               structure_parameters_list).working_pivot_df()
-                    structured_df = ss.StructuredSampler(df,
-                                                         n,
-                                                         identifier_col,
-                                                         structure_parameters_list).structured_sample()
+                    seed_key = f'structured_seed_{dataset.dataset_id}'
+                    if seed_key not in st.session_state:
+                        st.session_state[seed_key] = sd.new_seed()
+                    seed = st.session_state[seed_key]
+                    structure_params = {'sample_size': n,
+                                        'identifier_col': identifier_col,
+                                        'structure_parameters': structure_parameters_list,
+                                        'seed': seed}
+                    identifier_index = None
+                    if identifier_col in df_cols:
+                        identifier_index = cst.cache_identifier_index(dataset.dataset_id,
+                                                                      identifier_col,
+                                                                      df)
+
+                    def structured_sample(progress=None):
+                        structured_sampler = prs.ProjectedStructuredSampler(rd.DataFrameReader(df),
+                                                                            n,
+                                                                            identifier_col,
+                                                                            structure_parameters_list,
+                                                                            identifier_index=identifier_index,
+                                                                            random_state=seed,
+                                                                            progress=progress)
+                        return structured_sampler.working_pivot_df(), structured_sampler.structured_sample()
+
+                    structured_key = rc.ResultCache.key(dataset.dataset_id,
+                                                        'structured_sample',
+                                                        structure_params,
+                                                        seed)
+                    structured_pivot_df, structured_df = cst.run_cached_job(
+                        structured_key,
+                        structured_sample)
+                    registry.register(f'PIVOT_STRUCTURE_{file_name_df}',
+                                      structured_pivot_df,
+                                      kind='pivot',
+                                      dataset_id=structured_key,
+                                      parents=[dataset.name],
+                                      params=structure_params)
+                    registry.register(f'STRUCTURED_SAMPLE_{file_name_df}',
+                                      structured_df,
+                                      kind='sample',
+                                      dataset_id=structured_key,
+                                      parents=[dataset.name],
+                                      params=structure_params)
                     st.write(f'Total structure-preserving sample size: **{structured_df.shape[0]}**')
                     st.write(
                         'Weighted pivot given the selected structure:')
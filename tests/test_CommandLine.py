@@ -0,0 +1,131 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from modules import CommandLine as cl
+from modules import Profiling as pf
+
+
+@pytest.fixture(autouse=True)
+def no_profiling_sinks(monkeypatch):
+    monkeypatch.setattr(pf, 'SINKS', [])
+    yield
+    for sink in pf.SINKS:
+        sink.close()
+
+
+@pytest.fixture
+def panel(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'Item_ID': np.arange(600),
+                       'Region': rng.integers(0, 4, 600),
+                       'Value': rng.random(600)})
+    path = tmp_path / 'panel.csv'
+    df.to_csv(path, index=False)
+    return df, str(path)
+
+
+def run(capsys, argv):
+    exit_code = cl.main(argv)
+    outcomes = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return exit_code, outcomes
+
+
+def test_size_counts_the_population_of_a_file(capsys, panel):
+    df, path = panel
+    exit_code, (outcome,) = run(capsys, ['size', '--input', path])
+
+    assert exit_code == 0
+    assert outcome['status'] == 'done'
+    assert outcome['population_size'] == len(df)
+    assert 0 < outcome['sample_size'] <= len(df)
+
+
+def test_random_writes_the_sample(capsys, panel, tmp_path):
+    df, path = panel
+    output = str(tmp_path / 'random.csv')
+    exit_code, (outcome,) = run(capsys, ['random', '--input', path, '--output', output,
+                                         '--size', '50', '--seed', '7'])
+    sample = pd.read_csv(output)
+
+    assert exit_code == 0
+    assert outcome == dict(outcome, status='done', output=output, rows=50, seed=7)
+    assert len(sample) == 50 and sample['Item_ID'].is_unique
+    assert sample['Item_ID'].isin(df['Item_ID']).all()
+
+
+def test_structured_writes_the_sample_and_its_pivot(capsys, panel, tmp_path):
+    df, path = panel
+    output = str(tmp_path / 'structured.csv')
+    pivot_output = str(tmp_path / 'pivot.csv')
+    exit_code, (outcome,) = run(capsys, ['structured', '--input', path, '--output', output,
+                                         '--structure', 'Region', '--identifier', 'Item_ID',
+                                         '--size', '60', '--allocation', 'largest_remainder',
+                                         '--pivot-output', pivot_output, '--seed', '3'])
+    sample = pd.read_csv(output)
+    pivot = pd.read_csv(pivot_output)
+
+    assert exit_code == 0
+    assert outcome['status'] == 'done' and outcome['rows'] == len(sample) == 60
+    assert sample['Item_ID'].is_unique
+    drawn = sample['Region'].value_counts()
+    assert drawn.to_dict() == pivot.set_index('Region')['Sample_size_by_weight'].to_dict()
+
+
+def test_replace_counts_the_replaced_rows(capsys, panel, tmp_path):
+    df, path = panel
+    working = str(tmp_path / 'working.csv')
+    output = str(tmp_path / 'replaced.csv')
+    df.iloc[:100].to_csv(working, index=False)
+    exit_code, (outcome,) = run(capsys, ['replace', '--master', path, '--working', working,
+                                         '--output', output, '--identifier', 'Item_ID',
+                                         '--items', '3', '5', '5', '--seed', '1'])
+    replaced = pd.read_csv(output)
+
+    assert exit_code == 0
+    assert outcome['status'] == 'done'
+    assert outcome['replaced'] == 2
+    assert outcome['rows'] == len(replaced) == 100
+    assert not replaced['Item_ID'].isin([3, 5]).any()
+    assert replaced['Item_ID'].is_unique
+
+
+def test_failed_command_is_reported(capsys, tmp_path):
+    exit_code, (outcome,) = run(capsys, ['random', '--input', str(tmp_path / 'missing.txt'),
+                                         '--output', str(tmp_path / 'out.csv')])
+
+    assert exit_code == 1
+    assert outcome['status'] == 'failed'
+    assert outcome['error'].startswith('ValueError')
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_batch_runs_every_job_in_spec_order(capsys, panel, tmp_path, workers):
+    df, path = panel
+    outputs = [str(tmp_path / f'sample_{index}.csv') for index in range(3)]
+    jobs = [{'command': 'random', 'input': path, 'output': outputs[0], 'size': 20, 'seed': 1},
+            {'command': 'structured', 'input': path, 'output': outputs[1],
+             'structure': ['Region'], 'identifier': 'Item_ID', 'size': 40, 'seed': 2},
+            {'command': 'random', 'input': path, 'output': outputs[2], 'size': 30, 'seed': 3}]
+    spec = tmp_path / 'spec.json'
+    spec.write_text(json.dumps({'jobs': jobs}), encoding='UTF8')
+    exit_code, outcomes = run(capsys, ['batch', str(spec), '--workers', str(workers)])
+
+    assert exit_code == 0
+    assert [outcome['job'] for outcome in outcomes] == [0, 1, 2]
+    assert [outcome['command'] for outcome in outcomes] == ['random', 'structured', 'random']
+    assert [outcome['rows'] for outcome in outcomes] == [20, 40, 30]
+    assert [len(pd.read_csv(output)) for output in outputs] == [20, 40, 30]
+
+
+def test_profile_appends_the_stages_of_the_run(capsys, panel, tmp_path):
+    df, path = panel
+    profile = tmp_path / 'profile.jsonl'
+    exit_code, (outcome,) = run(capsys, ['--profile', str(profile), 'structured',
+                                         '--input', path, '--output', str(tmp_path / 'out.csv'),
+                                         '--structure', 'Region', '--size', '60', '--seed', '3'])
+    events = [json.loads(line) for line in profile.read_text(encoding='UTF8').splitlines()]
+
+    assert exit_code == 0 and outcome['status'] == 'done'
+    assert 'StructuredSampler.structured_sample' in {event['stage'] for event in events}
+    assert all(event['seconds'] >= 0 for event in events)
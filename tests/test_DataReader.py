@@ -0,0 +1,34 @@
+import pandas as pd
+import pytest
+from modules import DataReader as rd
+
+
+def test_base_reader_is_abstract():
+    with pytest.raises(TypeError):
+        rd.DataReader('panel.csv')
+
+
+@pytest.mark.parametrize('name', ['panel.gz', 'panel.zst', 'panel.txt'])
+def test_only_csv_archives_are_read_as_csv(name):
+    assert rd.matching_suffix(name) is None
+    with pytest.raises(ValueError):
+        rd.reader_for(name)
+
+
+def test_gzipped_csv_reads_columns_and_positions(tmp_path):
+    df = pd.DataFrame({'Item_ID': range(10), 'Value': range(0, 100, 10)})
+    path = tmp_path / 'panel.csv.gz'
+    df.to_csv(path, index=False)
+    reader = rd.reader_for(str(path))
+    assert isinstance(reader, rd.CsvReader)
+    assert reader.columns() == ['Item_ID', 'Value']
+    assert reader.read(['Value', 'Item_ID']).equals(df[['Value', 'Item_ID']])
+    assert reader.read_positions([7, 2]).equals(df.iloc[[7, 2]])
+
+
+def test_upload_types_only_list_readers_that_can_run(monkeypatch):
+    assert {'csv', 'gz', 'zst'} <= set(rd.upload_types())
+    monkeypatch.setattr(rd.ParquetReader, 'available', False)
+    monkeypatch.setattr(rd.FeatherReader, 'available', False)
+    assert not {'parquet', 'pq', 'feather', 'arrow', 'ipc'} & set(rd.upload_types())
+
@@ -0,0 +1,27 @@
+import pandas as pd
+from modules import DatasetRegistry as dr
+
+
+def test_fingerprint_depends_on_row_and_column_order():
+    df = pd.DataFrame({'Item_ID': [1, 2, 3], 'Value': [10, 20, 30]})
+    fingerprint = dr.DatasetRegistry.fingerprint(df)
+    assert fingerprint == dr.DatasetRegistry.fingerprint(df.copy())
+    assert fingerprint != dr.DatasetRegistry.fingerprint(
+        df.iloc[[1, 0, 2]].reset_index(drop=True))
+    assert fingerprint != dr.DatasetRegistry.fingerprint(df[['Value', 'Item_ID']])
+    assert fingerprint != dr.DatasetRegistry.fingerprint(df.iloc[::-1])
+
+
+def test_registering_with_an_id_skips_hashing(monkeypatch):
+    registry = dr.DatasetRegistry()
+    df = pd.DataFrame({'Item_ID': [1, 2, 3]})
+
+    def fail_fingerprint(df):
+        raise AssertionError('the DataFrame was hashed')
+
+    monkeypatch.setattr(dr.DatasetRegistry, 'fingerprint', staticmethod(fail_fingerprint))
+    first = registry.register('SAMPLED_panel', df, kind='sample', dataset_id='key-1')
+    assert registry.register('SAMPLED_panel', df.copy(), kind='sample',
+                             dataset_id='key-1') is first
+    assert registry.register('SAMPLED_panel', df, kind='sample',
+                             dataset_id='key-2') is not first
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from modules import IdentifierIndex as ii
+
+
+def test_lookups_match_pandas_on_duplicated_identifiers():
+    identifiers = pd.Series([7, 3, 9, 3, 1, 7, 7])
+    index = ii.IdentifierIndex(identifiers)
+    assert index.sortable and index.has_duplicates
+    assert list(index.duplicated_ids()) == [3, 7]
+    assert list(index.contains([1, 2, 7])) == [True, False, True]
+    assert list(index.positions_of([7, 3, 4])) == [0, 1, -1]
+    assert list(index.rows_of([7, 1])) == \
+        list(np.flatnonzero(identifiers.isin([7, 1])))
+
+
+def test_mixed_identifiers_fall_back_to_hashing():
+    identifiers = pd.Series(['b', 3, 'a', 1, 3, np.nan], dtype=object)
+    index = ii.IdentifierIndex(identifiers)
+    assert not index.sortable
+    assert sorted(index.order) == list(range(6))
+    assert index.order[-1] == 5
+    assert list(index.contains(['a', 3, 'z'])) == [True, True, False]
+    assert list(index.positions_of([3, 'b', 'q'])) == [1, 0, -1]
+    assert list(index.rows_of([3, 'a'])) == [1, 2, 4]
+
+
+def test_items_are_coerced_to_the_identifier_type():
+    numeric = ii.IdentifierIndex(pd.Series([5, 2, 9]))
+    assert list(numeric.contains(['2', '9', 'x', None])) == \
+        [True, True, False, False]
+    assert list(numeric.rows_of(['5'])) == [0]
+
+    text = ii.IdentifierIndex(pd.Series(['5', '2', '9']))
+    assert list(text.contains([5, 2.0, 7, np.nan])) == \
+        [True, True, False, False]
+    assert list(text.rows_of([9])) == [2]
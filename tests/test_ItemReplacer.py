@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules import ItemReplacer as ir
+
+
+def master_df(n_rows=400, n_strata=4):
+    return pd.DataFrame({'Item_ID': np.arange(n_rows),
+                         'Region': np.arange(n_rows) % n_strata,
+                         'Value': np.arange(n_rows) * 10})
+
+
+def working_df(master, n_rows=100):
+    return master.iloc[:n_rows].reset_index(drop=True)
+
+
+def test_validator_reports_every_kind_of_problem():
+    master = master_df()
+    working = pd.concat([working_df(master), working_df(master).iloc[[5]]])
+    validator = ir.ItemValidator(master, working, 'Item_ID')
+    result = validator.validate([1, 1, 5, 150, 9999])
+    assert result['missing_from_working'] == [150, 9999]
+    assert result['duplicated_in_request'] == [1]
+    assert result['duplicated_in_working'] == [5]
+    assert result['absent_from_master'] == [9999]
+    assert result['valid'] is False
+    assert validator.validate([2, 3])['valid'] is True
+
+
+def test_validator_matches_items_as_the_replacement_does():
+    master = master_df().astype({'Item_ID': str})
+    working = working_df(master)
+    replacer = ir.DirectItemReplacer(master, working, 'Item_ID', [15, 7.0],
+                                     random_state=0)
+    assert replacer.validate_items()['valid'] is True
+    replaced = replacer.replacer()
+    assert not replaced['Item_ID'].isin(['7', '15']).any()
+    assert len(replaced) == len(working)
+
+    numeric_master = master_df()
+    validator = ir.ItemValidator(numeric_master, working_df(numeric_master), 'Item_ID')
+    result = validator.validate(['15', 15, '150'])
+    assert result['missing_from_working'] == ['150']
+    assert result['duplicated_in_request'] == [15]
+    assert validator.validate(['15'])['absent_from_master'] == []
+
+
+def test_direct_replacement_draws_one_row_per_removed_item():
+    master = master_df()
+    working = working_df(master)
+    replaced = ir.DirectItemReplacer(master, working, 'Item_ID', [3, 3, 7],
+                                     random_state=1).replacer()
+    assert len(replaced) == len(working)
+    assert replaced['Item_ID'].is_unique
+    assert not replaced['Item_ID'].isin([3, 7]).any()
+
+
+def test_structured_replacement_keeps_strata_and_never_reuses_rows():
+    master = master_df()
+    working = working_df(master)
+    items = list(range(0, 60, 2))
+    replaced = ir.StructuredItemReplacer(master, working, 'Item_ID', items,
+                                         ['Region'], random_state=1).replacer()
+
+    assert len(replaced) == len(working)
+    assert replaced['Item_ID'].is_unique
+    assert not replaced['Item_ID'].isin(items).any()
+    assert (replaced['Region'].value_counts().sort_index()
+            == working['Region'].value_counts().sort_index()).all()
+
+
+def test_structured_replacement_raises_when_the_master_runs_out():
+    master = master_df(n_rows=110)
+    working = working_df(master)
+    with pytest.raises(ValueError):
+        ir.StructuredItemReplacer(master, working, 'Item_ID', list(range(20)),
+                                  ['Region'], random_state=1).replacer()
+
+
+def test_direct_replacement_raises_when_the_master_runs_out():
+    master = master_df(n_rows=110)
+    working = working_df(master)
+    with pytest.raises(ValueError):
+        ir.DirectItemReplacer(master, working, 'Item_ID', list(range(20)),
+                              random_state=1).replacer()
+
+
+def test_replacement_is_reproducible_for_a_seed():
+    master = master_df()
+    working = working_df(master)
+    draws = [ir.StructuredItemReplacer(master, working, 'Item_ID', [4, 8, 15],
+                                       ['Region'], random_state=seed).replacer()
+             for seed in (6, 6, 7)]
+    assert draws[0].equals(draws[1])
+    assert not draws[0].equals(draws[2])
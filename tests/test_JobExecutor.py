@@ -0,0 +1,60 @@
+import threading
+import pytest
+from modules import JobExecutor as jb
+
+
+def test_jobs_run_with_progress_and_reattach_by_key():
+    executor = jb.JobExecutor(max_workers=1)
+
+    def count(total, progress=None):
+        progress.stage('count')
+        for done in range(total + 1):
+            progress.update('units', done, total)
+        return total
+
+    job = executor.submit(count, 5, key='count-5')
+    assert executor.submit(count, 5, key='count-5') is job
+    job.future.result()
+    assert job.status == 'done' and job.result == 5
+    assert job.progress.fraction() == 1.0
+    assert job.progress.describe() == 'count units: 5/5'
+
+    executor.forget(job.job_id)
+    assert executor.job_for('count-5') is None
+    assert executor.submit(count, 5, key='count-5') is not job
+    executor.shutdown()
+
+
+def test_cancelled_jobs_stop_at_their_next_report():
+    executor = jb.JobExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def wait(progress=None):
+        progress.stage('wait')
+        started.set()
+        release.wait(5)
+        progress.update('units', 1, 2)
+        return 'finished'
+
+    job = executor.submit(wait)
+    started.wait(5)
+    job.cancel()
+    release.set()
+    job.future.result()
+    assert job.status == 'cancelled' and job.result is None
+    executor.shutdown()
+
+
+def test_failures_are_recorded_on_the_job():
+    executor = jb.JobExecutor(max_workers=1)
+
+    def fail(progress=None):
+        raise ValueError('bad parameters')
+
+    job = executor.submit(fail)
+    job.future.result()
+    assert job.status == 'failed'
+    with pytest.raises(ValueError):
+        raise job.error
+    executor.shutdown()
@@ -0,0 +1,28 @@
+import io
+import pandas as pd
+from modules import DataReader as rd
+from modules import ParseCache as pc
+
+
+def test_parsed_csv_is_reused_from_the_cache(tmp_path, monkeypatch):
+    cache = pc.ParseCache(cache_dir=str(tmp_path))
+    df = pd.DataFrame({'Item_ID': range(50), 'Region': ['N', 'S'] * 25})
+    source = io.BytesIO(df.to_csv(index=False).encode())
+    first = cache.read(rd.CsvReader(source, name='panel.csv'))
+    assert len(cache.entries()) == 1
+
+    def fail_read(self, columns=None):
+        raise AssertionError('the cached entry was not used')
+
+    monkeypatch.setattr(rd.CsvReader, 'read', fail_read)
+    second = cache.read(rd.CsvReader(source, name='panel.csv'))
+    assert second.equals(first)
+    assert list(second['Item_ID']) == list(range(50))
+
+
+def test_different_bytes_get_different_entries(tmp_path):
+    cache = pc.ParseCache(cache_dir=str(tmp_path))
+    assert cache.content_hash(io.BytesIO(b'a\n1\n')) != \
+        cache.content_hash(io.BytesIO(b'a\n2\n'))
+    assert cache.content_hash(io.BytesIO(b'a\n1\n')) != \
+        cache.content_hash(io.BytesIO(b'a\n1\n'), encoding='latin-1')
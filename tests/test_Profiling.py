@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules import Profiling as pf
+from modules import StructuredSampler as ss
+
+
+def stratified_df(n_rows=500, n_strata=4):
+    return pd.DataFrame({'Item_ID': np.arange(n_rows),
+                         'Region': np.arange(n_rows) % n_strata})
+
+
+def test_profiled_sampler_reports_nested_stages():
+    sampler = ss.StructuredSampler(stratified_df(), 50, 'Item_ID', ['Region'],
+                                   random_state=1)
+    with pf.profiling(pf.MemorySink()) as (sink,):
+        sampler.structured_sample()
+    paths = {event['stage']: event['path'] for event in sink.events}
+
+    assert not pf.enabled()
+    assert sink.events[-1]['stage'] == 'StructuredSampler.structured_sample'
+    assert paths['StructuredSampler.structured_sample'] == 'StructuredSampler.structured_sample'
+    for name in ('StructuredSampler.pivot',
+                 'StructuredSampler.stratum_index',
+                 'StructuredSampler.stratum_draw'):
+        assert paths[name] == f'StructuredSampler.structured_sample/{name}'
+    pivot = next(event for event in sink.events if event['stage'] == 'StructuredSampler.pivot')
+    assert pivot['rows'] == 500 and pivot['strata'] == 4
+    summary = sink.summary()
+    assert summary['StructuredSampler.structured_sample']['calls'] == 1
+    assert all(event['seconds'] >= 0 for event in sink.events)
+
+
+def test_failed_stage_reports_its_error():
+    with pf.profiling(pf.MemorySink()) as (sink,):
+        with pytest.raises(KeyError):
+            with pf.stage('outer'):
+                with pf.stage('inner', rows=3):
+                    raise KeyError('boom')
+
+    assert [(event['path'], event['error']) for event in sink.events] == [
+        ('outer/inner', 'KeyError'), ('outer', 'KeyError')]
+    assert sink.events[0]['rows'] == 3
+
+
+def test_disabled_profiling_records_nothing():
+    sink = pf.MemorySink()
+    pf.add_sink(sink)
+    pf.remove_sink(sink)
+    sampler = ss.StructuredSampler(stratified_df(), 50, 'Item_ID', ['Region'],
+                                   random_state=1)
+
+    assert not pf.enabled()
+    assert pf.stage('StructuredSampler.pivot') is pf.NULL_STAGE
+    assert len(sampler.structured_sample()) == 50
+    assert sink.events == []
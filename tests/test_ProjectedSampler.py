@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from modules import DataReader as rd
+from modules import ProjectedSampler as prs
+from modules import StructuredSampler as ss
+
+
+def wide_df(n_rows=600):
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({f'Extra_{i}': rng.random(n_rows) for i in range(5)})
+    df['Item_ID'] = rng.permutation(n_rows)
+    df['Region'] = rng.integers(0, 6, n_rows)
+    return df
+
+
+def test_projected_sample_equals_the_full_frame_sample():
+    df = wide_df()
+    full = ss.StructuredSampler(df, 80, 'Item_ID', ['Region'],
+                                random_state=11).structured_sample()
+    projected = prs.ProjectedStructuredSampler(rd.DataFrameReader(df), 80,
+                                               'Item_ID', ['Region'],
+                                               random_state=11)
+    assert projected.structured_sample().equals(full)
+
+
+def test_file_reader_parses_only_the_key_columns(tmp_path, monkeypatch):
+    df = wide_df()
+    path = tmp_path / 'panel.csv'
+    df.to_csv(path, index=False)
+    requested = []
+    read = rd.CsvReader.read
+
+    def tracking_read(self, columns=None):
+        requested.append(columns)
+        return read(self, columns)
+
+    monkeypatch.setattr(rd.CsvReader, 'read', tracking_read)
+    sampler = prs.ProjectedStructuredSampler(rd.reader_for(str(path)), 80,
+                                             'Item_ID', ['Region'],
+                                             random_state=11)
+    sample = sampler.structured_sample()
+    assert requested == [['Item_ID', 'Region']]
+    assert list(sample.columns) == list(df.columns)
+    assert np.allclose(sample['Extra_0'], df.loc[sample.index, 'Extra_0'])
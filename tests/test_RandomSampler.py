@@ -0,0 +1,47 @@
+import io
+import numpy as np
+import pandas as pd
+from modules import RandomSampler as rs
+
+
+def population_df(n_rows=5000):
+    return pd.DataFrame({'Item_ID': np.arange(n_rows),
+                         'Value': np.arange(n_rows) * 2})
+
+
+def csv_buffer(df):
+    return io.StringIO(df.to_csv(index=False))
+
+
+def test_streaming_sampler_reads_chunksize_reader():
+    df = population_df()
+    chunk_reader = pd.read_csv(csv_buffer(df), chunksize=700)
+    sampler = rs.StreamingRandomSampler(chunk_reader,
+                                        standard_error=5,
+                                        random_state=3)
+
+    sampled_df = sampler.sampled_df()
+
+    expected_size = sampler.sample_size_calculator.sample_size(population_size=len(df))
+    assert sampler.population_size == len(df)
+    assert len(sampled_df) == expected_size
+    assert sampled_df['Item_ID'].is_unique
+    assert (sampled_df['Value'] == sampled_df['Item_ID'] * 2).all()
+
+
+def test_streaming_sampler_matches_across_csv_sources(tmp_path):
+    df = population_df()
+    csv_path = tmp_path / 'population.csv'
+    df.to_csv(csv_path, index=False)
+
+    from_path = rs.StreamingRandomSampler(csv_path, standard_error=5,
+                                          chunksize=700, random_state=3).sampled_df()
+    from_buffer = rs.StreamingRandomSampler(csv_buffer(df), standard_error=5,
+                                            chunksize=700, random_state=3).sampled_df()
+    from_chunks = rs.StreamingRandomSampler(pd.read_csv(csv_path, chunksize=700),
+                                            standard_error=5,
+                                            population_size=len(df),
+                                            random_state=3).sampled_df()
+
+    assert from_path.equals(from_buffer)
+    assert from_path.equals(from_chunks)
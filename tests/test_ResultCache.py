@@ -0,0 +1,76 @@
+import threading
+import numpy as np
+import pandas as pd
+from modules import ResultCache as rc
+
+
+def test_key_depends_on_every_input_but_not_on_parameter_order():
+    key = rc.ResultCache.key('a1', 'structured_sample', {'n': 5, 'cols': ['x']}, 7)
+    assert key == rc.ResultCache.key('a1', 'structured_sample',
+                                     {'cols': ['x'], 'n': 5}, 7)
+    assert key != rc.ResultCache.key('a2', 'structured_sample',
+                                     {'n': 5, 'cols': ['x']}, 7)
+    assert key != rc.ResultCache.key('a1', 'structured_sample',
+                                     {'n': 5, 'cols': ['x']}, 8)
+
+
+def test_evicted_results_are_served_from_disk(tmp_path):
+    cache = rc.ResultCache(max_entries=2, cache_dir=str(tmp_path))
+    frames = {str(i): pd.DataFrame({'value': np.arange(i + 1)}) for i in range(4)}
+    for key, df in frames.items():
+        cache.put(key, df)
+    assert len(cache) == 2
+    assert cache.get('0').equals(frames['0'])
+    assert rc.ResultCache(cache_dir=str(tmp_path)).get('1').equals(frames['1'])
+    assert cache.get('missing') is None and cache.misses == 1
+
+
+def test_concurrent_use_keeps_the_cache_consistent():
+    cache = rc.ResultCache(max_entries=8)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(300):
+                key = str((offset + i) % 20)
+                if cache.get(key) is None:
+                    cache.put(key, np.full(10, int(key)))
+                assert cache.memory_usage() >= 0
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache) <= 8
+    assert cache.hits + cache.misses == 8 * 300
+    assert cache.memory_usage() == sum(rc.estimate_nbytes(np.full(10, 0))
+                                       for _ in range(len(cache)))
+
+
+def test_memory_hits_do_not_wait_for_a_disk_write(tmp_path, monkeypatch):
+    cache = rc.ResultCache(cache_dir=str(tmp_path))
+    cache.put('ready', 1)
+    writing = threading.Event()
+    release = threading.Event()
+    dump = rc.pickle.dump
+
+    def slow_dump(value, result_file, **kwargs):
+        writing.set()
+        release.wait(5)
+        dump(value, result_file, **kwargs)
+
+    monkeypatch.setattr(rc.pickle, 'dump', slow_dump)
+    writer = threading.Thread(target=cache.put, args=('large', 2))
+    writer.start()
+    assert writing.wait(5)
+    lookup = threading.Thread(target=cache.get, args=('ready',))
+    lookup.start()
+    lookup.join(1)
+    assert not lookup.is_alive()
+    release.set()
+    writer.join()
+    assert cache.get('large') == 2
@@ -0,0 +1,30 @@
+import math
+from statistics import NormalDist
+import numpy as np
+import pytest
+from modules import SampleSizeCalculator as ssc
+
+
+def test_erfc_matches_math_erfc():
+    x = np.linspace(-6, 25, 5001)
+    expected = np.array([math.erfc(value) for value in x])
+    np.testing.assert_allclose(ssc.erfc(x), expected, rtol=1e-12)
+
+
+def test_z_scores_match_the_normal_quantile():
+    levels = np.array([[50.0, 95.5], [99.9, 99.999]])
+    expected = [[NormalDist().inv_cdf(0.5 + level/200) for level in row]
+                for row in levels]
+    np.testing.assert_allclose(ssc.z_scores(levels, exact=True), expected, rtol=1e-12)
+
+
+def test_z_scores_keep_tabulated_levels():
+    z_scores = ssc.z_scores([99, 95, 97.5, 99])
+    assert z_scores[0] == z_scores[3] == 2.576
+    assert z_scores[1] == 1.96
+    assert z_scores[2] == pytest.approx(ssc.exact_z_score(97.5))
+
+
+def test_z_scores_reject_levels_out_of_range():
+    with pytest.raises(ValueError):
+        ssc.z_scores([50, 100])
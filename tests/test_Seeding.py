@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from modules import Seeding as sd
+
+
+def test_same_seed_gives_the_same_streams():
+    first = sd.substream(42, 'strata').random(5)
+    assert np.array_equal(first, sd.substream(42, 'strata').random(5))
+    assert not np.array_equal(first, sd.substream(42, 'allocation').random(5))
+    assert not np.array_equal(first, sd.substream(43, 'strata').random(5))
+
+
+def test_streams_do_not_depend_on_the_order_of_use():
+    root = np.random.SeedSequence(7)
+    sd.stream_seed(root, 'correction')
+    assert sd.stream_seed(root, 'strata').generate_state(4).tolist() == \
+        sd.stream_seed(7, 'strata').generate_state(4).tolist()
+    assert root.n_children_spawned == 0
+
+
+def test_generator_seeds_follow_its_state():
+    generator = np.random.default_rng(5)
+    first = sd.as_seed_sequence(generator).generate_state(4)
+    second = sd.as_seed_sequence(generator).generate_state(4)
+    assert not np.array_equal(first, second)
+
+    replayed = np.random.default_rng(5)
+    assert np.array_equal(first, sd.as_seed_sequence(replayed).generate_state(4))
+    assert not np.array_equal(sd.stream_seed(replayed, 'strata').generate_state(4),
+                              sd.stream_seed(np.random.default_rng(5), 'strata').generate_state(4))
+
+
+def test_spawn_is_reproducible():
+    children = sd.spawn(11, 'strata', 3)
+    again = sd.spawn(11, 'strata', 3)
+    assert len(children) == 3
+    assert [child.generate_state(2).tolist() for child in children] == \
+        [child.generate_state(2).tolist() for child in again]
+
+
+def test_generators_are_used_as_they_are():
+    generator = np.random.default_rng(0)
+    assert sd.as_generator(generator) is generator
+    assert sd.substream(generator, 'replacement') is generator
+
+
+@pytest.mark.parametrize('random_state', [None, 3, np.random.SeedSequence(3)])
+def test_as_generator_accepts_every_seed(random_state):
+    assert isinstance(sd.as_generator(random_state), np.random.Generator)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from modules import StratumIndex as si
+from modules import ParallelSampler as ps
+
+
+def strata_df(n_rows=2000, n_strata=40, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Region': rng.integers(0, n_strata, n_rows),
+                         'Channel': rng.integers(0, 3, n_rows)})
+
+
+def test_index_groups_every_row_under_its_stratum():
+    df = strata_df()
+    index = si.StratumIndex(df, ['Region', 'Channel'])
+    assert index.counts.sum() == len(df)
+    for code in range(len(index)):
+        rows = df.iloc[index.rows(code)]
+        key = index.keys.iloc[code]
+        assert (rows['Region'] == key['Region']).all()
+        assert (rows['Channel'] == key['Channel']).all()
+
+
+def test_sample_positions_draws_exact_stratum_sizes():
+    df = strata_df()
+    index = si.StratumIndex(df, ['Region'])
+    sample_sizes = index.counts // 3
+    positions = index.sample_positions(sample_sizes, random_state=5)
+    assert len(np.unique(positions)) == len(positions)
+    drawn_sizes = np.bincount(index.codes[positions], minlength=len(index))
+    assert (drawn_sizes == sample_sizes).all()
+
+
+def test_sample_does_not_depend_on_the_number_of_workers(monkeypatch):
+    stratum_blocks = si.stratum_blocks
+    monkeypatch.setattr(si, 'stratum_blocks',
+                        lambda counts: stratum_blocks(counts, block_rows=500))
+    df = strata_df(n_rows=20000, n_strata=300)
+    index = si.StratumIndex(df, ['Region'])
+    assert len(si.stratum_blocks(index.counts)) > 10
+    sample_sizes = index.counts // 4
+    serial = index.sample_positions(sample_sizes, random_state=9)
+    for n_jobs in (1, 2, 3):
+        parallel = ps.ParallelStratumSampler(index, sample_sizes,
+                                             random_state=9,
+                                             n_jobs=n_jobs).sample_positions()
+        assert np.array_equal(parallel, serial)
+
+
+def test_draw_unique_never_hands_out_a_row_twice():
+    df = strata_df(n_rows=300, n_strata=5)
+    index = si.StratumIndex(df, ['Region'])
+    excluded = np.zeros(len(df), dtype=bool)
+    excluded[:50] = True
+    requested_codes = np.repeat(np.arange(len(index)), index.counts)
+    drawn = index.draw_unique(requested_codes, excluded=excluded, random_state=2)
+
+    served = drawn[drawn >= 0]
+    assert len(np.unique(served)) == len(served)
+    assert not excluded[served].any()
+    assert (index.codes[served] == requested_codes[drawn >= 0]).all()
+    available = np.bincount(index.codes[~excluded], minlength=len(index))
+    assert (np.bincount(index.codes[served], minlength=len(index)) == available).all()
+
+
+def test_lattice_relaxes_to_coarser_strata_without_reusing_rows():
+    master_df = pd.DataFrame({'Region': ['N'] * 4 + ['S'] * 4,
+                              'Channel': ['A', 'A', 'B', 'B'] * 2})
+    requests_df = pd.DataFrame({'Region': ['N'] * 3 + ['S'],
+                                'Channel': ['A'] * 3 + ['C']})
+    lattice = si.StratumLattice(master_df, ['Region', 'Channel'])
+    drawn = lattice.draw_unique(requests_df, len(master_df), random_state=4)
+
+    assert len(np.unique(drawn)) == len(drawn)
+    assert set(drawn[:2]) == {0, 1}
+    assert drawn[2] in (2, 3)
+    assert master_df.loc[drawn[3], 'Region'] == 'S'
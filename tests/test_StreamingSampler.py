@@ -0,0 +1,63 @@
+import io
+import numpy as np
+import pandas as pd
+from modules import StreamingSampler as sts
+
+
+def panel_csv(n_rows=3000, n_strata=12):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'Item_ID': np.arange(n_rows),
+                       'Region': rng.integers(0, n_strata, n_rows),
+                       'Value': rng.random(n_rows)})
+    return df, df.to_csv(index=False)
+
+
+def test_streaming_sample_draws_its_allocation():
+    df, csv_text = panel_csv()
+    sampler = sts.StreamingStructuredSampler(io.StringIO(csv_text), 250,
+                                             'Item_ID', ['Region'],
+                                             chunksize=400, random_state=3)
+    sample = sampler.structured_sample()
+    pivot = sampler.working_pivot_df()
+    pivot['Region'] = pivot['Region'].astype(int)
+
+    assert sample['Item_ID'].is_unique
+    assert sample['Item_ID'].is_monotonic_increasing
+    assert np.allclose(sample['Value'], df.loc[sample.index, 'Value'])
+    counts = df['Region'].value_counts()
+    assert (pivot.set_index('Region')['Count'] == counts[pivot['Region']].to_numpy()).all()
+    expected = pivot.set_index('Region')['Sample_size_by_weight']
+    quotas = counts[expected.index] * 250 / len(df)
+    assert ((expected >= np.floor(quotas)) & (expected <= np.ceil(quotas))).all()
+    drawn = sample['Region'].astype(int).value_counts()
+    assert drawn.sum() == 250
+    assert drawn.to_dict() == expected[expected > 0].to_dict()
+
+
+def test_streaming_sample_does_not_depend_on_the_chunk_size():
+    df, csv_text = panel_csv()
+    samples = [sts.StreamingStructuredSampler(io.StringIO(csv_text), 250,
+                                              'Item_ID', ['Region'],
+                                              chunksize=chunksize,
+                                              random_state=3).structured_sample()
+               for chunksize in (250, 1000, 5000)]
+    assert samples[0].equals(samples[1])
+    assert samples[0].equals(samples[2])
+
+
+def test_streaming_sample_is_sorted_by_identifier():
+    df, _ = panel_csv()
+    df['Item_ID'] = np.random.default_rng(2).permutation(len(df))
+    csv_text = df.to_csv(index=False)
+    sample = sts.StreamingStructuredSampler(io.StringIO(csv_text), 250,
+                                            'Item_ID', ['Region'],
+                                            chunksize=400, random_state=3).structured_sample()
+    unsorted = sts.StreamingStructuredSampler(io.StringIO(csv_text), 250,
+                                              'Missing', ['Region'],
+                                              chunksize=400, random_state=3).structured_sample()
+
+    assert sample['Item_ID'].is_monotonic_increasing
+    assert (df.loc[sample.index, 'Item_ID'] == sample['Item_ID']).all()
+    assert unsorted.index.is_monotonic_increasing
+    assert sorted(unsorted.index) == sorted(sample.index)
+
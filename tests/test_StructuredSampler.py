@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules import StructuredSampler as ss
+
+
+def stratified_df(n_rows=1000, n_strata=7):
+    return pd.DataFrame({'Item_ID': np.arange(n_rows),
+                         'Region': np.arange(n_rows) % n_strata,
+                         'Value': np.arange(n_rows) * 3})
+
+
+@pytest.mark.parametrize('parameters', [{'sample_size': 1001},
+                                        {'structure_parameters': ['Missing']},
+                                        {'structure_parameters': ['Item_ID']}])
+def test_set_parameters_rejects_invalid_values(parameters):
+    sampler = ss.StructuredSampler(stratified_df(), 50, 'Item_ID', ['Region'],
+                                   random_state=1)
+    with pytest.raises(ValueError):
+        sampler.set_parameters(**parameters)
+    assert sampler.sample_size == 50
+    assert sampler.structure_parameters == ['Region']
+
+
+def test_set_parameters_resamples_with_the_new_size():
+    sampler = ss.StructuredSampler(stratified_df(), 50, 'Item_ID', ['Region'],
+                                   random_state=1)
+    sampler.structured_sample()
+    sampler.set_parameters(sample_size=120)
+    assert len(sampler.structured_sample()) == 120
+
+
+@pytest.mark.parametrize('counts, sample_size', [([5, 5, 5], 7),
+                                                 ([100, 1, 1, 30], 20),
+                                                 ([0, 4, 0], 3),
+                                                 ([3, 3], 0)])
+def test_largest_remainder_sums_to_the_sample_size(counts, sample_size):
+    allocation = ss.largest_remainder_allocation(counts, sample_size, random_state=2)
+    quotas = np.asarray(counts) * sample_size / sum(counts)
+    assert allocation.sum() == sample_size
+    assert (allocation >= np.floor(quotas)).all()
+    assert (allocation <= np.ceil(quotas)).all()
+
+
+def test_largest_remainder_breaks_ties_with_the_seed():
+    allocations = {tuple(ss.largest_remainder_allocation([1] * 10, 3, random_state=seed))
+                   for seed in range(20)}
+    assert len(allocations) > 1
+    assert all(sum(allocation) == 3 for allocation in allocations)
+
+
+def test_structured_sample_does_not_depend_on_n_jobs():
+    df = stratified_df(n_rows=5000, n_strata=60)
+    samples = [ss.StructuredSampler(df, 400, 'Item_ID', ['Region'],
+                                    random_state=8, n_jobs=n_jobs).structured_sample()
+               for n_jobs in (None, 1, 2)]
+    assert samples[0].equals(samples[1])
+    assert samples[0].equals(samples[2])
+    assert len(samples[0]) == 400